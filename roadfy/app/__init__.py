@@ -19,6 +19,10 @@ def create_app():
     # Usar static_url_path='' para servir desde la raíz, pero también agregar rutas explícitas
     app = Flask(__name__, static_folder=str(static_folder), static_url_path='')
     
+    # JSON de las respuestas: orjson si está instalado (ver app/utils/jsoncodec.py)
+    from app.utils.jsoncodec import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Configuración
     app.config['JWT_SECRET_KEY'] = Config.JWT_SECRET_KEY
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = Config.JWT_ACCESS_TOKEN_EXPIRES
@@ -46,6 +50,7 @@ def create_app():
     from app.routers.reviews import reviews_bp
     from app.routers.stats import stats_bp
     from app.routers.governance import governance_bp
+    from app.routers.reservations import reservations_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(tires_bp, url_prefix='/api/tires')
@@ -55,6 +60,7 @@ def create_app():
     app.register_blueprint(reviews_bp, url_prefix='/api/reviews')
     app.register_blueprint(stats_bp, url_prefix='/api/stats')
     app.register_blueprint(governance_bp, url_prefix='/api/governance')
+    app.register_blueprint(reservations_bp, url_prefix='/api/reservations')
     
     # Handler para OPTIONS requests (preflight)
     @app.before_request
@@ -88,7 +94,8 @@ def create_app():
                 'users': '/api/users',
                 'reviews': '/api/reviews',
                 'stats': '/api/stats',
-                'governance': '/api/governance'
+                'governance': '/api/governance',
+                'reservations': '/api/reservations'
             }
         })
     
@@ -174,6 +181,22 @@ def create_app():
     # Probar conexión a la base de datos al iniciar
     test_connection()
     
+    # Iniciar el escritor de auditoría (recupera entradas pendientes del journal)
+    from app.governance.audit import start_audit_writer
+    start_audit_writer()
+    
+    # Barrido de reservas vencidas (devuelve el stock apartado)
+    from app.inventory.reservations import start_reservation_sweeper
+    start_reservation_sweeper()
+    
+    # Reparto de eventos de inventario publicados por otros procesos
+    from app.inventory.events import start_event_relay
+    start_event_relay()
+    
+    # Latido de importaciones en curso y recuperación de las huérfanas
+    from app.inventory.imports import start_import_monitor
+    start_import_monitor()
+    
     # After request handler para asegurar CORS en todas las respuestas
     @app.after_request
     def after_request(response):
@@ -0,0 +1,3 @@
+"""
+Lógica de negocios compartida por los routers (vista de detalle agregada, calificaciones y reseñas paginadas)
+"""
@@ -0,0 +1,126 @@
+"""
+Vista de detalle de un negocio en una sola llamada.
+
+get_business_full() arma negocio (con sus agregados de reseñas) + página de
+inventario con stock (con los datos de cada llanta) + primera página de
+reseñas con tres consultas sobre una misma conexión. El resultado se cachea por
+negocio y se invalida con cualquier escritura de inventario, reseñas o del
+negocio. Cada invalidación sube la generación del negocio, y una lectura solo
+guarda su resultado si la generación no cambió mientras consultaba: así una
+lectura lenta que empezó antes de la escritura no vuelve a cachear datos viejos.
+"""
+from app.db import get_db_connection
+from app.config import Config
+from app.inventory.events import hub
+from app.utils.cache import TTLCache
+from app.businesses.reviews import fetch_reviews_page, review_summary_to_dict
+from app.utils.serializers import business_to_dict, review_to_dict, tire_to_dict
+import threading
+
+_cache = TTLCache(ttl_seconds=Config.BUSINESS_DETAIL_CACHE_SECONDS, max_entries=2000)
+_generations = {}  # business_id -> number of invalidations
+_generations_lock = threading.Lock()
+
+
+def invalidate_business(business_id):
+    """Drop every cached detail page of a business (and any page still being built)."""
+    with _generations_lock:
+        _generations[business_id] = _generations.get(business_id, 0) + 1
+        _cache.invalidate(lambda key: key[0] == business_id)
+
+
+def _on_inventory_event(event):
+    if event['business_id']:
+        invalidate_business(event['business_id'])
+
+
+hub.add_listener(_on_inventory_event)
+
+
+def get_business_full(business_id, page=1, page_size=20, reviews_limit=10):
+    """
+    Build the business detail payload.
+
+    Returns:
+        dict or None if the business does not exist
+    """
+    key = (business_id, page, page_size, reviews_limit)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    with _generations_lock:
+        generation = _generations.get(business_id, 0)
+
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, nombre, direccion, telefono, correo, horarios, descripcion,
+                   calificacion, cantidad_resenas, url_mapa_google, url_imagen,
+                   redes_sociales, creado_en, latitud, longitud, suma_calificaciones,
+                   estrellas_1, estrellas_2, estrellas_3, estrellas_4, estrellas_5
+            FROM negocios_llantas
+            WHERE id = %s
+        """, (business_id,))
+        business = cursor.fetchone()
+        if not business:
+            cursor.close()
+            return None
+
+        cursor.execute("""
+            SELECT i.id, i.negocio_id, i.llanta_id, i.cantidad, i.cantidad_reservada, i.precio,
+                   i.version, i.creado_en,
+                   l.marca, l.modelo, l.ancho, l.relacion_aspecto, l.diametro, l.tipo,
+                   l.url_imagen, l.creado_en AS llanta_creado_en,
+                   COUNT(*) OVER () AS total
+            FROM items_inventario i
+            JOIN llantas l ON l.id = i.llanta_id
+            WHERE i.negocio_id = %s AND i.cantidad - i.cantidad_reservada > 0
+            ORDER BY i.precio ASC, i.id
+            LIMIT %s OFFSET %s
+        """, (business_id, page_size, (page - 1) * page_size))
+        inventory_rows = cursor.fetchall()
+
+        reviews, next_cursor = fetch_reviews_page(cursor, business_id, reviews_limit)
+        cursor.close()
+    finally:
+        conn.close()
+
+    items = []
+    for row in inventory_rows:
+        tire = tire_to_dict({
+            'id': row['llanta_id'], 'marca': row['marca'], 'modelo': row['modelo'],
+            'ancho': row['ancho'], 'relacion_aspecto': row['relacion_aspecto'],
+            'diametro': row['diametro'], 'tipo': row['tipo'], 'url_imagen': row['url_imagen'],
+            'creado_en': row['llanta_creado_en']
+        })
+        items.append({
+            'id': row['id'],
+            'tire': tire,
+            'quantity': row['cantidad'],
+            'available': row['cantidad'] - row['cantidad_reservada'],
+            'price': float(row['precio']),
+            'version': row['version']
+        })
+
+    result = {
+        'business': business_to_dict(business),
+        'inventory': {
+            'items': items,
+            'total': inventory_rows[0]['total'] if inventory_rows else 0,
+            'page': page,
+            'page_size': page_size
+        },
+        'reviews': {
+            'summary': review_summary_to_dict(business),
+            'items': [review_to_dict(review) for review in reviews],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
+    }
+    with _generations_lock:
+        if _generations.get(business_id, 0) == generation:
+            _cache.set(key, result)
+    return result
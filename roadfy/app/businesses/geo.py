@@ -0,0 +1,303 @@
+"""
+Índice espacial en memoria de los negocios.
+
+Cada negocio con latitud/longitud se guarda en una celda geohash de
+precisión GEOHASH_PRECISION (~4.9 x 4.9 km). Una búsqueda por radio
+solo recorre las celdas que cubren el rectángulo del círculo y filtra por
+distancia haversine, así que cuesta lo mismo con 100 o 100.000 negocios.
+Se carga perezosamente desde la BD, los routers lo actualizan al
+crear/editar/eliminar negocios y se recarga completo cada
+GEO_INDEX_TTL_SECONDS para recoger los cambios de otros procesos.
+
+import_locations() carga coordenadas en lote (p. ej. exportadas de un
+geocodificador) por id de negocio o por dirección.
+"""
+from app.db import get_db_connection
+from app.config import Config
+from app.inventory.offers import offer_index
+from datetime import datetime, timezone
+import math
+import threading
+import time
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 5
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a point."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    code = []
+    bits = 0
+    value = 0
+    even = True  # even bits refine longitude
+    while len(code) < precision:
+        target, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            code.append(GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(code)
+
+
+def _cell_size(precision):
+    """(height, width) in degrees of a geohash cell."""
+    total_bits = 5 * precision
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** (total_bits - lat_bits)
+
+
+def _steps(low, high, step):
+    value = low
+    while value < high:
+        yield value
+        value += step
+    yield high
+
+
+def covering_cells(lat, lng, radius_km, precision=GEOHASH_PRECISION):
+    """Geohash cells intersecting the bounding box of a circle."""
+    cell_height, cell_width = _cell_size(precision)
+    delta_lat = radius_km / KM_PER_DEGREE
+    delta_lng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    cells = set()
+    for cell_lat in _steps(max(lat - delta_lat, -90.0), min(lat + delta_lat, 90.0), cell_height):
+        for cell_lng in _steps(lng - min(delta_lng, 180.0), lng + min(delta_lng, 180.0), cell_width):
+            wrapped = (cell_lng + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(min(cell_lat, 89.999999), wrapped, precision))
+    return cells
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def valid_coordinates(lat, lng):
+    """Whether lat/lng are numbers inside the valid ranges."""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return False
+    return -90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0
+
+
+class GeoIndex:
+    """Geohash grid of located businesses."""
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._cells = {}        # geohash -> set(business_id)
+        self._businesses = {}   # business_id -> {'name', 'address', 'rating', 'lat', 'lng', 'cell'}
+        self._loaded_at = None
+
+    def _load(self):
+        conn = get_db_connection()
+        if not conn:
+            raise Exception("No se pudo conectar a la base de datos")
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, nombre, direccion, calificacion, latitud, longitud
+                FROM negocios_llantas
+                WHERE latitud IS NOT NULL AND longitud IS NOT NULL
+            """)
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        cells = {}
+        businesses = {}
+        for row in rows:
+            entry = self._entry(row)
+            businesses[row['id']] = entry
+            cells.setdefault(entry['cell'], set()).add(row['id'])
+
+        with self._lock:
+            self._cells, self._businesses = cells, businesses
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+            with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                    self._load()
+
+    def invalidate(self):
+        """Force a full reload on the next read."""
+        with self._lock:
+            self._loaded_at = None
+
+    @staticmethod
+    def _entry(row):
+        lat, lng = float(row['latitud']), float(row['longitud'])
+        return {
+            'name': row['nombre'],
+            'address': row['direccion'],
+            'rating': float(row['calificacion'] or 0),
+            'lat': lat,
+            'lng': lng,
+            'cell': geohash_encode(lat, lng)
+        }
+
+    def _remove(self, business_id):
+        entry = self._businesses.pop(business_id, None)
+        if entry:
+            members = self._cells.get(entry['cell'])
+            members.discard(business_id)
+            if not members:
+                self._cells.pop(entry['cell'], None)
+
+    def upsert(self, row):
+        """Index (or move/unindex) a negocios_llantas row after a write."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._remove(row['id'])
+            if row.get('latitud') is not None and row.get('longitud') is not None:
+                entry = self._entry(row)
+                self._businesses[row['id']] = entry
+                self._cells.setdefault(entry['cell'], set()).add(row['id'])
+
+    def remove(self, business_id):
+        """Drop a deleted business."""
+        with self._lock:
+            self._remove(business_id)
+
+    def set_rating(self, business_id, rating):
+        """Keep the displayed rating current after a review."""
+        with self._lock:
+            entry = self._businesses.get(business_id)
+            if entry:
+                entry['rating'] = float(rating)
+
+    def nearby(self, lat, lng, radius_km, limit=20, tire_id=None):
+        """
+        Businesses within radius_km of a point, closest first.
+
+        With tire_id only businesses with that tire in stock are returned,
+        each with its cheapest offer (ties on distance: cheaper first).
+
+        Returns:
+            tuple: (results, total)
+        """
+        offers = None
+        if tire_id:
+            offers = offer_index.best_by_business(tire_id)
+            if not offers:
+                return [], 0
+
+        self._ensure_loaded()
+        matches = []
+        with self._lock:
+            for cell in covering_cells(lat, lng, radius_km):
+                for business_id in self._cells.get(cell, ()):
+                    if offers is not None and business_id not in offers:
+                        continue
+                    entry = self._businesses[business_id]
+                    distance = haversine_km(lat, lng, entry['lat'], entry['lng'])
+                    if distance <= radius_km:
+                        offer = offers[business_id] if offers is not None else None
+                        matches.append((distance, offer['price'] if offer else 0.0, business_id, entry, offer))
+
+        matches.sort(key=lambda match: match[:3])
+        results = []
+        for distance, _, business_id, entry, offer in matches[:limit]:
+            result = {
+                'business': {
+                    'id': business_id,
+                    'name': entry['name'],
+                    'address': entry['address'],
+                    'rating': entry['rating'],
+                    'location': {'lat': entry['lat'], 'lng': entry['lng']}
+                },
+                'distance_km': round(distance, 3)
+            }
+            if offer is not None:
+                result['offer'] = offer
+            results.append(result)
+        return results, len(matches)
+
+
+geo_index = GeoIndex(ttl_seconds=Config.GEO_INDEX_TTL_SECONDS)
+
+
+def _normalize_address(address):
+    return ' '.join((address or '').lower().replace(',', ' ').split())
+
+
+def import_locations(rows, batch_size=500):
+    """
+    Store coordinates for businesses in batches.
+
+    Each row has lat/lng plus either 'id' (business id) or 'address' (matched
+    against negocios_llantas.direccion, ignoring case, commas and spacing).
+
+    Returns:
+        dict: {'received', 'updated', 'unmatched', 'invalid', 'errors'}
+    """
+    report = {'received': 0, 'updated': 0, 'unmatched': 0, 'invalid': 0, 'errors': []}
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, direccion FROM negocios_llantas")
+        by_address = {}
+        known_ids = set()
+        for business in cursor.fetchall():
+            known_ids.add(business['id'])
+            by_address.setdefault(_normalize_address(business['direccion']), []).append(business['id'])
+
+        updates = []
+        now = datetime.now(timezone.utc)
+        for index, row in enumerate(rows):
+            report['received'] += 1
+            if not valid_coordinates(row.get('lat'), row.get('lng')):
+                report['invalid'] += 1
+                report['errors'].append({'index': index, 'error': 'Invalid coordinates'})
+                continue
+            if row.get('id'):
+                targets = [row['id']] if row['id'] in known_ids else []
+            else:
+                targets = by_address.get(_normalize_address(row.get('address')), [])
+            if not targets:
+                report['unmatched'] += 1
+                report['errors'].append({'index': index, 'error': 'No matching business'})
+                continue
+            updates.extend((float(row['lat']), float(row['lng']), now, business_id) for business_id in targets)
+
+        for start in range(0, len(updates), batch_size):
+            cursor.executemany("""
+                UPDATE negocios_llantas SET latitud = %s, longitud = %s, geocodificado_en = %s
+                WHERE id = %s
+            """, updates[start:start + batch_size])
+            conn.commit()
+        report['updated'] = len(updates)
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    geo_index.invalidate()
+    return report
@@ -0,0 +1,121 @@
+"""
+Agregados de calificación de los negocios.
+
+negocios_llantas guarda cantidad_resenas, suma_calificaciones y el
+histograma estrellas_1..estrellas_5. Cada reseña nueva o eliminada los
+ajusta con un único UPDATE atómico (incrementos relativos, sin leer y
+reescribir), y calificacion se deriva en la misma sentencia, así que
+reseñas concurrentes no pierden actualizaciones. reconcile_ratings()
+recalcula todo desde resenas por lotes para detectar y corregir deriva.
+"""
+from app.db import get_db_connection
+
+RATING_COLUMNS = ('cantidad_resenas', 'suma_calificaciones', 'estrellas_1', 'estrellas_2',
+                  'estrellas_3', 'estrellas_4', 'estrellas_5')
+
+
+def apply_review(cursor, business_id, rating, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one review from the business aggregates (caller commits).
+
+    MySQL applies the SET assignments left to right, so calificacion is
+    computed from the already updated sum and count.
+
+    Returns:
+        float or None: The new average rating, None if the business does not exist
+    """
+    rating = int(rating)
+    if not 1 <= rating <= 5:
+        raise ValueError("rating must be between 1 and 5")
+    cursor.execute(f"""
+        UPDATE negocios_llantas
+        SET cantidad_resenas = GREATEST(cantidad_resenas + %s, 0),
+            suma_calificaciones = GREATEST(suma_calificaciones + %s, 0),
+            estrellas_{rating} = GREATEST(estrellas_{rating} + %s, 0),
+            calificacion = IF(cantidad_resenas > 0, ROUND(suma_calificaciones / cantidad_resenas, 1), 0)
+        WHERE id = %s
+    """, (sign, sign * rating, sign, business_id))
+    if cursor.rowcount != 1:
+        return None
+    cursor.execute("SELECT calificacion FROM negocios_llantas WHERE id = %s", (business_id,))
+    row = cursor.fetchone()
+    return float(row['calificacion']) if row else None
+
+
+def reconcile_ratings(batch_size=500, business_id=None):
+    """
+    Recompute the aggregates of every business from resenas, in id order batches.
+
+    Only businesses whose stored values drifted are updated.
+
+    Returns:
+        dict: {'businesses', 'corrected', 'corrected_ids'}
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+
+    stats = {'businesses': 0, 'corrected': 0, 'corrected_ids': []}
+    last_id = ''
+    try:
+        cursor = conn.cursor()
+        while True:
+            # Lock the batch first: reviews in flight wait for our commit and then
+            # apply their increment on top of the recomputed values.
+            if business_id:
+                cursor.execute(f"""
+                    SELECT id, {', '.join(RATING_COLUMNS)} FROM negocios_llantas
+                    WHERE id = %s FOR UPDATE
+                """, (business_id,))
+            else:
+                cursor.execute(f"""
+                    SELECT id, {', '.join(RATING_COLUMNS)} FROM negocios_llantas
+                    WHERE id > %s ORDER BY id LIMIT %s FOR UPDATE
+                """, (last_id, batch_size))
+            businesses = cursor.fetchall()
+            if not businesses:
+                break
+
+            ids = [business['id'] for business in businesses]
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                SELECT negocio_id, COUNT(*) AS cantidad_resenas,
+                       COALESCE(SUM(calificacion), 0) AS suma_calificaciones,
+                       SUM(calificacion = 1) AS estrellas_1, SUM(calificacion = 2) AS estrellas_2,
+                       SUM(calificacion = 3) AS estrellas_3, SUM(calificacion = 4) AS estrellas_4,
+                       SUM(calificacion = 5) AS estrellas_5
+                FROM resenas
+                WHERE negocio_id IN ({placeholders})
+                GROUP BY negocio_id
+            """, ids)
+            actual = {row['negocio_id']: row for row in cursor.fetchall()}
+
+            corrections = []
+            for business in businesses:
+                expected = actual.get(business['id'], {})
+                values = tuple(int(expected.get(column) or 0) for column in RATING_COLUMNS)
+                if values != tuple(int(business[column] or 0) for column in RATING_COLUMNS):
+                    corrections.append(values + (business['id'],))
+                    stats['corrected_ids'].append(business['id'])
+
+            if corrections:
+                cursor.executemany(f"""
+                    UPDATE negocios_llantas
+                    SET {', '.join(f'{column} = %s' for column in RATING_COLUMNS)},
+                        calificacion = IF(cantidad_resenas > 0, ROUND(suma_calificaciones / cantidad_resenas, 1), 0)
+                    WHERE id = %s
+                """, corrections)
+            conn.commit()
+
+            stats['businesses'] += len(businesses)
+            stats['corrected'] += len(corrections)
+            if business_id or len(businesses) < batch_size:
+                break
+            last_id = ids[-1]
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return stats
@@ -0,0 +1,112 @@
+"""
+Reseñas paginadas por keyset.
+
+Las reseñas de un negocio se recorren en orden (creado_en DESC, id DESC)
+usando como cursor la última reseña entregada, así cada página cuesta lo
+mismo sin importar qué tan profunda sea. El resumen (cantidad, promedio e
+histograma) sale de los agregados de negocios_llantas (ver ratings.py), sin
+recorrer resenas.
+"""
+import base64
+import json
+from datetime import datetime
+from app.db import get_db_connection
+from app.utils.serializers import review_to_dict
+
+REVIEW_COLUMNS = """id, negocio_id, usuario_id, nombre_usuario, avatar_usuario,
+                   calificacion, comentario, creado_en"""
+
+
+def review_summary_to_dict(business):
+    """Convert the rating aggregates of a negocios_llantas row to {'count', 'average', 'distribution'}."""
+    count = int(business['cantidad_resenas'] or 0)
+    return {
+        'count': count,
+        'average': round(int(business['suma_calificaciones'] or 0) / count, 2) if count else 0.0,
+        'distribution': {str(stars): int(business[f'estrellas_{stars}'] or 0) for stars in range(1, 6)}
+    }
+
+
+def encode_cursor(review):
+    """Opaque cursor pointing right after the given resenas row."""
+    raw = json.dumps([review['creado_en'].isoformat(), review['id']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Parse a cursor produced by encode_cursor().
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, review_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), str(review_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def fetch_reviews_page(cursor, business_id, limit, after=None):
+    """
+    Read one page of reviews with the given DB cursor.
+
+    Args:
+        after: (created_at, review_id) of the last review already seen, or None
+
+    Returns:
+        tuple: (reviews, next_cursor) - next_cursor is None on the last page
+    """
+    where = "negocio_id = %s"
+    params = [business_id]
+    if after:
+        where += " AND (creado_en < %s OR (creado_en = %s AND id < %s))"
+        params += [after[0], after[0], after[1]]
+    cursor.execute(f"""
+        SELECT {REVIEW_COLUMNS}
+        FROM resenas
+        WHERE {where}
+        ORDER BY creado_en DESC, id DESC
+        LIMIT %s
+    """, params + [limit + 1])
+    reviews = cursor.fetchall()
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        return reviews, encode_cursor(reviews[-1])
+    return reviews, None
+
+
+def get_reviews_page(business_id, limit=20, after=None):
+    """
+    Summary and one page of reviews of a business.
+
+    Returns:
+        dict or None if the business does not exist:
+        {'summary', 'items', 'next_cursor', 'has_more'}
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT cantidad_resenas, suma_calificaciones, estrellas_1, estrellas_2,
+                   estrellas_3, estrellas_4, estrellas_5
+            FROM negocios_llantas WHERE id = %s
+        """, (business_id,))
+        business = cursor.fetchone()
+        if not business:
+            cursor.close()
+            return None
+        reviews, next_cursor = fetch_reviews_page(cursor, business_id, limit, after)
+        cursor.close()
+    finally:
+        conn.close()
+
+    return {
+        'summary': review_summary_to_dict(business),
+        'items': [review_to_dict(review) for review in reviews],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
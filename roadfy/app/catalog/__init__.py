@@ -0,0 +1,3 @@
+"""
+Lógica del catálogo de llantas compartida por los routers (importación, índices, búsqueda)
+"""
@@ -0,0 +1,93 @@
+"""
+Comparación de varias llantas en una sola llamada.
+
+compare_tires() arma, para cada llanta pedida, su ficha, rango de precios,
+cantidad de ofertas con stock y las mejores ofertas (con nombre, dirección y
+calificación del negocio) con dos consultas sobre una misma conexión, sin
+importar cuántas llantas se comparen: las fichas con un IN y las ofertas
+rankeadas por llanta con funciones de ventana.
+"""
+from app.db import get_db_connection
+from app.utils.serializers import tire_to_dict
+
+
+def compare_tires(tire_ids, top=5, skip=0):
+    """
+    Build the comparison payload of several tires.
+
+    Offers are ordered like the best-offer index: cheapest first, ties by
+    best-rated business. topOffers holds positions skip+1 to skip+top, so
+    the rest of a tire's offerCount can be paged.
+
+    Returns:
+        dict: {'tires': [...] in the requested order, 'not_found': [ids]}
+    """
+    placeholders = ', '.join(['%s'] * len(tire_ids))
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT id, marca, modelo, ancho, relacion_aspecto, diametro, tipo, url_imagen, creado_en
+            FROM llantas WHERE id IN ({placeholders})
+        """, tire_ids)
+        tires = {row['id']: row for row in cursor.fetchall()}
+
+        offers = []
+        if tires:
+            found = list(tires)
+            cursor.execute(f"""
+                SELECT item_id, llanta_id, negocio_id, precio, disponible, nombre, direccion,
+                       calificacion, posicion, total, precio_min, precio_max
+                FROM (
+                    SELECT i.id AS item_id, i.llanta_id, i.negocio_id, i.precio,
+                           i.cantidad - i.cantidad_reservada AS disponible,
+                           n.nombre, n.direccion, n.calificacion,
+                           ROW_NUMBER() OVER (PARTITION BY i.llanta_id
+                                              ORDER BY i.precio, n.calificacion DESC, i.id) AS posicion,
+                           COUNT(*) OVER (PARTITION BY i.llanta_id) AS total,
+                           MIN(i.precio) OVER (PARTITION BY i.llanta_id) AS precio_min,
+                           MAX(i.precio) OVER (PARTITION BY i.llanta_id) AS precio_max
+                    FROM items_inventario i
+                    JOIN negocios_llantas n ON n.id = i.negocio_id
+                    WHERE i.llanta_id IN ({', '.join(['%s'] * len(found))})
+                      AND i.cantidad - i.cantidad_reservada > 0
+                ) ofertas
+                WHERE posicion = 1 OR (posicion > %s AND posicion <= %s)
+                ORDER BY llanta_id, posicion
+            """, found + [skip, skip + top])
+            offers = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    by_tire = {}
+    for offer in offers:
+        by_tire.setdefault(offer['llanta_id'], []).append(offer)
+
+    result = []
+    for tire_id in tire_ids:
+        if tire_id not in tires:
+            continue
+        tire_offers = by_tire.get(tire_id, [])
+        first = tire_offers[0] if tire_offers else None  # the cheapest offer carries the totals even past it
+        entry = tire_to_dict(tires[tire_id])
+        entry.update({
+            'minPrice': float(first['precio_min']) if first else None,
+            'maxPrice': float(first['precio_max']) if first else None,
+            'hasStock': first is not None,
+            'offerCount': int(first['total']) if first else 0,
+            'topOffers': [{
+                'item_id': offer['item_id'],
+                'business_id': offer['negocio_id'],
+                'business_name': offer['nombre'],
+                'business_address': offer['direccion'],
+                'business_rating': float(offer['calificacion'] or 0),
+                'price': float(offer['precio']),
+                'quantity': int(offer['disponible'])
+            } for offer in tire_offers if offer['posicion'] > skip]
+        })
+        result.append(entry)
+
+    return {'tires': result, 'not_found': [tire_id for tire_id in tire_ids if tire_id not in tires]}
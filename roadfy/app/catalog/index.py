@@ -0,0 +1,576 @@
+"""
+Índice columnar en memoria del catálogo de llantas y motor de filtros.
+
+Cada llanta ocupa una posición (un bit); sus atributos viven en listas por
+columna y, para cada valor de marca, tipo, ancho, perfil y diámetro, un
+bitmap (un int de Python con el bit de cada posición) marca las llantas que
+lo tienen. Otros bitmaps marcan las llantas con stock y, por tramo de
+PRICE_BUCKET_SIZE, las que tienen una oferta con stock a ese precio (según el
+índice de mejores ofertas). Cualquier combinación de filtros es una
+intersección de bitmaps: las facetas cuentan bits y los listados recorren los
+bits más altos primero (las posiciones siguen creado_en, así que la página sale
+ordenada de más nueva a más antigua) sin tocar la BD. Una medida escrita en la
+búsqueda ("205/55 R16") filtra por esa medida y, si se pide, por sus
+equivalentes (ver sizes.py), con la tabla de equivalencias de las medidas del
+catálogo precalculada.
+
+Se carga perezosamente y se mantiene al día con las escrituras del catálogo
+(upsert/remove) y los eventos de inventario. Cada escritura de llantas anota
+el id en cambios_catalogo dentro de su transacción (record_catalog_changes);
+antes de cada consulta, sync() lee esa tabla y los eventos de inventario de
+otros procesos (dos lecturas por id indexadas) y aplica lo nuevo, así que
+ningún worker filtra con un catálogo o un stock viejos. Las llantas
+eliminadas dejan su posición vacía hasta la recarga completa de cada
+CATALOG_INDEX_TTL_SECONDS.
+"""
+from app.db import get_db_connection
+from app.config import Config
+from app.inventory.events import hub
+from app.inventory.offers import offer_index
+from app.catalog.sizes import SIZE_DIAMETER_TOLERANCE, SizeTable, overall_diameter_mm, size_label, split_size
+from app.utils.changefeed import ChangeFeed
+from bisect import bisect_left
+import sys
+import threading
+import time
+
+FACET_FIELDS = ('brand', 'type', 'width', 'aspectRatio', 'diameter')
+_NUMERIC_FACETS = ('width', 'aspectRatio', 'diameter')
+PRICE_BUCKET_SIZE = 50.0
+
+
+def _number(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def bitmap_from_positions(positions, size):
+    """Build a bitmap (int with bit i set for each position i) in one pass."""
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def positions_desc(bitmap, skip=0, limit=None):
+    """
+    Set positions of a bitmap, highest first, after skipping `skip` of them.
+
+    Works on 64-bit words: empty words and whole skipped words cost one step.
+    """
+    result = []
+    if limit == 0 or not bitmap:
+        return result
+    word_count = (bitmap.bit_length() + 63) // 64
+    words = memoryview(bitmap.to_bytes(word_count * 8, sys.byteorder)).cast('Q')
+    for word_index in range(word_count - 1, -1, -1):
+        word = words[word_index]
+        if not word:
+            continue
+        if skip:
+            bits = word.bit_count()
+            if skip >= bits:
+                skip -= bits
+                continue
+        base = word_index * 64
+        while word:
+            bit = word.bit_length() - 1
+            word ^= 1 << bit
+            if skip:
+                skip -= 1
+                continue
+            result.append(base + bit)
+            if len(result) == limit:
+                return result
+    return result
+
+
+def _price_buckets(prices):
+    return {int(price // PRICE_BUCKET_SIZE) for price in prices}
+
+
+def _any_between(prices, low, high):
+    """Whether a sorted price tuple has a value in [low, high]."""
+    position = bisect_left(prices, low)
+    return position < len(prices) and prices[position] <= high
+
+
+def _facet_list(counter, numeric):
+    if numeric:
+        ordered = sorted(counter.items())
+    else:
+        ordered = sorted(counter.items(), key=lambda entry: (-entry[1], entry[0].lower()))
+    return [{'value': value, 'count': count} for value, count in ordered]
+
+
+def record_catalog_changes(cursor, tire_ids):
+    """Log created/updated/deleted llantas ids for every process's index; call inside the writing transaction."""
+    cursor.executemany("INSERT INTO cambios_catalogo (llanta_id) VALUES (%s)",
+                       [(tire_id,) for tire_id in tire_ids])
+
+
+def _intersect(base, filters, excluded=None):
+    """AND of base and every active filter bitmap except the excluded facet."""
+    bitmap = base
+    for field, field_bitmap in filters.items():
+        if field != excluded and field_bitmap is not None:
+            bitmap &= field_bitmap
+    return bitmap
+
+
+class CatalogIndex:
+    """Columns and bitmaps of llantas (attribute values, stock, price buckets)."""
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._positions = {}    # tire_id -> position (bit) in every column and bitmap
+        self._ids = []          # None for deleted positions
+        self._attributes = []   # facet values of each position (see _facet_values)
+        self._texts = []        # lower('marca modelo'), for the search filter
+        self._prices = []       # sorted in-stock prices, () without stock
+        self._bitmaps = {field: {} for field in FACET_FIELDS}  # field -> value -> bitmap
+        self._price_bitmaps = {}  # price bucket -> bitmap
+        self._sizes = {}        # (width, ratio, diameter) -> number of tires
+        self._size_table = None  # SizeTable of self._sizes, rebuilt when the set of sizes changes
+        self._in_stock = 0
+        self._all = 0
+        self._loaded_at = None
+        self._feed = ChangeFeed('cambios_catalogo', 'llanta_id')  # mark set by _load, None when loaded by load_rows
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        conn = get_db_connection()
+        if not conn:
+            raise Exception("No se pudo conectar a la base de datos")
+        try:
+            cursor = conn.cursor()
+            # Same snapshot as the rows: changes after the mark are replayed by sync()
+            self._feed.reset(cursor)
+            cursor.execute("""
+                SELECT id, marca, modelo, ancho, relacion_aspecto, diametro, tipo
+                FROM llantas
+                ORDER BY creado_en, id DESC
+            """)
+            tires = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+        mark = self._feed.mark
+        self.load_rows(tires, offer_index.all_prices())
+        self._feed.mark = mark
+
+    @staticmethod
+    def _facet_values(tire):
+        """Facet values of a llantas row (None for missing sizes, '' for missing text)."""
+        return {
+            'brand': tire['marca'] or '',
+            'type': tire['tipo'] or '',
+            'width': _number(tire['ancho']),
+            'aspectRatio': _number(tire['relacion_aspecto']),
+            'diameter': _number(tire['diametro'])
+        }
+
+    @staticmethod
+    def _size(values):
+        size = (values['width'], values['aspectRatio'], values['diameter'])
+        return size if None not in size else None
+
+    @staticmethod
+    def _text(tire):
+        return f"{tire['marca'] or ''} {tire['modelo'] or ''}".lower()
+
+    def load_rows(self, tires, prices):
+        """
+        Replace the index contents.
+
+        Args:
+            tires: llantas rows (dicts), oldest first (listings return the highest positions first)
+            prices: {tire_id: sorted tuple of in-stock prices}
+        """
+        positions, ids, attributes, texts, tire_prices = {}, [], [], [], []
+        members = {field: {} for field in FACET_FIELDS}
+        bucket_members = {}
+        sizes = {}
+        in_stock = []
+        for tire in tires:
+            position = len(ids)
+            positions[tire['id']] = position
+            ids.append(tire['id'])
+            values = self._facet_values(tire)
+            attributes.append(values)
+            for field, value in values.items():
+                members[field].setdefault(value, []).append(position)
+            size = self._size(values)
+            if size:
+                sizes[size] = sizes.get(size, 0) + 1
+            texts.append(self._text(tire))
+            tire_prices.append(prices.get(tire['id'], ()))
+            if tire_prices[-1]:
+                in_stock.append(position)
+                for bucket in _price_buckets(tire_prices[-1]):
+                    bucket_members.setdefault(bucket, []).append(position)
+
+        size = len(ids)
+        bitmaps = {field: {value: bitmap_from_positions(value_positions, size)
+                           for value, value_positions in values.items()}
+                   for field, values in members.items()}
+        price_bitmaps = {bucket: bitmap_from_positions(bucket_positions, size)
+                         for bucket, bucket_positions in bucket_members.items()}
+
+        with self._lock:
+            self._feed.mark = None
+            self._positions, self._ids, self._attributes = positions, ids, attributes
+            self._texts, self._prices = texts, tire_prices
+            self._bitmaps, self._price_bitmaps = bitmaps, price_bitmaps
+            self._sizes, self._size_table = sizes, None
+            self._in_stock = bitmap_from_positions(in_stock, size)
+            self._all = (1 << size) - 1
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+            with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                    self._load()
+
+    def invalidate(self):
+        """Force a full reload on the next read."""
+        with self._lock:
+            self._loaded_at = None
+
+    # ------------------------------------------------------------------
+    # Mantenimiento incremental
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _set_bit(bitmaps, key, bit):
+        bitmaps[key] = bitmaps.get(key, 0) | bit
+
+    @staticmethod
+    def _clear_bit(bitmaps, key, bit):
+        remaining = bitmaps.get(key, 0) & ~bit
+        if remaining:
+            bitmaps[key] = remaining
+        else:
+            bitmaps.pop(key, None)
+
+    def _set_prices(self, position, prices):
+        bit = 1 << position
+        previous = self._prices[position]
+        old_buckets, new_buckets = _price_buckets(previous), _price_buckets(prices)
+        for bucket in old_buckets - new_buckets:
+            self._clear_bit(self._price_bitmaps, bucket, bit)
+        for bucket in new_buckets - old_buckets:
+            self._set_bit(self._price_bitmaps, bucket, bit)
+        self._prices[position] = prices
+        if prices:
+            self._in_stock |= bit
+        else:
+            self._in_stock &= ~bit
+
+    def _count_size(self, values, delta):
+        size = self._size(values) if values else None
+        if not size:
+            return
+        count = self._sizes.get(size, 0) + delta
+        if count > 0:
+            if size not in self._sizes:
+                self._size_table = None
+            self._sizes[size] = count
+        else:
+            self._sizes.pop(size, None)
+            self._size_table = None
+
+    def _clear_attributes(self, position):
+        bit = 1 << position
+        for field, value in self._attributes[position].items():
+            self._clear_bit(self._bitmaps[field], value, bit)
+        self._count_size(self._attributes[position], -1)
+
+    def upsert(self, tire):
+        """
+        Index a created or updated llantas row.
+
+        New tires take the next (highest) position, so they are listed first,
+        like their creado_en; updates keep their position.
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return  # not loaded yet: the first read loads the current state
+            position = self._positions.get(tire['id'])
+            if position is None:
+                position = len(self._ids)
+                self._positions[tire['id']] = position
+                self._ids.append(tire['id'])
+                self._attributes.append({})
+                self._texts.append('')
+                self._prices.append(())
+                self._all |= 1 << position  # no stock yet: inventory needs the tire to exist
+            else:
+                self._clear_attributes(position)
+            bit = 1 << position
+            values = self._facet_values(tire)
+            for field, value in values.items():
+                self._set_bit(self._bitmaps[field], value, bit)
+            self._count_size(values, 1)
+            self._attributes[position] = values
+            self._texts[position] = self._text(tire)
+
+    def remove(self, tire_id):
+        """Unindex a deleted tire (its position stays empty until the next full load)."""
+        with self._lock:
+            position = self._positions.pop(tire_id, None)
+            if position is None:
+                return
+            self._clear_attributes(position)
+            self._set_prices(position, ())
+            self._ids[position] = None
+            self._attributes[position] = {}
+            self._texts[position] = ''
+            self._all &= ~(1 << position)
+
+    def refresh_stock(self, tire_id):
+        """Re-read a tire's in-stock prices from the best-offer index."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            position = self._positions.get(tire_id)
+            if position is not None:
+                self._set_prices(position, offer_index.prices(tire_id))
+
+    def sync(self, cursor=None):
+        """
+        Apply the catalog changes and inventory events of other processes since the last sync.
+
+        Costs one indexed read of cambios_catalogo and one of eventos_inventario
+        when nothing changed; changed tires are re-read from llantas (deleted
+        ones are removed). An index filled by load_rows is not synced.
+
+        Args:
+            cursor: Optional dict cursor to reuse (otherwise a connection is opened)
+        """
+        self._ensure_loaded()
+        if self._feed.mark is None:
+            return
+        if cursor is None:
+            conn = get_db_connection()
+            if not conn:
+                raise Exception("No se pudo conectar a la base de datos")
+            try:
+                cursor = conn.cursor()
+                self._sync(cursor)
+                cursor.close()
+            finally:
+                conn.close()
+        else:
+            self._sync(cursor)
+
+    def _sync(self, cursor):
+        hub.poll(cursor)  # stock first: its listeners take this index's lock
+        with self._lock:
+            if self._feed.mark is None:
+                return
+            tire_ids = list(dict.fromkeys(row['llanta_id'] for row in self._feed.read(cursor)))
+            if not tire_ids:
+                return
+            cursor.execute(f"""
+                SELECT id, marca, modelo, ancho, relacion_aspecto, diametro, tipo
+                FROM llantas WHERE id IN ({', '.join(['%s'] * len(tire_ids))})
+            """, tire_ids)
+            rows = {row['id']: row for row in cursor.fetchall()}
+            for tire_id in tire_ids:
+                if tire_id in rows:
+                    self.upsert(rows[tire_id])
+                    self.refresh_stock(tire_id)
+                else:
+                    self.remove(tire_id)
+
+    def on_event(self, event):
+        """Inventory hub listener (registered after the best-offer index, so it sees the new offers)."""
+        tire_ids = {row['llanta_id'] for row in (event['item'], event['previous']) if row}
+        for tire_id in tire_ids:
+            self.refresh_stock(tire_id)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def _matching(self, field, term):
+        """OR of the bitmaps of the text values of a field containing term (case-insensitive)."""
+        bitmap = 0
+        for value, value_bitmap in self._bitmaps[field].items():
+            if term in value.lower():
+                bitmap |= value_bitmap
+        return bitmap
+
+    def _price_bitmap(self, low, high):
+        """
+        Tires with an in-stock offer priced in [low, high] (either bound may be None).
+
+        Buckets fully inside the range are OR-ed as they are; only the tires of
+        the two edge buckets are checked against their prices.
+        """
+        low_bucket = int(low // PRICE_BUCKET_SIZE) if low is not None else None
+        high_bucket = int(high // PRICE_BUCKET_SIZE) if high is not None else None
+        inside = 0
+        edges = 0
+        for bucket, bucket_bitmap in self._price_bitmaps.items():
+            if bucket == low_bucket or bucket == high_bucket:
+                edges |= bucket_bitmap
+            elif (low_bucket is None or bucket > low_bucket) and (high_bucket is None or bucket < high_bucket):
+                inside |= bucket_bitmap
+
+        low = low if low is not None else float('-inf')
+        high = high if high is not None else float('inf')
+        matches = (position for position in positions_desc(edges & ~inside)
+                   if _any_between(self._prices[position], low, high))
+        return inside | bitmap_from_positions(matches, len(self._ids))
+
+    def _table(self):
+        if self._size_table is None:
+            self._size_table = SizeTable(self._sizes)
+        return self._size_table
+
+    def _size_bitmap(self, size):
+        """Tires of exactly one size."""
+        width, ratio, diameter = size
+        return (self._bitmaps['width'].get(width, 0) & self._bitmaps['aspectRatio'].get(ratio, 0)
+                & self._bitmaps['diameter'].get(diameter, 0))
+
+    def _filters(self, search, brand, tire_type, width, aspect_ratio, diameter,
+                 min_price, max_price, has_stock, size_alternatives=False):
+        """
+        Bitmaps of a filter set, with the semantics of GET /api/tires.
+
+        A tire size inside search (any notation of sizes.parse_size) filters
+        by that size, or by it and its equivalents with size_alternatives;
+        the rest of the text is matched against brand/model.
+
+        Returns:
+            tuple: (base, filters) - base holds the always-applied filters (search,
+            price range); filters maps each facet ('stock' included) to its
+            bitmap, None when the facet is not filtered
+        """
+        base = self._all
+        size, term = split_size(search) if search else (None, None)
+        if size:
+            size_bitmap = self._size_bitmap(size)
+            if size_alternatives:
+                for alternative, _ in self._table().alternatives(size):
+                    size_bitmap |= self._size_bitmap(alternative)
+            base &= size_bitmap
+        if term:
+            term = term.lower()
+            base &= bitmap_from_positions((position for position, text in enumerate(self._texts)
+                                           if term in text), len(self._texts))
+        if min_price is not None or max_price is not None:
+            base &= self._price_bitmap(min_price, max_price)
+
+        filters = dict.fromkeys(FACET_FIELDS + ('stock',))
+        if brand and not search:
+            filters['brand'] = self._matching('brand', brand.lower())
+        if tire_type:
+            filters['type'] = self._matching('type', tire_type.lower())
+        for field, value in (('width', width), ('aspectRatio', aspect_ratio), ('diameter', diameter)):
+            if value:
+                filters[field] = self._bitmaps[field].get(value, 0)
+        if has_stock:
+            filters['stock'] = self._in_stock
+        return base, filters
+
+    def query(self, search=None, brand=None, tire_type=None, width=None, aspect_ratio=None,
+              diameter=None, min_price=None, max_price=None, has_stock=False, size_alternatives=False,
+              skip=0, limit=100, cursor=None):
+        """
+        Ids of the tires matching the GET /api/tires filters, newest first.
+
+        search matches brand/model text (and a size written in it, see
+        _filters) and replaces the brand filter; type and brand are
+        case-insensitive substrings; sizes are exact; a price range matches
+        tires with an in-stock offer inside it. cursor is passed to sync().
+
+        Returns:
+            tuple: (tire_ids, total) - one page of ids and the number of matches
+        """
+        self.sync(cursor)
+        with self._lock:
+            base, filters = self._filters(search, brand, tire_type, width, aspect_ratio, diameter,
+                                          min_price, max_price, has_stock, size_alternatives)
+            selected = _intersect(base, filters)
+            ids = self._ids
+            return [ids[position] for position in positions_desc(selected, skip, limit)], selected.bit_count()
+
+    def facets(self, search=None, brand=None, tire_type=None, width=None, aspect_ratio=None,
+               diameter=None, min_price=None, max_price=None, has_stock=False, size_alternatives=False,
+               cursor=None):
+        """
+        Facet counts for the catalog filter, with the same filters as query().
+
+        Each facet is counted with every filter applied except its own, so
+        the UI can show how many tires each alternative value would give.
+        search and the price range are not facets: they always apply.
+
+        Returns:
+            dict: {'total', 'facets': {'brand', 'type', 'width', 'aspectRatio',
+                   'diameter': [{'value', 'count'}], 'stock': {'inStock', 'outOfStock'}}}
+        """
+        self.sync(cursor)
+        with self._lock:
+            base, filters = self._filters(search, brand, tire_type, width, aspect_ratio, diameter,
+                                          min_price, max_price, has_stock, size_alternatives)
+            facets = {}
+            for field in FACET_FIELDS:
+                selected = _intersect(base, filters, field)
+                counts = {}
+                for value, value_bitmap in self._bitmaps[field].items():
+                    if value is None or value == '':
+                        continue
+                    count = (value_bitmap & selected).bit_count()
+                    if count:
+                        counts[value] = count
+                facets[field] = _facet_list(counts, field in _NUMERIC_FACETS)
+
+            selected = _intersect(base, filters, 'stock')
+            in_stock = (selected & self._in_stock).bit_count()
+            facets['stock'] = {'inStock': in_stock, 'outOfStock': selected.bit_count() - in_stock}
+            total = _intersect(base, filters).bit_count()
+
+        return {'total': total, 'facets': facets}
+
+    def _size_entry(self, size):
+        bitmap = self._size_bitmap(size)
+        return {
+            'width': size[0],
+            'aspectRatio': size[1],
+            'diameter': size[2],
+            'label': size_label(size),
+            'overallDiameterMm': round(overall_diameter_mm(size), 1),
+            'tireCount': bitmap.bit_count(),
+            'inStockCount': (bitmap & self._in_stock).bit_count()
+        }
+
+    def size_alternatives(self, size, cursor=None):
+        """
+        Catalog sizes equivalent to size (overall diameter within SIZE_DIAMETER_TOLERANCE), closest first.
+
+        Returns:
+            dict: {'size', 'tolerancePercent', 'alternatives': [size entry + 'differencePercent']}
+        """
+        self.sync(cursor)
+        with self._lock:
+            return {
+                'size': self._size_entry(size),
+                'tolerancePercent': SIZE_DIAMETER_TOLERANCE * 100,
+                'alternatives': [dict(self._size_entry(alternative), differencePercent=difference)
+                                 for alternative, difference in self._table().alternatives(size)]
+            }
+
+
+catalog_index = CatalogIndex(ttl_seconds=Config.CATALOG_INDEX_TTL_SECONDS)
+hub.add_listener(catalog_index.on_event)
@@ -0,0 +1,104 @@
+"""
+Medidas de llantas: lectura de las notaciones habituales y medidas equivalentes.
+
+Una medida es la tupla (ancho en mm, perfil en %, rin en pulgadas).
+parse_size() acepta "205/55 R16", "205/55R16", "205/55ZR16", "205-55-16",
+"205/55/16", "205 55 16", "P205/55R16", "LT245/75R16", "205/65R16C" y
+"2055516", seguidas opcionalmente de la descripción de servicio ("91V") y de
+las marcas XL, RF o C ("195/65R15 91T XL"). Dos medidas son
+equivalentes cuando su diámetro total difiere menos de
+SIZE_DIAMETER_TOLERANCE (3%, el margen habitual para no alterar velocímetro
+ni holguras) y el rin y el ancho cambian como mucho SIZE_MAX_RIM_STEP
+pulgadas y SIZE_MAX_WIDTH_STEP mm (el rango del plus/minus sizing).
+SizeTable precalcula las equivalentes de un conjunto de medidas (las del
+catálogo) para consultarlas en O(1).
+"""
+from bisect import bisect_left, bisect_right
+import re
+
+SIZE_DIAMETER_TOLERANCE = 0.03
+SIZE_MAX_RIM_STEP = 2
+SIZE_MAX_WIDTH_STEP = 30
+MM_PER_INCH = 25.4
+
+_SIZE_PATTERN = re.compile(r"""
+    \b(?:P|LT|ST|T)?\s*
+    (?P<width>\d{3})\s*[/\-\s]\s*
+    (?P<ratio>\d{2})\s*[-/]?\s*
+    (?:Z?R|D|B)?\s*-?\s*
+    (?P<diameter>\d{2})C?\b
+""", re.IGNORECASE | re.VERBOSE)
+_COMPACT_PATTERN = re.compile(r'\b(?P<width>\d{3})(?P<ratio>\d{2})(?P<diameter>\d{2})\b')
+# Load index + speed rating ('91V', '104/102R') and the XL/RF/C (reinforced, run-flat, commercial) marks after a size
+_SERVICE_DESCRIPTION = re.compile(r'(?:\s+(?:\d{2,3}(?:/\d{2,3})?\s*[A-Z]{1,2}|XL|RF|C)\b)*', re.IGNORECASE)
+
+
+def _valid(width, ratio, diameter):
+    return 100 <= width <= 400 and 20 <= ratio <= 100 and 10 <= diameter <= 26
+
+
+def split_size(text):
+    """
+    Find a tire size inside free text.
+
+    Returns:
+        tuple: (size or None, the text without the size and its service description, whitespace-collapsed)
+    """
+    for pattern in (_SIZE_PATTERN, _COMPACT_PATTERN):
+        for match in pattern.finditer(text or ''):
+            size = (int(match['width']), int(match['ratio']), int(match['diameter']))
+            if _valid(*size):
+                end = _SERVICE_DESCRIPTION.match(text, match.end()).end()
+                rest = f"{text[:match.start()]} {text[end:]}"
+                return size, ' '.join(rest.split())
+    return None, ' '.join((text or '').split())
+
+
+def parse_size(text):
+    """(width, ratio, diameter) when text is one tire size (a trailing service description is ignored), otherwise None."""
+    size, rest = split_size(text)
+    return size if size and not rest else None
+
+
+def size_label(size):
+    """Canonical notation, e.g. '205/55 R16'."""
+    return f"{size[0]}/{size[1]} R{size[2]}"
+
+
+def overall_diameter_mm(size):
+    """Rim diameter plus both sidewalls."""
+    width, ratio, diameter = size
+    return diameter * MM_PER_INCH + 2 * width * ratio / 100
+
+
+class SizeTable:
+    """Equivalent sizes of a fixed set of sizes, precomputed for O(1) lookup."""
+
+    def __init__(self, sizes, tolerance=SIZE_DIAMETER_TOLERANCE):
+        self.tolerance = tolerance
+        self._sorted = sorted((overall_diameter_mm(size), size) for size in set(sizes))
+        self._diameters = [diameter for diameter, _ in self._sorted]
+        self._table = {size: self._window(size) for _, size in self._sorted}
+
+    def _window(self, size):
+        diameter = overall_diameter_mm(size)
+        start = bisect_left(self._diameters, diameter * (1 - self.tolerance))
+        end = bisect_right(self._diameters, diameter * (1 + self.tolerance))
+        matches = [((other_diameter - diameter) / diameter, other)
+                   for other_diameter, other in self._sorted[start:end]
+                   if other != size and abs(other[2] - size[2]) <= SIZE_MAX_RIM_STEP
+                   and abs(other[0] - size[0]) <= SIZE_MAX_WIDTH_STEP]
+        matches.sort(key=lambda match: (abs(match[0]), match[1]))
+        return tuple((other, round(difference * 100, 2)) for difference, other in matches)
+
+    def alternatives(self, size):
+        """
+        Sizes of the table equivalent to size, closest overall diameter first.
+
+        Sizes outside the table are answered with a binary search instead.
+
+        Returns:
+            tuple: ((size, difference_percent), ...) with the signed difference of overall diameter
+        """
+        alternatives = self._table.get(size)
+        return alternatives if alternatives is not None else self._window(size)
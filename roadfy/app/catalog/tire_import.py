@@ -0,0 +1,217 @@
+"""
+Importación masiva del catálogo de llantas con deduplicación.
+
+Las llantas se deduplican por marca/modelo/medida normalizados contra un
+índice hash en memoria del catálogo existente (una sola consulta), se
+insertan por lotes y la auditoría y el versionado se escriben en bloque.
+"""
+from app.db import get_db_connection
+from app.catalog.index import catalog_index, record_catalog_changes
+from app.utils.validators import validate_text, validate_url, validate_number, validate_length, validate_id_format
+from datetime import datetime, timezone
+import re
+import time
+
+IMPORT_BATCH_SIZE = 500
+
+
+def catalog_key(brand, model, width, ratio, diameter):
+    """Normalized brand/model/size key used to detect duplicate tires."""
+    def number(value):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+    return (' '.join(str(brand or '').lower().split()), ' '.join(str(model or '').lower().split()),
+            number(width), number(ratio), number(diameter))
+
+
+def _slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-')
+
+
+def _validate_tire(tire):
+    """
+    Validate one tire in the create_tire payload shape.
+
+    Returns:
+        tuple: (normalized row dict, None) or (None, error message)
+    """
+    if not isinstance(tire, dict):
+        return None, 'Tire must be a JSON object'
+
+    brand = tire.get('brand')
+    model = tire.get('model')
+    size = tire.get('size') or {}
+    tire_type = tire.get('type')
+    image_url = tire.get('imageUrl')
+    tire_id = tire.get('id')
+
+    if not all([brand, model, size, tire_type]):
+        return None, 'Missing required fields: brand, model, size, type'
+    if not isinstance(size, dict):
+        return None, 'size must be an object with width, aspectRatio and diameter'
+    if not all(isinstance(value, str) for value in (brand, model, tire_type)):
+        return None, 'brand, model and type must be strings'
+    if not all(value is None or isinstance(value, str) for value in (tire_id, image_url)):
+        return None, 'id and imageUrl must be strings'
+    if tire_id and not validate_id_format(tire_id):
+        return None, 'Invalid tire ID format'
+
+    for value, label, max_length in ((brand, 'La marca', 255), (model, 'El modelo', 255), (tire_type, 'El tipo', 100)):
+        if not validate_text(value):
+            return None, f'{label} contiene caracteres no permitidos'
+        if not validate_length(value, max_length=max_length):
+            return None, f'{label} no puede exceder {max_length} caracteres'
+
+    width = size.get('width')
+    aspect_ratio = size.get('aspectRatio')
+    diameter = size.get('diameter')
+    for value, label in ((width, 'El ancho'), (aspect_ratio, 'El perfil'), (diameter, 'El diámetro')):
+        if value and not validate_number(value):
+            return None, f'{label} debe ser un número positivo'
+
+    if image_url and not validate_url(image_url):
+        return None, 'La URL de imagen debe comenzar con http:// o https://'
+
+    return {
+        'id': tire_id,
+        'marca': brand.strip(),
+        'modelo': model.strip(),
+        'ancho': int(width) if width else None,
+        'relacion_aspecto': int(aspect_ratio) if aspect_ratio else None,
+        'diametro': int(diameter) if diameter else None,
+        'tipo': tire_type.strip(),
+        'url_imagen': image_url
+    }, None
+
+
+def _load_catalog_index(cursor):
+    """Load the existing catalog as {normalized key: id} plus the set of used ids."""
+    cursor.execute("SELECT id, marca, modelo, ancho, relacion_aspecto, diametro FROM llantas")
+    index = {}
+    ids = set()
+    for tire in cursor.fetchall():
+        ids.add(tire['id'])
+        index[catalog_key(tire['marca'], tire['modelo'], tire['ancho'],
+                          tire['relacion_aspecto'], tire['diametro'])] = tire['id']
+    return index, ids
+
+
+def _new_tire_id(row, used_ids):
+    """Build a readable unique id (brand-model-size) that does not collide with existing ones."""
+    parts = [row['marca'], row['modelo'], row['ancho'], row['relacion_aspecto'], row['diametro']]
+    base = 'tire-' + '-'.join(_slug(part) for part in parts if part not in (None, ''))
+    candidate = base
+    suffix = 2
+    while candidate in used_ids:
+        candidate = f"{base}-{suffix}"
+        suffix += 1
+    return candidate
+
+
+def import_tires(tires, user=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import many tires into the catalog.
+
+    Args:
+        tires: List of dicts in the create_tire payload shape
+            ({'brand', 'model', 'size': {'width', 'aspectRatio', 'diameter'}, 'type', 'imageUrl', 'id'?})
+        user: Current user dict (for audit and versions)
+        batch_size: Rows per INSERT batch (committed per batch)
+
+    Returns:
+        dict: Report with inserted/duplicate/failed counts, per-row errors and inserted rows/sec
+    """
+    started = time.perf_counter()
+    report = {
+        'received': len(tires),
+        'inserted': 0,
+        'duplicates': 0,
+        'failed': 0,
+        'errors': [],
+        'duplicate_of': [],
+        'elapsed_seconds': 0.0,
+        'rows_per_second': 0.0
+    }
+
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+
+    inserted = []
+    try:
+        cursor = conn.cursor()
+        index, used_ids = _load_catalog_index(cursor)
+
+        to_insert = []
+        for position, tire in enumerate(tires):
+            row, error = _validate_tire(tire)
+            if error:
+                report['errors'].append({'index': position, 'error': error})
+                continue
+
+            key = catalog_key(row['marca'], row['modelo'], row['ancho'],
+                              row['relacion_aspecto'], row['diametro'])
+            if key in index:
+                report['duplicates'] += 1
+                report['duplicate_of'].append({'index': position, 'tire_id': index[key]})
+                continue
+            if row['id'] and row['id'] in used_ids:
+                report['errors'].append({'index': position, 'error': 'Tire ID already exists'})
+                continue
+
+            row['id'] = row['id'] or _new_tire_id(row, used_ids)
+            used_ids.add(row['id'])
+            index[key] = row['id']
+            to_insert.append(row)
+
+        now = datetime.now(timezone.utc)
+        for start in range(0, len(to_insert), batch_size):
+            batch = to_insert[start:start + batch_size]
+            cursor.executemany("""
+                INSERT INTO llantas (id, marca, modelo, ancho, relacion_aspecto, diametro, tipo, url_imagen, creado_en)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, [(row['id'], row['marca'], row['modelo'], row['ancho'], row['relacion_aspecto'],
+                   row['diametro'], row['tipo'], row['url_imagen'], now) for row in batch])
+            record_catalog_changes(cursor, [row['id'] for row in batch])
+            conn.commit()
+            inserted.extend(batch)
+
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        report['inserted'] = len(inserted)
+        report['failed'] = len(report['errors'])
+        _record_changes(inserted, user)
+        for row in inserted:
+            catalog_index.upsert(row)
+
+    elapsed = time.perf_counter() - started
+    report['elapsed_seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['inserted'] / elapsed, 1) if elapsed > 0 else None
+    return report
+
+
+def _record_changes(rows, user):
+    """Write the audit entries and versions of the inserted tires in bulk."""
+    if not rows:
+        return
+
+    from app.governance.audit import build_change_entry, log_changes
+    from app.governance.versioning import create_versions
+
+    user_id = user.get('id') if user else None
+    user_email = user.get('correo') if user else None
+
+    log_changes([
+        build_change_entry(table='llantas', record_id=row['id'], action='INSERT',
+                           user_id=user_id, user_email=user_email, new_data=row)
+        for row in rows
+    ])
+    create_versions('llantas', [(row['id'], row) for row in rows],
+                    user_id=user_id, user_email=user_email,
+                    change_reason='Importación masiva de llantas')
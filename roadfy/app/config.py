@@ -35,3 +35,39 @@ class Config:
     SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
     SMTP_USER = os.getenv('SMTP_USER', '')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
+    
+    # Versionado (snapshot completo cada N versiones, deltas entre snapshots)
+    VERSION_SNAPSHOT_INTERVAL = int(os.getenv('VERSION_SNAPSHOT_INTERVAL', '10'))
+    
+    # Auditoría: journal local durable + carga en segundo plano a auditoria_cambios
+    AUDIT_JOURNAL_ENABLED = os.getenv('AUDIT_JOURNAL_ENABLED', 'true').lower() == 'true'
+    AUDIT_JOURNAL_DIR = os.getenv('AUDIT_JOURNAL_DIR', str(Path(__file__).parent.parent / 'var' / 'audit'))
+    AUDIT_JOURNAL_FSYNC_MS = int(os.getenv('AUDIT_JOURNAL_FSYNC_MS', '2'))
+    AUDIT_JOURNAL_FLUSH_SECONDS = float(os.getenv('AUDIT_JOURNAL_FLUSH_SECONDS', '2'))
+    AUDIT_JOURNAL_BATCH_SIZE = int(os.getenv('AUDIT_JOURNAL_BATCH_SIZE', '500'))
+    AUDIT_JOURNAL_WAIT_DURABLE = os.getenv('AUDIT_JOURNAL_WAIT_DURABLE', 'true').lower() == 'true'
+    
+    # Índice en memoria de mejores ofertas (recarga completa cada N segundos)
+    OFFER_INDEX_TTL_SECONDS = int(os.getenv('OFFER_INDEX_TTL_SECONDS', '300'))
+    
+    # Reservas de stock (retiro en tienda) y barrido de expiración
+    RESERVATION_HOLD_MINUTES = int(os.getenv('RESERVATION_HOLD_MINUTES', '120'))
+    RESERVATION_MAX_HOLD_MINUTES = int(os.getenv('RESERVATION_MAX_HOLD_MINUTES', '2880'))
+    RESERVATION_SWEEPER_ENABLED = os.getenv('RESERVATION_SWEEPER_ENABLED', 'true').lower() == 'true'
+    RESERVATION_SWEEP_SECONDS = float(os.getenv('RESERVATION_SWEEP_SECONDS', '30'))
+    RESERVATION_SWEEP_BATCH = int(os.getenv('RESERVATION_SWEEP_BATCH', '500'))
+    
+    # Caché de la vista de detalle de negocio (GET /api/businesses/<id>/full)
+    BUSINESS_DETAIL_CACHE_SECONDS = int(os.getenv('BUSINESS_DETAIL_CACHE_SECONDS', '30'))
+    
+    # Índice espacial en memoria de negocios (recarga completa cada N segundos)
+    GEO_INDEX_TTL_SECONDS = int(os.getenv('GEO_INDEX_TTL_SECONDS', '300'))
+    
+    # Índice columnar en memoria del catálogo de llantas (facetas y filtros)
+    CATALOG_INDEX_TTL_SECONDS = int(os.getenv('CATALOG_INDEX_TTL_SECONDS', '300'))
+    
+    # Eventos de inventario entre procesos (tabla eventos_inventario; la retención aplica también a cambios_catalogo)
+    INVENTORY_EVENTS_POLL_SECONDS = float(os.getenv('INVENTORY_EVENTS_POLL_SECONDS', '1'))
+    INVENTORY_EVENTS_RETENTION_HOURS = int(os.getenv('INVENTORY_EVENTS_RETENTION_HOURS', '24'))
+    # Tiempo tras el cual un hueco en los ids de una tabla de cambios se da por transacción revertida
+    CHANGE_FEED_GAP_SECONDS = float(os.getenv('CHANGE_FEED_GAP_SECONDS', '10'))
@@ -28,6 +28,13 @@ def get_db_connection():
         print(f"[DB] Error al conectar a la base de datos: {e}")
         return None
 
+def tuple_cursor(conn):
+    """
+    Cursor que devuelve filas como tuplas (sin armar un dict por fila).
+    Pensado para listados mapeados con app.utils.serializers.map_rows.
+    """
+    return conn.cursor(pymysql.cursors.Cursor)
+
 @contextmanager
 def get_db():
     """
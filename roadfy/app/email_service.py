@@ -172,3 +172,95 @@ def print_password_reset_info(email: str, reset_link: str):
     print("="*80 + "\n")
     print("💡 NOTA: Si quieres emails reales, configura SMTP en .env")
     print("\n")
+
+def send_low_stock_digest_emails(digests):
+    """
+    Envía el resumen diario de stock bajo a cada administrador de negocio.
+    
+    Todos los mensajes se envían en una sola sesión SMTP (una conexión y un
+    login para todo el lote).
+    
+    Args:
+        digests: Lista de (email, nombre_negocio, items) con items como dicts
+                 de low_stock_to_dict
+    
+    Returns:
+        list: Emails a los que se entregó el resumen (o se imprimió en modo
+              desarrollo), sin los rechazados ni los que quedaron sin enviar
+              si la sesión SMTP falló a mitad del lote
+    """
+    if not digests:
+        return []
+    
+    smtp_enabled = os.getenv('SMTP_ENABLED', 'false').lower() == 'true'
+    smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+    smtp_port = int(os.getenv('SMTP_PORT', '587'))
+    smtp_user = os.getenv('SMTP_USER', '')
+    smtp_password = os.getenv('SMTP_PASSWORD', '')
+    smtp_from = os.getenv('SMTP_FROM', smtp_user)
+    
+    messages = []
+    for email, business_name, items in digests:
+        rows = ''.join(
+            f"<tr><td>{item['brand'] or ''} {item['model'] or item['tire_id']}</td>"
+            f"<td style=\"text-align: right;\">{item['quantity']}</td>"
+            f"<td style=\"text-align: right;\">{item['threshold']}</td></tr>"
+            for item in items
+        )
+        html_body = f"""
+        <!DOCTYPE html>
+        <html>
+        <head><meta charset="UTF-8"></head>
+        <body style="font-family: Arial, sans-serif; color: #333;">
+            <h2>ROADFY - Stock bajo en {business_name}</h2>
+            <p>{len(items)} llanta(s) están por debajo del umbral de stock:</p>
+            <table cellpadding="6" style="border-collapse: collapse;">
+                <tr><th style="text-align: left;">Llanta</th><th>Cantidad</th><th>Umbral</th></tr>
+                {rows}
+            </table>
+        </body>
+        </html>
+        """
+        text_body = f"ROADFY - Stock bajo en {business_name}\n\n" + '\n'.join(
+            f"- {item['brand'] or ''} {item['model'] or item['tire_id']}: {item['quantity']} (umbral {item['threshold']})"
+            for item in items
+        )
+        
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = f"Stock bajo: {len(items)} llanta(s) - ROADFY"
+        msg['From'] = smtp_from
+        msg['To'] = email
+        msg.attach(MIMEText(text_body, 'plain', 'utf-8'))
+        msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+        messages.append((email, msg, text_body))
+    
+    if not (smtp_enabled and smtp_user and smtp_password):
+        # Modo desarrollo: imprimir en consola
+        for email, _, text_body in messages:
+            print("\n" + "="*80)
+            print(f"📧 RESUMEN DE STOCK BAJO para {email}")
+            print("="*80)
+            print(text_body)
+        return [email for email, _, _ in messages]
+    
+    sent = []
+    try:
+        if smtp_port == 465:
+            import ssl
+            server = smtplib.SMTP_SSL(smtp_host, smtp_port, context=ssl.create_default_context(), timeout=10)
+        else:
+            server = smtplib.SMTP(smtp_host, smtp_port, timeout=10)
+            server.starttls()
+        with server:
+            server.login(smtp_user, smtp_password)
+            for email, msg, _ in messages:
+                try:
+                    server.send_message(msg)
+                    sent.append(email)
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Un destinatario inválido no corta el lote
+                    print(f"❌ Destinatario rechazado {email}: {str(e)}")
+        print(f"✅ Resumen de stock bajo enviado a {len(sent)} destinatario(s)")
+    except Exception as e:
+        print(f"❌ Error enviando resumen de stock bajo: {type(e).__name__}: {str(e)}")
+    return sent
@@ -2,8 +2,11 @@
 Sistema de Auditoría de Cambios y Logs de Acceso
 """
 from app.db import get_db_connection
+from app.governance.journal import get_journal, insert_audit_entries
+from app.utils.jsoncodec import dumps
 from datetime import datetime, timezone
-from flask import request
+from flask import request, has_request_context
+import pymysql
 import uuid
 
 
@@ -13,6 +16,10 @@ def log_change(table, record_id, action, user_id=None, user_email=None,
     """
     Registra un cambio en la base de datos.
     
+    La entrada se agrega al journal durable de auditoría (ver journal.py) y
+    se carga en auditoria_cambios en segundo plano, fuera del camino de la
+    solicitud. Si el journal está deshabilitado se inserta directamente.
+    
     Args:
         table: Nombre de la tabla
         record_id: ID del registro modificado
@@ -25,46 +32,72 @@ def log_change(table, record_id, action, user_id=None, user_email=None,
         old_value: Valor anterior del campo (opcional)
         new_value: Valor nuevo del campo (opcional)
     """
-    conn = get_db_connection()
-    if not conn:
-        return False
+    entry = build_change_entry(table, record_id, action, user_id, user_email,
+                               old_data, new_data, field_changed, old_value, new_value)
+    return log_changes([entry])
+
+
+def build_change_entry(table, record_id, action, user_id=None, user_email=None,
+                       old_data=None, new_data=None, field_changed=None,
+                       old_value=None, new_value=None):
+    """
+    Construye una entrada de auditoría (fila de auditoria_cambios) como dict.
+    
+    La información de la solicitud (IP, user agent) y la fecha se capturan
+    en este momento, no cuando la entrada se carga en la BD.
+    """
+    # Obtener información de la solicitud
+    ip_address = request.remote_addr if has_request_context() else None
+    user_agent = request.headers.get('User-Agent') if has_request_context() else None
+    
+    # Convertir datos a JSON si son dicts (las filas pueden traer datetime/Decimal)
+    old_data_json = dumps(old_data) if old_data else None
+    new_data_json = dumps(new_data) if new_data else None
+    
+    return {
+        'id': f"audit-{uuid.uuid4().hex[:12]}",
+        'tabla': table,
+        'registro_id': record_id,
+        'accion': action,
+        'usuario_id': user_id,
+        'usuario_email': user_email,
+        'datos_anteriores': old_data_json,
+        'datos_nuevos': new_data_json,
+        'campo_modificado': field_changed,
+        'valor_anterior': old_value,
+        'valor_nuevo': new_value,
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'creado_en': datetime.now(timezone.utc).replace(tzinfo=None).isoformat(sep=' ')
+    }
+
+
+def log_changes(entries):
+    """
+    Registra un conjunto de entradas de auditoría (ver build_change_entry)
+    con una sola escritura al journal.
+    """
+    if not entries:
+        return True
     
     try:
-        cursor = conn.cursor()
-        audit_id = f"audit-{uuid.uuid4().hex[:12]}"
-        
-        # Obtener información de la solicitud
-        ip_address = request.remote_addr if request else None
-        user_agent = request.headers.get('User-Agent') if request else None
-        
-        # Convertir datos a JSON si son dicts
-        import json
-        old_data_json = json.dumps(old_data) if old_data else None
-        new_data_json = json.dumps(new_data) if new_data else None
-        
-        cursor.execute("""
-            INSERT INTO auditoria_cambios 
-            (id, tabla, registro_id, accion, usuario_id, usuario_email, 
-             datos_anteriores, datos_nuevos, campo_modificado, valor_anterior, 
-             valor_nuevo, ip_address, user_agent, creado_en)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (audit_id, table, record_id, action, user_id, user_email,
-              old_data_json, new_data_json, field_changed, old_value, new_value,
-              ip_address, user_agent, datetime.now(timezone.utc)))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        journal = get_journal()
+        if journal:
+            return journal.append(entries)
+        insert_audit_entries(entries)
         return True
     except Exception as e:
         print(f"[AUDIT] Error logging change: {str(e)}")
-        if conn:
-            conn.rollback()
-            cursor.close()
-            conn.close()
         return False
 
 
+def start_audit_writer():
+    """Inicia el escritor de auditoría y recupera entradas pendientes del journal."""
+    journal = get_journal()
+    if journal:
+        journal.start()
+
+
 def log_access(user_id=None, user_email=None, access_type='LOGIN', 
                successful=True, error_message=None):
     """
@@ -110,6 +143,119 @@ def log_access(user_id=None, user_email=None, access_type='LOGIN',
         return False
 
 
+def _audit_trail_filters(table=None, record_id=None, user_id=None, action=None):
+    """Construye la cláusula WHERE (y parámetros) de las consultas de auditoría."""
+    conditions = []
+    params = []
+    
+    if table:
+        conditions.append("tabla = %s")
+        params.append(table)
+    if record_id:
+        conditions.append("registro_id = %s")
+        params.append(record_id)
+    if user_id:
+        conditions.append("usuario_id = %s")
+        params.append(user_id)
+    if action:
+        conditions.append("accion = %s")
+        params.append(action)
+    
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    return where_clause, params
+
+
+def _access_log_filters(user_id=None, access_type=None, successful=None):
+    """Construye la cláusula WHERE (y parámetros) de las consultas de logs de acceso."""
+    conditions = []
+    params = []
+    
+    if user_id:
+        conditions.append("usuario_id = %s")
+        params.append(user_id)
+    if access_type:
+        conditions.append("tipo_acceso = %s")
+        params.append(access_type)
+    if successful is not None:
+        conditions.append("exitoso = %s")
+        params.append(successful)
+    
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    return where_clause, params
+
+
+def _stream_query(query, params, columns=None):
+    """
+    Ejecuta una consulta con un cursor no bufferizado (SSDictCursor) y
+    genera las filas a medida que llegan del servidor, con memoria constante.
+    La conexión se cierra al agotar o descartar el generador.
+    Si se pasa la lista columns, se llena con los nombres de las columnas del
+    resultado al ejecutar la consulta (antes de la primera fila).
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    
+    cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        # El servidor espera al cliente mientras este consume el resultado
+        cursor.execute("SET SESSION net_write_timeout = 600")
+        cursor.execute(query, params)
+        if columns is not None:
+            columns[:] = [column[0] for column in cursor.description]
+        for row in cursor:
+            yield row
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def iter_audit_trail(table=None, record_id=None, user_id=None, action=None, limit=None, columns=None):
+    """
+    Genera el historial de auditoría fila por fila (exportaciones).
+    
+    Args:
+        table, record_id, user_id, action: Mismos filtros que get_audit_trail
+        limit: Límite de resultados (opcional, sin límite por defecto)
+        columns: Lista que se llena con los nombres de las columnas (opcional)
+    """
+    where_clause, params = _audit_trail_filters(table, record_id, user_id, action)
+    limit_clause = ""
+    if limit:
+        limit_clause = "LIMIT %s"
+        params.append(limit)
+    
+    return _stream_query(f"""
+        SELECT * FROM auditoria_cambios
+        WHERE {where_clause}
+        ORDER BY creado_en DESC
+        {limit_clause}
+    """, params, columns)
+
+
+def iter_access_logs(user_id=None, access_type=None, successful=None, limit=None, columns=None):
+    """
+    Genera los logs de acceso fila por fila (exportaciones).
+    
+    Args:
+        user_id, access_type, successful: Mismos filtros que get_access_logs
+        limit: Límite de resultados (opcional, sin límite por defecto)
+        columns: Lista que se llena con los nombres de las columnas (opcional)
+    """
+    where_clause, params = _access_log_filters(user_id, access_type, successful)
+    limit_clause = ""
+    if limit:
+        limit_clause = "LIMIT %s"
+        params.append(limit)
+    
+    return _stream_query(f"""
+        SELECT * FROM logs_acceso
+        WHERE {where_clause}
+        ORDER BY creado_en DESC
+        {limit_clause}
+    """, params, columns)
+
+
 def get_audit_trail(table=None, record_id=None, user_id=None, 
                     action=None, limit=100, offset=0):
     """
@@ -129,23 +275,7 @@ def get_audit_trail(table=None, record_id=None, user_id=None,
     
     try:
         cursor = conn.cursor()
-        conditions = []
-        params = []
-        
-        if table:
-            conditions.append("tabla = %s")
-            params.append(table)
-        if record_id:
-            conditions.append("registro_id = %s")
-            params.append(record_id)
-        if user_id:
-            conditions.append("usuario_id = %s")
-            params.append(user_id)
-        if action:
-            conditions.append("accion = %s")
-            params.append(action)
-        
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        where_clause, params = _audit_trail_filters(table, record_id, user_id, action)
         params.extend([limit, offset])
         
         cursor.execute(f"""
@@ -186,20 +316,7 @@ def get_access_logs(user_id=None, access_type=None, successful=None,
     
     try:
         cursor = conn.cursor()
-        conditions = []
-        params = []
-        
-        if user_id:
-            conditions.append("usuario_id = %s")
-            params.append(user_id)
-        if access_type:
-            conditions.append("tipo_acceso = %s")
-            params.append(access_type)
-        if successful is not None:
-            conditions.append("exitoso = %s")
-            params.append(successful)
-        
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        where_clause, params = _access_log_filters(user_id, access_type, successful)
         params.extend([limit, offset])
         
         cursor.execute(f"""
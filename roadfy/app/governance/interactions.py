@@ -3,10 +3,10 @@ Sistema de Tracking de Interacciones de Usuario
 Registra clicks, vistas, búsquedas y otras interacciones
 """
 from app.db import get_db_connection
+from app.utils.jsoncodec import dumps
 from datetime import datetime, timezone, timedelta
 from flask import request
 import uuid
-import json
 
 
 def log_interaction(interaction_type, entity_type, entity_id, user_id=None, 
@@ -46,7 +46,7 @@ def log_interaction(interaction_type, entity_type, entity_id, user_id=None,
                 device_type = 'DESKTOP'
         
         # Convertir metadata a JSON
-        metadata_json = json.dumps(metadata) if metadata else None
+        metadata_json = dumps(metadata) if metadata else None
         
         cursor.execute("""
             INSERT INTO interacciones_usuario 
@@ -0,0 +1,341 @@
+"""
+Journal durable para la auditoría de cambios
+
+Las entradas de auditoría se escriben primero en un archivo local
+(segmentos JSONL con fsync agrupado) y un hilo en segundo plano las carga
+por lotes en auditoria_cambios. Al iniciar, los segmentos que quedaron sin
+cargar (p. ej. tras una caída) se reprocesan. La carga usa INSERT IGNORE
+sobre el id de la entrada, así que reprocesar un segmento es idempotente.
+
+El segmento activo de cada proceso se protege con flock: se crea y se
+bloquea con un nombre temporal y recién entonces se renombra a audit-*.jsonl,
+así ningún otro proceso ve el segmento sin bloqueo. Sin fcntl (Windows)
+no hay forma de saber si el segmento de otro proceso sigue activo, así que
+cada proceso carga solo los suyos; los de procesos caídos se recuperan con
+load_pending(include_foreign=True) cuando no corre ningún otro proceso.
+"""
+from app.db import get_db_connection
+from app.utils.jsoncodec import dumps, loads
+from pathlib import Path
+import atexit
+import glob
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+# Un segmento vacío de otro proceso solo se borra pasado este tiempo (ver load_pending)
+EMPTY_SEGMENT_GRACE_SECONDS = 3600
+
+AUDIT_COLUMNS = (
+    'id', 'tabla', 'registro_id', 'accion', 'usuario_id', 'usuario_email',
+    'datos_anteriores', 'datos_nuevos', 'campo_modificado', 'valor_anterior',
+    'valor_nuevo', 'ip_address', 'user_agent', 'creado_en'
+)
+
+
+def insert_audit_entries(entries, batch_size=500):
+    """
+    Inserta entradas de auditoría en auditoria_cambios en lotes.
+
+    Args:
+        entries: Lista de dicts con las claves de AUDIT_COLUMNS
+        batch_size: Filas por sentencia
+
+    Raises:
+        Exception: Si la conexión o la inserción fallan (las entradas no se pierden)
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+
+    try:
+        cursor = conn.cursor()
+        placeholders = ', '.join(['%s'] * len(AUDIT_COLUMNS))
+        query = f"""
+            INSERT IGNORE INTO auditoria_cambios ({', '.join(AUDIT_COLUMNS)})
+            VALUES ({placeholders})
+        """
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+            cursor.executemany(query, [tuple(entry.get(column) for column in AUDIT_COLUMNS)
+                                       for entry in batch])
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+class AuditJournal:
+    """
+    Journal de auditoría basado en segmentos.
+
+    - append() escribe las líneas en el segmento activo y (opcionalmente)
+      espera a que el hilo de sincronización haga fsync (group commit).
+    - El hilo de sincronización hace fsync en cuanto hay escrituras
+      pendientes (agrupando las que llegan en fsync_interval) y rota el
+      segmento cada flush_interval.
+    - El hilo de carga inserta los segmentos cerrados en la BD, en orden, y
+      los borra solo después del commit.
+    """
+
+    def __init__(self, directory, fsync_interval=0.002, flush_interval=2.0,
+                 batch_size=500, wait_durable=True):
+        self.directory = Path(directory)
+        self.fsync_interval = fsync_interval
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.wait_durable = wait_durable
+
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._pending = threading.Condition(self._lock)
+        self._load_requested = threading.Event()
+        self._segment = None
+        self._segment_path = None
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._segment_start_seq = 0
+        self._pid = None
+        self._stop = threading.Event()
+        self._threads = []
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def append(self, entries):
+        """
+        Agrega entradas al journal. Retorna cuando son durables (si wait_durable).
+
+        Después de close() (salida del proceso) las entradas se insertan
+        directamente en la BD en lugar de reiniciar los hilos.
+        """
+        lines = ''.join(dumps(entry) + '\n' for entry in entries)
+        with self._lock:
+            if not self._closed:
+                self._ensure_started()
+                self._segment.write(lines)
+                self._written_seq += 1
+                seq = self._written_seq
+                self._pending.notify()
+                if self.wait_durable:
+                    while self._synced_seq < seq:
+                        self._synced.wait(timeout=1.0)
+                return True
+        insert_audit_entries(entries, self.batch_size)
+        return True
+
+    def _open_segment(self):
+        """Abre un nuevo segmento activo (bloqueado para este proceso)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"audit-{time.time_ns():020d}-{os.getpid()}.jsonl"
+        if not fcntl:
+            # Con buffer por línea no quedan datos pendientes en memoria al hacer fork
+            return open(path, 'a', encoding='utf-8', buffering=1), str(path)
+        # Bloquear antes de que load_pending pueda verlo: con el nombre final, otro
+        # proceso podría tomarlo (vacío) y borrarlo antes del flock
+        creating = path.with_name(path.name + '.new')
+        segment = open(creating, 'a', encoding='utf-8', buffering=1)
+        fcntl.flock(segment.fileno(), fcntl.LOCK_EX)
+        os.rename(creating, path)
+        return segment, str(path)
+
+    def _ensure_started(self):
+        """Inicia los hilos en este proceso (también tras un fork). Requiere el lock."""
+        if self._pid == os.getpid():
+            return
+        if self._segment:
+            # Segmento heredado del proceso padre: solo cerrar nuestro descriptor
+            self._segment.close()
+        self._pid = os.getpid()
+        self._segment, self._segment_path = self._open_segment()
+        self._written_seq = self._synced_seq = self._segment_start_seq = 0
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._sync_loop, name='audit-journal-sync', daemon=True),
+            threading.Thread(target=self._load_loop, name='audit-journal-load', daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def start(self):
+        """Inicia el journal y dispara la recuperación de segmentos pendientes."""
+        with self._lock:
+            self._ensure_started()
+        self._load_requested.set()
+
+    def _sync(self, rotate=False):
+        """fsync del segmento activo; opcionalmente lo cierra y abre uno nuevo."""
+        with self._lock:
+            target = self._written_seq
+            segment = self._segment
+            if segment is None:
+                return  # cerrado por close()
+            segment.flush()
+        # fsync fuera del lock: las escrituras que llegan mientras tanto se agrupan en el siguiente
+        os.fsync(segment.fileno())
+        with self._lock:
+            if rotate and target > self._segment_start_seq:
+                segment.flush()
+                os.fsync(segment.fileno())
+                target = self._written_seq
+                self._segment, self._segment_path = self._open_segment()
+                self._segment_start_seq = target
+                segment.close()  # libera el bloqueo: el segmento queda listo para carga
+            self._synced_seq = max(self._synced_seq, target)
+            self._synced.notify_all()
+        if rotate:
+            self._load_requested.set()
+
+    def _sync_loop(self):
+        last_rotation = time.monotonic()
+        while not self._stop.is_set():
+            with self._lock:
+                if self._written_seq == self._synced_seq and not self._stop.is_set():
+                    self._pending.wait(timeout=self.flush_interval)
+            if self._stop.is_set():
+                return
+            if self.fsync_interval:
+                time.sleep(self.fsync_interval)  # ventana de agrupación (group commit)
+            rotate = time.monotonic() - last_rotation >= self.flush_interval
+            try:
+                self._sync(rotate=rotate)
+            except Exception as e:
+                print(f"[AUDIT_JOURNAL] Error sincronizando journal: {str(e)}")
+            if rotate:
+                last_rotation = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Carga a la base de datos
+    # ------------------------------------------------------------------
+
+    def _claim(self, handle, path, include_foreign=False):
+        """Intenta tomar un segmento cerrado (o huérfano de un proceso caído)."""
+        if path == self._segment_path:
+            return False
+        if not fcntl:
+            # Sin bloqueo no se distingue un segmento activo de otro proceso de uno huérfano
+            return include_foreign or Path(path).stem.rsplit('-', 1)[-1] == str(os.getpid())
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False  # segmento activo de otro proceso
+
+    def _recent_foreign_empty(self, handle, path):
+        """Segmento vacío y reciente de otro proceso: puede estar recién creado, no se toca."""
+        if Path(path).stem.rsplit('-', 1)[-1] == str(os.getpid()):
+            return False
+        stat = os.fstat(handle.fileno())
+        return stat.st_size == 0 and time.time() - stat.st_mtime < EMPTY_SEGMENT_GRACE_SECONDS
+
+    def load_pending(self, include_foreign=False):
+        """
+        Carga en la BD todos los segmentos cerrados, en orden de creación.
+
+        Args:
+            include_foreign: Sin fcntl, cargar también los segmentos de otros
+                procesos (solo si no corre ningún otro proceso)
+        """
+        loaded = 0
+        for path in sorted(glob.glob(str(self.directory / 'audit-*.jsonl'))):
+            try:
+                handle = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                continue  # otro proceso ya lo cargó
+            with handle:
+                if not self._claim(handle, path, include_foreign):
+                    continue
+                if self._recent_foreign_empty(handle, path):
+                    continue
+                entries = []
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    try:
+                        entries.append(loads(line))
+                    except ValueError:
+                        # Línea truncada por una caída durante la escritura (nunca fue durable)
+                        print(f"[AUDIT_JOURNAL] Línea inválida descartada en {path}")
+                if entries:
+                    insert_audit_entries(entries, self.batch_size)
+                    loaded += len(entries)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return loaded
+
+    def _load_loop(self):
+        while not self._stop.is_set():
+            self._load_requested.wait(timeout=self.flush_interval)
+            self._load_requested.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.load_pending()
+            except Exception as e:
+                # Los segmentos se conservan y se reintentan en la próxima pasada
+                print(f"[AUDIT_JOURNAL] Error cargando auditoría: {str(e)}")
+
+    def close(self):
+        """
+        Detiene los hilos, sincroniza y carga lo pendiente (al terminar el proceso).
+
+        Los hilos se detienen antes de soltar el segmento, así ninguno lo usa
+        después de cerrado; las escrituras posteriores van directo a la BD.
+        """
+        with self._lock:
+            if self._pid != os.getpid() or not self._segment or self._closed:
+                return
+            self._closed = True
+            self._stop.set()
+            self._pending.notify_all()
+        self._load_requested.set()
+        for thread in self._threads:
+            # Fuera del lock: los hilos lo necesitan para terminar su pasada
+            thread.join(timeout=max(self.flush_interval, 1.0) * 5)
+        try:
+            with self._lock:
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+                self._segment.close()
+                self._segment = self._segment_path = None
+                self._synced_seq = self._written_seq
+                self._synced.notify_all()
+            self.load_pending()
+        except Exception as e:
+            print(f"[AUDIT_JOURNAL] Error al cerrar journal: {str(e)}")
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Obtiene el journal de auditoría del proceso (None si está deshabilitado)."""
+    global _journal
+    from app.config import Config
+    if not Config.AUDIT_JOURNAL_ENABLED:
+        return None
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = AuditJournal(
+                    Config.AUDIT_JOURNAL_DIR,
+                    fsync_interval=Config.AUDIT_JOURNAL_FSYNC_MS / 1000.0,
+                    flush_interval=Config.AUDIT_JOURNAL_FLUSH_SECONDS,
+                    batch_size=Config.AUDIT_JOURNAL_BATCH_SIZE,
+                    wait_durable=Config.AUDIT_JOURNAL_WAIT_DURABLE
+                )
+                atexit.register(_journal.close)
+    return _journal
@@ -2,9 +2,9 @@
 Gestión de Metadatos de Datos
 """
 from app.db import get_db_connection
+from app.utils.jsoncodec import dumps
 from datetime import datetime, timezone
 import uuid
-import json
 
 
 def update_metadata(table, record_id, field=None, data_quality='BUENA',
@@ -37,7 +37,7 @@ def update_metadata(table, record_id, field=None, data_quality='BUENA',
         
         existing = cursor.fetchone()
         
-        tags_json = json.dumps(tags) if tags else None
+        tags_json = dumps(tags) if tags else None
         
         if existing:
             # Actualizar existente
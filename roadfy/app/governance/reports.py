@@ -2,9 +2,9 @@
 Generación de Reportes de Gobierno de Datos
 """
 from app.db import get_db_connection
+from app.utils.jsoncodec import dumps
 from datetime import datetime, timezone, timedelta
 import uuid
-import json
 
 
 def generate_governance_report(report_type, title, description=None,
@@ -31,7 +31,7 @@ def generate_governance_report(report_type, title, description=None,
         cursor = conn.cursor()
         report_id = f"rpt-{uuid.uuid4().hex[:12]}"
         
-        data_json = json.dumps(data) if data else None
+        data_json = dumps(data) if data else None
         
         cursor.execute("""
             INSERT INTO reportes_gobernanza
@@ -1,17 +1,148 @@
 """
 Sistema de Versionado de Datos
+
+Las versiones se guardan como snapshots completos periódicos (cada
+Config.VERSION_SNAPSHOT_INTERVAL versiones) y deltas JSON entre ellos.
+Cualquier versión se reconstruye aplicando los deltas sobre el snapshot
+más cercano, por lo que el costo de lectura está acotado por el intervalo.
 """
 from app.db import get_db_connection
+from app.config import Config
+from app.utils.jsoncodec import dumps, loads
 from datetime import datetime, timezone
+import pymysql
 import uuid
-import json
 
+AS_OF_CHUNK_SIZE = 1000
+
+
+def _dumps(data):
+    """Serializa a JSON tolerando datetime/Decimal de las filas de la BD."""
+    return dumps(data)
+
+
+def _loads(value):
+    """Parsea una columna JSON (PyMySQL la devuelve como str)."""
+    if value is None or isinstance(value, (dict, list)):
+        return value
+    try:
+        return loads(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _normalize(data):
+    """Normaliza un registro a tipos JSON para poder compararlo con versiones guardadas."""
+    if data is None:
+        return None
+    return loads(_dumps(data))
+
+
+def compute_delta(old_data, new_data):
+    """
+    Calcula el delta entre dos estados de un registro.
+
+    Returns:
+        dict: {'set': {campo: valor}, 'unset': [campos eliminados]}
+    """
+    old_data = old_data or {}
+    new_data = new_data or {}
+    changed = {key: value for key, value in new_data.items()
+               if key not in old_data or old_data[key] != value}
+    removed = [key for key in old_data if key not in new_data]
+    return {'set': changed, 'unset': removed}
+
+
+def apply_delta(data, delta):
+    """Aplica un delta (ver compute_delta) sobre un estado y retorna el nuevo estado."""
+    result = dict(data or {})
+    if not delta:
+        return result
+    result.update(delta.get('set') or {})
+    for key in delta.get('unset') or []:
+        result.pop(key, None)
+    return result
+
+
+def is_snapshot_version(version):
+    """Indica si un número de versión debe guardarse como snapshot completo."""
+    interval = max(Config.VERSION_SNAPSHOT_INTERVAL, 1)
+    return (version - 1) % interval == 0
+
+
+def _replay(rows):
+    """
+    Reconstruye los estados de una cadena de versiones ordenada ascendentemente
+    que empieza en un snapshot.
+
+    Returns:
+        dict: {version: datos_completos}
+    """
+    states = {}
+    state = None
+    for row in rows:
+        if row.get('es_snapshot', 1):
+            state = _loads(row.get('datos_completos'))
+        else:
+            state = apply_delta(state, _loads(row.get('datos_delta')))
+        states[row['version']] = state
+    return states
 
-def create_version(table, record_id, full_data, user_id=None, 
+
+def _fetch_chain(cursor, table, record_id, from_version, to_version):
+    """Obtiene las filas desde el snapshot anterior a from_version hasta to_version."""
+    cursor.execute("""
+        SELECT * FROM historial_versiones
+        WHERE tabla = %s AND registro_id = %s AND version <= %s
+          AND version >= (
+              SELECT COALESCE(MAX(version), 0) FROM historial_versiones
+              WHERE tabla = %s AND registro_id = %s AND es_snapshot = 1 AND version <= %s
+          )
+        ORDER BY version ASC
+    """, (table, record_id, to_version, table, record_id, from_version))
+    return cursor.fetchall()
+
+
+def _present(row, state):
+    """Prepara una fila de historial para la respuesta con los datos reconstruidos."""
+    row['datos_completos'] = state
+    row.pop('datos_delta', None)
+    return row
+
+
+def allocate_version(cursor, table, record_id):
+    """
+    Reserva el siguiente número de versión de un registro.
+
+    Usa un contador por registro (contadores_versiones) incrementado con un
+    único INSERT ... ON DUPLICATE KEY UPDATE, por lo que la asignación es O(1)
+    y la fila del contador queda bloqueada hasta el commit: escrituras
+    concurrentes sobre el mismo registro se serializan sin duplicar versiones.
+    """
+    cursor.execute("""
+        INSERT INTO contadores_versiones (tabla, registro_id, ultima_version)
+        VALUES (%s, %s, LAST_INSERT_ID(1))
+        ON DUPLICATE KEY UPDATE ultima_version = LAST_INSERT_ID(ultima_version + 1)
+    """, (table, record_id))
+    cursor.execute("SELECT LAST_INSERT_ID() AS version")
+    return cursor.fetchone()['version']
+
+
+def _resync_counter(cursor, table, record_id):
+    """Alinea el contador con el historial (p. ej. versiones creadas antes del contador)."""
+    cursor.execute("""
+        INSERT INTO contadores_versiones (tabla, registro_id, ultima_version)
+        SELECT %s, %s, COALESCE(MAX(version), 0) FROM historial_versiones
+        WHERE tabla = %s AND registro_id = %s
+        ON DUPLICATE KEY UPDATE ultima_version = VALUES(ultima_version)
+    """, (table, record_id, table, record_id))
+
+
+def create_version(table, record_id, full_data, user_id=None,
                   user_email=None, change_reason=None):
     """
     Crea una nueva versión de un registro.
-    
+
     Args:
         table: Nombre de la tabla
         record_id: ID del registro
@@ -23,31 +154,47 @@ def create_version(table, record_id, full_data, user_id=None,
     conn = get_db_connection()
     if not conn:
         return False
-    
+
+    full_data = _normalize(full_data)
+
     try:
         cursor = conn.cursor()
-        
-        # Obtener la versión actual más alta
-        cursor.execute("""
-            SELECT MAX(version) as max_version
-            FROM historial_versiones
-            WHERE tabla = %s AND registro_id = %s
-        """, (table, record_id))
-        
-        result = cursor.fetchone()
-        next_version = (result['max_version'] or 0) + 1
-        
-        version_id = f"ver-{uuid.uuid4().hex[:12]}"
-        full_data_json = json.dumps(full_data) if full_data else None
-        
-        cursor.execute("""
-            INSERT INTO historial_versiones
-            (id, tabla, registro_id, version, datos_completos, usuario_id,
-             usuario_email, motivo_cambio, creado_en)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (version_id, table, record_id, next_version, full_data_json,
-              user_id, user_email, change_reason, datetime.now(timezone.utc)))
-        
+
+        for attempt in range(2):
+            next_version = allocate_version(cursor, table, record_id)
+
+            previous_data = None
+            if full_data and not is_snapshot_version(next_version):
+                chain = _fetch_chain(cursor, table, record_id, next_version - 1, next_version - 1)
+                previous_data = _replay(chain).get(next_version - 1)
+
+            version_id = f"ver-{uuid.uuid4().hex[:12]}"
+            if previous_data is None:
+                # Snapshot completo: primera versión, intervalo cumplido o base inexistente
+                is_snapshot = 1
+                full_data_json = _dumps(full_data) if full_data else None
+                delta_json = None
+            else:
+                is_snapshot = 0
+                full_data_json = None
+                delta_json = _dumps(compute_delta(previous_data, full_data))
+
+            try:
+                cursor.execute("""
+                    INSERT INTO historial_versiones
+                    (id, tabla, registro_id, version, es_snapshot, datos_completos, datos_delta,
+                     usuario_id, usuario_email, motivo_cambio, creado_en)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (version_id, table, record_id, next_version, is_snapshot, full_data_json,
+                      delta_json, user_id, user_email, change_reason, datetime.now(timezone.utc)))
+                break
+            except pymysql.err.IntegrityError:
+                # El contador estaba desfasado respecto al historial (uq_version_registro)
+                conn.rollback()
+                if attempt:
+                    raise
+                _resync_counter(cursor, table, record_id)
+
         conn.commit()
         cursor.close()
         conn.close()
@@ -61,10 +208,75 @@ def create_version(table, record_id, full_data, user_id=None,
         return False
 
 
+def create_versions(table, records, user_id=None, user_email=None, change_reason=None):
+    """
+    Crea versiones para muchos registros de una vez (importaciones masivas).
+
+    Los contadores se incrementan con una sola sentencia multi-fila (los
+    executemany solo llevan placeholders, para que PyMySQL los agrupe) y todas
+    las versiones se guardan como snapshots completos, evitando reconstruir
+    el estado previo de cada registro; la compactación posterior puede
+    convertirlas en deltas.
+
+    Args:
+        table: Nombre de la tabla
+        records: Lista de (record_id, full_data)
+        user_id: ID del usuario que crea las versiones
+        user_email: Email del usuario
+        change_reason: Motivo del cambio
+    """
+    if not records:
+        return True
+
+    conn = get_db_connection()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        record_ids = [record_id for record_id, _ in records]
+
+        cursor.executemany("""
+            INSERT INTO contadores_versiones (tabla, registro_id, ultima_version)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE ultima_version = ultima_version + 1
+        """, [(table, record_id, 1) for record_id in record_ids])
+
+        placeholders = ', '.join(['%s'] * len(record_ids))
+        cursor.execute(f"""
+            SELECT registro_id, ultima_version FROM contadores_versiones
+            WHERE tabla = %s AND registro_id IN ({placeholders})
+        """, [table] + record_ids)
+        versions = {row['registro_id']: row['ultima_version'] for row in cursor.fetchall()}
+
+        now = datetime.now(timezone.utc)
+        cursor.executemany("""
+            INSERT INTO historial_versiones
+            (id, tabla, registro_id, version, es_snapshot, datos_completos, datos_delta,
+             usuario_id, usuario_email, motivo_cambio, creado_en)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, [(f"ver-{uuid.uuid4().hex[:12]}", table, record_id, versions[record_id], 1,
+               _dumps(full_data) if full_data else None, None, user_id, user_email,
+               change_reason, now)
+              for record_id, full_data in records])
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"[VERSIONING] Error creating versions: {str(e)}")
+        if conn:
+            conn.rollback()
+            cursor.close()
+            conn.close()
+        return False
+
+
 def get_versions(table, record_id, limit=10):
     """
     Obtiene el historial de versiones de un registro.
-    
+
     Args:
         table: Nombre de la tabla
         record_id: ID del registro
@@ -73,28 +285,32 @@ def get_versions(table, record_id, limit=10):
     conn = get_db_connection()
     if not conn:
         return []
-    
+
     try:
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT * FROM historial_versiones
+            SELECT version FROM historial_versiones
             WHERE tabla = %s AND registro_id = %s
             ORDER BY version DESC
             LIMIT %s
         """, (table, record_id, limit))
-        
-        results = cursor.fetchall()
+
+        versions = [row['version'] for row in cursor.fetchall()]
+        if not versions:
+            cursor.close()
+            conn.close()
+            return []
+
+        # Una sola lectura desde el snapshot anterior a la versión más antigua pedida
+        chain = _fetch_chain(cursor, table, record_id, min(versions), max(versions))
         cursor.close()
         conn.close()
-        
-        # Parsear JSON de datos_completos
-        for result in results:
-            if result.get('datos_completos'):
-                try:
-                    result['datos_completos'] = json.loads(result['datos_completos'])
-                except:
-                    pass
-        
+
+        states = _replay(chain)
+        results = [_present(row, states.get(row['version']))
+                   for row in chain if row['version'] in versions]
+        results.sort(key=lambda row: row['version'], reverse=True)
+
         return results
     except Exception as e:
         print(f"[VERSIONING] Error getting versions: {str(e)}")
@@ -107,7 +323,7 @@ def get_versions(table, record_id, limit=10):
 def get_version(table, record_id, version):
     """
     Obtiene una versión específica de un registro.
-    
+
     Args:
         table: Nombre de la tabla
         record_id: ID del registro
@@ -116,28 +332,283 @@ def get_version(table, record_id, version):
     conn = get_db_connection()
     if not conn:
         return None
-    
+
     try:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM historial_versiones
-            WHERE tabla = %s AND registro_id = %s AND version = %s
-        """, (table, record_id, version))
-        
-        result = cursor.fetchone()
+        chain = _fetch_chain(cursor, table, record_id, version, version)
         cursor.close()
         conn.close()
-        
-        if result and result.get('datos_completos'):
-            try:
-                result['datos_completos'] = json.loads(result['datos_completos'])
-            except:
-                pass
-        
-        return result
+
+        if not chain or chain[-1]['version'] != version:
+            return None
+
+        states = _replay(chain)
+        return _present(chain[-1], states.get(version))
     except Exception as e:
         print(f"[VERSIONING] Error getting version: {str(e)}")
         if conn:
             cursor.close()
             conn.close()
         return None
+
+
+def parse_as_of_timestamp(timestamp):
+    """Convierte un timestamp (datetime o ISO 8601) al UTC naive usado en creado_en."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.strip().replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def get_record_as_of(table, record_id, timestamp):
+    """
+    Reconstruye el estado de un registro en un instante dado.
+
+    Args:
+        table: Nombre de la tabla
+        record_id: ID del registro
+        timestamp: Instante (datetime o ISO 8601, UTC si no tiene zona)
+
+    Returns:
+        dict con 'version' y 'data' (None si el registro no existía o estaba eliminado),
+        o None si no hay historial anterior al instante.
+    """
+    timestamp = parse_as_of_timestamp(timestamp)
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT MAX(version) AS version FROM historial_versiones
+            WHERE tabla = %s AND registro_id = %s AND creado_en <= %s
+        """, (table, record_id, timestamp))
+        version = cursor.fetchone()['version']
+        if not version:
+            cursor.close()
+            conn.close()
+            return None
+
+        chain = _fetch_chain(cursor, table, record_id, version, version)
+        cursor.close()
+        conn.close()
+
+        return {
+            'record_id': record_id,
+            'version': version,
+            'data': _replay(chain).get(version)
+        }
+    except Exception as e:
+        print(f"[VERSIONING] Error getting record as of {timestamp}: {str(e)}")
+        if conn:
+            cursor.close()
+            conn.close()
+        return None
+
+
+def _slice_candidates(cursor, table, timestamp, field, value):
+    """
+    Ids de los registros que pueden haber tenido field = value en el instante.
+
+    Son las filas vivas con ese valor más todo registro versionado después
+    del instante (modificado o eliminado desde entonces); cualquier otro
+    registro está hoy igual que entonces. La igualdad SQL es más laxa que
+    la comparación exacta que se hace tras reconstruir.
+
+    Returns:
+        list: registro_id candidatos, o None si field no es columna de la tabla
+    """
+    cursor.execute("""
+        SELECT COUNT(*) AS existe FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, field))
+    if not cursor.fetchone()['existe']:
+        return None
+
+    # La reconstrucción compara str() del valor JSON: True/False/None se escriben como en Python
+    values = [value] + {'True': [1], 'False': [0]}.get(value, [])
+    condition = f"`{field}` IN ({', '.join(['%s'] * len(values))})"
+    if value == 'None':
+        condition = f"({condition} OR `{field}` IS NULL)"
+    cursor.execute(f"""
+        SELECT id AS registro_id FROM `{table}` WHERE {condition}
+        UNION
+        SELECT registro_id FROM historial_versiones WHERE tabla = %s AND creado_en > %s
+    """, values + [table, timestamp])
+    return [row['registro_id'] for row in cursor.fetchall()]
+
+
+def _table_chains(cursor, table, timestamp, record_ids=None):
+    """
+    Filas de historial para reconstruir registros en un instante: de cada
+    registro, desde su último snapshot hasta su última versión anterior.
+
+    Args:
+        record_ids: Limitar a estos registros (opcional)
+
+    Returns:
+        dict: {registro_id: [filas por versión ascendente]}
+    """
+    scope = ''
+    params = [table, timestamp]
+    if record_ids is not None:
+        scope = f"AND registro_id IN ({', '.join(['%s'] * len(record_ids))})"
+        params += record_ids
+    cursor.execute(f"""
+        SELECT h.registro_id, h.version, h.es_snapshot, h.datos_completos, h.datos_delta
+        FROM historial_versiones h
+        INNER JOIN (
+            SELECT registro_id,
+                   MAX(CASE WHEN es_snapshot = 1 THEN version END) AS desde,
+                   MAX(version) AS hasta
+            FROM historial_versiones
+            WHERE tabla = %s AND creado_en <= %s {scope}
+            GROUP BY registro_id
+        ) r ON h.registro_id = r.registro_id AND h.version BETWEEN r.desde AND r.hasta
+        WHERE h.tabla = %s
+        ORDER BY h.registro_id, h.version
+    """, params + [table])
+    chains = {}
+    for row in cursor.fetchall():
+        chains.setdefault(row['registro_id'], []).append(row)
+    return chains
+
+
+def get_table_as_of(table, timestamp, field=None, value=None):
+    """
+    Reconstruye todos los registros de una tabla en un instante dado.
+
+    Una sola consulta trae, por registro, solo las filas entre su último
+    snapshot y su última versión anterior al instante, así que el costo
+    por registro está acotado por VERSION_SNAPSHOT_INTERVAL. Con un corte
+    (field/value) solo se reconstruyen los candidatos de _slice_candidates,
+    en bloques de AS_OF_CHUNK_SIZE registros.
+
+    Args:
+        table: Nombre de la tabla
+        timestamp: Instante (datetime o ISO 8601, UTC si no tiene zona)
+        field: Campo para filtrar el corte (p. ej. 'negocio_id')
+        value: Valor requerido del campo
+
+    Returns:
+        list: [{'record_id', 'version', 'data'}] de los registros existentes
+    """
+    timestamp = parse_as_of_timestamp(timestamp)
+    conn = get_db_connection()
+    if not conn:
+        return []
+
+    try:
+        cursor = conn.cursor()
+        if field:
+            candidates = _slice_candidates(cursor, table, timestamp, field, value) or []
+            chain_sets = (_table_chains(cursor, table, timestamp, candidates[start:start + AS_OF_CHUNK_SIZE])
+                          for start in range(0, len(candidates), AS_OF_CHUNK_SIZE))
+        else:
+            chain_sets = [_table_chains(cursor, table, timestamp)]
+
+        results = []
+        for chains in chain_sets:
+            for record_id, chain in chains.items():
+                version = chain[-1]['version']
+                data = _replay(chain).get(version)
+                if data is None:
+                    continue
+                if field and str(data.get(field)) != str(value):
+                    continue
+                results.append({'record_id': record_id, 'version': version, 'data': data})
+
+        cursor.close()
+        conn.close()
+        return results
+    except Exception as e:
+        print(f"[VERSIONING] Error getting table as of {timestamp}: {str(e)}")
+        if conn:
+            cursor.close()
+            conn.close()
+        return []
+
+
+def compact_versions(table=None, batch_size=500):
+    """
+    Convierte el historial existente de snapshots completos al formato
+    snapshot + deltas. Es idempotente: las versiones ya compactadas se omiten.
+
+    Args:
+        table: Compactar solo esta tabla (opcional)
+        batch_size: Registros procesados por transacción
+
+    Returns:
+        dict: Estadísticas de la compactación
+    """
+    stats = {
+        'registros': 0,
+        'versiones_compactadas': 0,
+        'bytes_antes': 0,
+        'bytes_despues': 0
+    }
+
+    conn = get_db_connection()
+    if not conn:
+        return stats
+
+    try:
+        cursor = conn.cursor()
+        conditions = ["es_snapshot = 1"]
+        params = []
+        if table:
+            conditions.append("tabla = %s")
+            params.append(table)
+
+        cursor.execute(f"""
+            SELECT DISTINCT tabla, registro_id FROM historial_versiones
+            WHERE {' AND '.join(conditions)}
+            ORDER BY tabla, registro_id
+        """, params)
+        records = cursor.fetchall()
+
+        for index, record in enumerate(records, start=1):
+            cursor.execute("""
+                SELECT id, version, es_snapshot, datos_completos, datos_delta
+                FROM historial_versiones
+                WHERE tabla = %s AND registro_id = %s
+                ORDER BY version ASC
+            """, (record['tabla'], record['registro_id']))
+            rows = cursor.fetchall()
+            states = _replay(rows)
+            stats['registros'] += 1
+
+            for row in rows:
+                version = row['version']
+                previous_data = states.get(version - 1)
+                current_data = states.get(version)
+                if (not row['es_snapshot'] or is_snapshot_version(version)
+                        or previous_data is None or current_data is None):
+                    continue
+
+                delta_json = _dumps(compute_delta(previous_data, current_data))
+                stats['versiones_compactadas'] += 1
+                stats['bytes_antes'] += len(_dumps(current_data))
+                stats['bytes_despues'] += len(delta_json)
+                cursor.execute("""
+                    UPDATE historial_versiones
+                    SET es_snapshot = 0, datos_delta = %s, datos_completos = NULL
+                    WHERE id = %s
+                """, (delta_json, row['id']))
+
+            if index % batch_size == 0:
+                conn.commit()
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return stats
+    except Exception as e:
+        print(f"[VERSIONING] Error compacting versions: {str(e)}")
+        if conn:
+            conn.rollback()
+            cursor.close()
+            conn.close()
+        return stats
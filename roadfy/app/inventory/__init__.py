@@ -0,0 +1,3 @@
+"""
+Lógica de inventario compartida por los routers (cargas masivas, índices, eventos)
+"""
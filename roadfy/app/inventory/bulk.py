@@ -0,0 +1,224 @@
+"""
+Carga masiva de inventario: validación por lotes y upsert multi-fila.
+"""
+from app.utils.validators import validate_id_format, validate_number
+from app.inventory.price_history import record_prices
+from app.inventory.low_stock import sync_low_stock
+from datetime import datetime, timezone
+
+MAX_QUANTITY = 999999
+MAX_PRICE = 999999.99
+IN_CHUNK_SIZE = 1000
+
+INVENTORY_COLUMNS = "id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en"
+
+
+def inventory_item_id(business_id, tire_id):
+    """Build the deterministic inventory item id used across the API."""
+    return f"inv-{business_id}-{tire_id}"
+
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def validate_row(row):
+    """
+    Validate one (tire_id, quantity, price[, version]) row.
+
+    Returns:
+        tuple: ((tire_id, quantity, price, version), None) or (None, error message).
+        version is the item version the row was based on, or None.
+    """
+    if not isinstance(row, dict):
+        return None, 'Row must be a JSON object'
+
+    tire_id = row.get('tire_id')
+    quantity = row.get('quantity', 0)
+    price = row.get('price')
+
+    if not tire_id or price is None:
+        return None, 'Missing required fields: tire_id, price'
+    if not validate_id_format(tire_id):
+        return None, 'Invalid tire_id format'
+
+    if quantity is None or not validate_number(quantity):
+        return None, 'La cantidad debe ser un número positivo o cero'
+    quantity = int(quantity)
+    if quantity > MAX_QUANTITY:
+        return None, 'La cantidad debe estar entre 0 y 999,999'
+
+    if not validate_number(price, allow_decimal=True):
+        return None, 'El precio debe ser un número positivo o cero'
+    price = round(float(price), 2)
+    if price > MAX_PRICE:
+        return None, 'El precio debe estar entre 0 y 999,999.99'
+
+    version = row.get('version')
+    if version in ('', None):
+        version = None
+    else:
+        if not validate_number(version):
+            return None, 'version must be an item version number'
+        version = int(version)
+
+    return (str(tire_id), quantity, price, version), None
+
+
+def validate_rows(rows, start_index=0):
+    """
+    Validate a batch of rows in one pass.
+
+    Returns:
+        tuple: (valid, errors, superseded) where valid is a list of (index, tire_id, quantity,
+        price, version) and errors a list of {'index', 'tire_id', 'error'}. A tire repeated in
+        the batch keeps its last occurrence; earlier ones are listed in superseded as
+        {'index', 'tire_id', 'superseded_by'} (they are not failures).
+    """
+    valid = {}
+    errors = []
+    superseded = []
+    for offset, row in enumerate(rows):
+        index = start_index + offset
+        clean, error = validate_row(row)
+        if error:
+            errors.append({'index': index, 'tire_id': row.get('tire_id') if isinstance(row, dict) else None,
+                           'error': error})
+            continue
+        tire_id = clean[0]
+        if tire_id in valid:
+            superseded.append({'index': valid[tire_id][0], 'tire_id': tire_id, 'superseded_by': index})
+        valid[tire_id] = (index,) + clean
+    return list(valid.values()), errors, superseded
+
+
+def upsert_inventory(conn, business_id, rows, user=None, start_index=0):
+    """
+    Validate and upsert inventory rows for one business.
+
+    Uses one IN query to check tire ids, one IN query to load the current
+    rows (for audit and change detection) and a single multi-row
+    INSERT ... ON DUPLICATE KEY UPDATE that bumps the row version. Rows may
+    carry the 'version' they were based on (0 for a new item); stale rows are
+    reported as errors instead of overwriting a concurrent edit. Price history
+    points are written in the same transaction; audit entries are written as
+    one batch.
+
+    Args:
+        conn: Open database connection (committed here)
+        business_id: Business that owns the inventory
+        rows: List of {'tire_id', 'quantity', 'price'} dicts
+        user: Current user dict (for audit)
+        start_index: Index of rows[0] in the whole upload (for error reporting)
+
+    Returns:
+        dict: {'inserted', 'updated', 'unchanged', 'errors', 'superseded', 'items'} where
+        superseded lists the repeated rows replaced by a later one (see validate_rows) and
+        items are the (old, new) row pairs that were written.
+    """
+    valid, errors, superseded = validate_rows(rows, start_index)
+    result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': errors,
+              'superseded': superseded, 'items': []}
+    if not valid:
+        return result
+
+    cursor = conn.cursor()
+    try:
+        tire_ids = [row[1] for row in valid]
+
+        known_tires = set()
+        existing = {}
+        for chunk in _chunks(tire_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"SELECT id FROM llantas WHERE id IN ({placeholders})", chunk)
+            known_tires.update(row['id'] for row in cursor.fetchall())
+            # Lock the touched rows so change detection and audit see what gets overwritten
+            cursor.execute(f"""
+                SELECT {INVENTORY_COLUMNS} FROM items_inventario
+                WHERE negocio_id = %s AND llanta_id IN ({placeholders})
+                FOR UPDATE
+            """, [business_id] + chunk)
+            existing.update({row['llanta_id']: row for row in cursor.fetchall()})
+
+        now = datetime.now(timezone.utc)
+        to_write = []
+        for index, tire_id, quantity, price, version in valid:
+            if tire_id not in known_tires:
+                errors.append({'index': index, 'tire_id': tire_id, 'error': 'Tire not found'})
+                continue
+            old = existing.get(tire_id)
+            if version is not None and version != (old['version'] if old else 0):
+                errors.append({'index': index, 'tire_id': tire_id,
+                               'error': 'Version conflict: item was modified by another request',
+                               'current_version': old['version'] if old else None})
+                continue
+            if old and quantity < old['cantidad_reservada']:
+                errors.append({'index': index, 'tire_id': tire_id,
+                               'error': f"Quantity cannot be lower than the {old['cantidad_reservada']} reserved units"})
+                continue
+            if old and old['cantidad'] == quantity and float(old['precio']) == price:
+                result['unchanged'] += 1
+                continue
+            new = {
+                'id': old['id'] if old else inventory_item_id(business_id, tire_id),
+                'negocio_id': business_id,
+                'llanta_id': tire_id,
+                'cantidad': quantity,
+                'cantidad_reservada': old['cantidad_reservada'] if old else 0,
+                'precio': price,
+                'version': old['version'] + 1 if old else 1,
+                'creado_en': old['creado_en'] if old else now
+            }
+            to_write.append((old, new))
+
+        if to_write:
+            cursor.executemany("""
+                INSERT INTO items_inventario (id, negocio_id, llanta_id, cantidad, precio, version, creado_en)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE cantidad = VALUES(cantidad), precio = VALUES(precio),
+                                        version = version + 1
+            """, [(new['id'], business_id, new['llanta_id'], new['cantidad'], new['precio'], 1, now)
+                  for _, new in to_write])
+            record_prices(cursor, [new for _, new in to_write], now)
+            sync_low_stock(cursor, [new['id'] for _, new in to_write])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    errors.sort(key=lambda error: error['index'])
+    result['inserted'] = sum(1 for old, _ in to_write if old is None)
+    result['updated'] = len(to_write) - result['inserted']
+    result['items'] = to_write
+
+    _record_changes(to_write, user)
+    return result
+
+
+def _record_changes(items, user):
+    """Write one audit batch and one version batch for the upserted rows and publish their events."""
+    if not items:
+        return
+
+    from app.governance.audit import build_change_entry, log_changes
+    from app.governance.versioning import create_versions
+
+    user_id = user.get('id') if user else None
+    user_email = user.get('correo') if user else None
+
+    log_changes([
+        build_change_entry(table='items_inventario', record_id=new['id'],
+                           action='UPDATE' if old else 'INSERT',
+                           user_id=user_id, user_email=user_email,
+                           old_data=old, new_data=new)
+        for old, new in items
+    ])
+    create_versions('items_inventario', [(new['id'], new) for _, new in items],
+                    user_id=user_id, user_email=user_email,
+                    change_reason='Carga masiva de inventario')
+
+    from app.inventory.events import publish_many, INVENTORY_CREATED, INVENTORY_UPDATED
+    publish_many([(INVENTORY_UPDATED if old else INVENTORY_CREATED, new, old) for old, new in items])
@@ -0,0 +1,349 @@
+"""
+Eventos de inventario: hub de difusión entre procesos.
+
+El router de inventario publica aquí cada alta, actualización y baja. El hub
+reparte los eventos a:
+- listeners síncronos del proceso (índices en memoria que se mantienen al día)
+- suscriptores de Server-Sent Events, cada uno con un buffer acotado
+
+Cada evento se entrega al instante en el proceso que lo publica y además se
+guarda en la tabla eventos_inventario. Cada proceso lee esa tabla en orden de
+id (ver utils/changefeed.py), cada INVENTORY_EVENTS_POLL_SECONDS en segundo
+plano o bajo demanda con poll(), y reparte los eventos de los demás procesos
+a sus propios listeners y suscriptores. Así cualquier worker ve las
+escrituras de todos. Las filas de esta y las demás tablas de cambios se
+purgan tras INVENTORY_EVENTS_RETENTION_HOURS.
+
+Guarda un historial corto para que un cliente pueda reanudar con
+Last-Event-ID. Los ids incluyen un token del proceso, así que un id de otro
+proceso o de antes de un reinicio se detecta y el cliente recibe un evento
+'reset' para recargar los datos.
+
+Con un servidor WSGI que precarga la app (gunicorn --preload), el hub se crea
+en el proceso maestro y los workers lo heredan por fork: el token, el
+historial y el hilo lector se rehacen en cada proceso la primera vez que usa
+el hub (como el journal de auditoría), y los locks se recrean tras el fork.
+"""
+from app.db import get_db_connection
+from app.config import Config
+from app.utils.changefeed import ChangeFeed, prune_feeds
+from app.utils.jsoncodec import dumps, loads
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal
+import os
+import threading
+import time
+import uuid
+
+EVENT_HISTORY_SIZE = 2000
+SUBSCRIBER_BUFFER_SIZE = 200
+
+INVENTORY_CREATED = 'inventory.created'
+INVENTORY_UPDATED = 'inventory.updated'
+INVENTORY_DELETED = 'inventory.deleted'
+
+
+class Subscription:
+    """A subscriber's bounded event buffer. Overflow drops the oldest events and flags a reset."""
+
+    def __init__(self, business_id=None, tire_id=None, buffer_size=SUBSCRIBER_BUFFER_SIZE):
+        self.business_id = business_id
+        self.tire_id = tire_id
+        self.overflowed = False
+        self._events = deque(maxlen=buffer_size)
+        self._ready = threading.Condition()
+
+    def matches(self, event):
+        if self.business_id and event['business_id'] != self.business_id:
+            return False
+        if self.tire_id and event['tire_id'] != self.tire_id:
+            return False
+        return True
+
+    def push(self, event):
+        with self._ready:
+            if len(self._events) == self._events.maxlen:
+                self.overflowed = True
+            self._events.append(event)
+            self._ready.notify()
+
+    def wait(self, timeout):
+        """Return the buffered events, waiting up to timeout seconds for at least one."""
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+
+
+class InventoryEventHub:
+    """In-process fan-out of inventory change events."""
+
+    def __init__(self, history_size=EVENT_HISTORY_SIZE):
+        self._pid = None
+        self._boot_id = None
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._listeners = []
+        self._feed = ChangeFeed('eventos_inventario', 'tipo, origen, datos')
+        self._poll_lock = threading.Lock()
+
+    @property
+    def boot_id(self):
+        """Token of this process in event ids and in eventos_inventario.origen."""
+        return self._ensure_process()
+
+    def _ensure_process(self):
+        """
+        Take over the hub in this process (also after a fork): new token, empty
+        history and the relay thread running. Returns the token.
+        """
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._boot_id = uuid.uuid4().hex[:8]
+                    self._seq = 0
+                    self._history.clear()
+                    self._pid = pid
+            start_event_relay()
+        return self._boot_id
+
+    def _after_fork(self):
+        """In a forked child (a single thread): locks held by the parent's threads would never be released."""
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._subscribers = set()
+
+    def add_listener(self, callback):
+        """Register a synchronous callback(event) run for every published event."""
+        self._listeners.append(callback)
+
+    def publish(self, event_type, item=None, previous=None):
+        """
+        Publish an inventory change to this process and, through eventos_inventario, to the others.
+
+        Args:
+            event_type: INVENTORY_CREATED, INVENTORY_UPDATED or INVENTORY_DELETED
+            item: New row (items_inventario columns), None for deletions
+            previous: Row before the change, None for creations
+        """
+        return self.publish_many([(event_type, item, previous)])[0]
+
+    def publish_many(self, changes):
+        """
+        Publish several changes with a single eventos_inventario insert.
+
+        Args:
+            changes: List of (event_type, item, previous)
+
+        Returns:
+            list: The published events
+        """
+        self._ensure_process()
+        self._record(changes)
+        return [self._dispatch(event_type, item, previous) for event_type, item, previous in changes]
+
+    def _record(self, changes):
+        """Write changes to eventos_inventario. A failure is logged: local delivery still happens."""
+        if not changes:
+            return
+        conn = get_db_connection()
+        if not conn:
+            print("[INVENTORY_EVENTS] No se pudo registrar eventos: sin conexión a la base de datos")
+            return
+        try:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO eventos_inventario (tipo, origen, datos) VALUES (%s, %s, %s)
+            """, [(event_type, self._boot_id, dumps({'item': item, 'previous': previous}))
+                  for event_type, item, previous in changes])
+            conn.commit()
+            cursor.close()
+        except Exception as e:
+            conn.rollback()
+            print(f"[INVENTORY_EVENTS] Error registrando eventos: {str(e)}")
+        finally:
+            conn.close()
+
+    def _dispatch(self, event_type, item=None, previous=None):
+        """Deliver an event to this process's listeners and SSE subscribers."""
+        row = item or previous or {}
+        with self._lock:
+            self._seq += 1
+            event = {
+                'id': f"{self._boot_id}-{self._seq}",
+                'seq': self._seq,
+                'type': event_type,
+                'item_id': row.get('id'),
+                'business_id': row.get('negocio_id'),
+                'tire_id': row.get('llanta_id'),
+                'item': item,
+                'previous': previous,
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            }
+            self._history.append(event)
+            subscribers = [sub for sub in self._subscribers if sub.matches(event)]
+
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[INVENTORY_EVENTS] Listener error: {str(e)}")
+        for subscription in subscribers:
+            subscription.push(event)
+        return event
+
+    def subscribe(self, business_id=None, tire_id=None, last_event_id=None):
+        """
+        Register a subscriber.
+
+        Returns:
+            tuple: (subscription, backlog, resume_ok) where backlog holds the
+            missed events after last_event_id and resume_ok is False when
+            those events are no longer available (the client must refetch).
+        """
+        self._ensure_process()
+        subscription = Subscription(business_id, tire_id)
+        with self._lock:
+            self._subscribers.add(subscription)
+            backlog, resume_ok = self._missed_events(subscription, last_event_id)
+        return subscription, backlog, resume_ok
+
+    def _missed_events(self, subscription, last_event_id):
+        if not last_event_id:
+            return [], True
+        boot_id, _, seq = last_event_id.partition('-')
+        if boot_id != self._boot_id or not seq.isdigit():
+            return [], False
+        seq = int(seq)
+        oldest = self._history[0]['seq'] if self._history else self._seq + 1
+        if seq + 1 < oldest:
+            return [], False
+        return [event for event in self._history
+                if event['seq'] > seq and subscription.matches(event)], True
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def poll(self, cursor=None):
+        """
+        Deliver the events published by other processes since the last poll.
+
+        Args:
+            cursor: Optional DB cursor to reuse (otherwise a connection is opened)
+
+        Returns:
+            int: Number of events delivered
+        """
+        boot_id = self._ensure_process()
+        with self._poll_lock:
+            if cursor is not None:
+                rows = self._feed.read(cursor)
+            else:
+                conn = get_db_connection()
+                if not conn:
+                    raise Exception("No se pudo conectar a la base de datos")
+                try:
+                    own_cursor = conn.cursor()
+                    rows = self._feed.read(own_cursor)
+                    own_cursor.close()
+                finally:
+                    conn.close()
+
+            delivered = 0
+            for row in rows:
+                if row['origen'] == boot_id:
+                    continue  # already delivered when published
+                data = loads(row['datos'])
+                self._dispatch(row['tipo'], _decode_row(data.get('item')), _decode_row(data.get('previous')))
+                delivered += 1
+            return delivered
+
+
+def _decode_row(row):
+    """Restore the Decimal/datetime columns of an items_inventario row stored as JSON text."""
+    if not row:
+        return row
+    if row.get('precio') is not None:
+        row['precio'] = Decimal(str(row['precio']))
+    for key, value in row.items():
+        if key.endswith('_en') and isinstance(value, str):
+            try:
+                row[key] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return row
+
+
+hub = InventoryEventHub()
+
+
+def publish(event_type, item=None, previous=None):
+    """Publish an inventory change (see InventoryEventHub.publish)."""
+    return hub.publish(event_type, item=item, previous=previous)
+
+
+def publish_many(changes):
+    """Publish several inventory changes at once (see InventoryEventHub.publish_many)."""
+    return hub.publish_many(changes)
+
+
+def _prune_events():
+    conn = get_db_connection()
+    if not conn:
+        return
+    try:
+        cursor = conn.cursor()
+        prune_feeds(cursor, Config.INVENTORY_EVENTS_RETENTION_HOURS)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+_relay_pid = None
+_relay_lock = threading.Lock()
+
+
+def _relay_loop():
+    last_prune = time.monotonic()
+    while True:
+        time.sleep(Config.INVENTORY_EVENTS_POLL_SECONDS)
+        try:
+            hub.poll()
+            if time.monotonic() - last_prune > 600:
+                _prune_events()
+                last_prune = time.monotonic()
+        except Exception as e:
+            print(f"[INVENTORY_EVENTS] Error leyendo eventos de otros procesos: {str(e)}")
+
+
+def start_event_relay():
+    """
+    Start the background reader of eventos_inventario in this process (once per process).
+
+    Called from create_app and, after a fork, by the first use of the hub in the new process.
+    """
+    global _relay_pid
+    with _relay_lock:
+        if _relay_pid == os.getpid():
+            return
+        _relay_pid = os.getpid()
+        threading.Thread(target=_relay_loop, name='inventory-event-relay', daemon=True).start()
+
+
+def _after_fork_in_child():
+    global _relay_lock
+    _relay_lock = threading.Lock()
+    hub._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,324 @@
+"""
+Importación de inventario desde archivos CSV/XLSX como trabajo en segundo plano.
+
+El archivo subido se guarda en disco y se procesa con un pipeline de
+generadores (lectura -> resolución de llantas -> lotes -> upsert), de modo que
+la memoria usada depende del tamaño de lote y no del tamaño del archivo.
+El estado de cada trabajo se guarda en importaciones_inventario para que
+cualquier proceso web pueda consultarlo.
+
+Los trabajos corren en hilos del proceso que recibió el archivo, que marca
+latido_en de los suyos cada IMPORT_HEARTBEAT_SECONDS. Si el proceso muere
+(reinicio, despliegue), el monitor de cualquier otro proceso, o del mismo al
+volver a arrancar, marca como FALLIDO todo trabajo pendiente sin latido en
+IMPORT_STALE_SECONDS: el archivo temporal se pierde con el proceso, así que
+hay que volver a subirlo.
+"""
+from app.db import get_db_connection
+from app.catalog.tire_import import catalog_key
+from app.inventory.bulk import upsert_inventory
+from app.utils.jsoncodec import dumps, loads
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import csv
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    import openpyxl
+except ImportError:  # XLSX es opcional
+    openpyxl = None
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+IMPORT_HEARTBEAT_SECONDS = 30
+IMPORT_STALE_SECONDS = 180
+
+# Aliases de encabezados aceptados (exportaciones de POS en español o inglés)
+COLUMN_ALIASES = {
+    'tire_id': 'tire_id', 'llanta_id': 'tire_id', 'id_llanta': 'tire_id',
+    'quantity': 'quantity', 'cantidad': 'quantity', 'stock': 'quantity',
+    'price': 'price', 'precio': 'price',
+    'brand': 'brand', 'marca': 'brand',
+    'model': 'model', 'modelo': 'model',
+    'width': 'width', 'ancho': 'width',
+    'ratio': 'ratio', 'aspect_ratio': 'ratio', 'perfil': 'ratio', 'relacion_aspecto': 'ratio',
+    'diameter': 'diameter', 'diametro': 'diameter', 'rin': 'diameter',
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='inventory-import')
+_active_jobs = set()  # ids of the jobs queued or running in this process
+_jobs_lock = threading.Lock()
+
+
+def xlsx_supported():
+    """Whether XLSX uploads can be parsed (openpyxl installed)."""
+    return openpyxl is not None
+
+
+def _normalize_header(header):
+    key = str(header or '').strip().lower().replace(' ', '_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def _iter_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        sample = handle.read(4096)
+        handle.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(handle, dialect)
+        headers = [_normalize_header(h) for h in next(reader, [])]
+        for values in reader:
+            if any(value.strip() for value in values):
+                yield dict(zip(headers, values))
+
+
+def _iter_xlsx(path):
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        for values in rows:
+            if any(value not in (None, '') for value in values):
+                yield dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+def _load_catalog_keys():
+    """Map normalized brand/model/size -> tire id (catalog is small compared to stock files)."""
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, marca, modelo, ancho, relacion_aspecto, diametro FROM llantas")
+        keys = {catalog_key(t['marca'], t['modelo'], t['ancho'], t['relacion_aspecto'], t['diametro']): t['id']
+                for t in cursor.fetchall()}
+        cursor.close()
+        return keys
+    finally:
+        conn.close()
+
+
+def _resolve(rows):
+    """Fill tire_id from brand/model/size for rows without one (the catalog is loaded on the first such row)."""
+    catalog_keys = None
+    for row in rows:
+        if not row.get('tire_id'):
+            if catalog_keys is None:
+                catalog_keys = _load_catalog_keys()
+            key = catalog_key(row.get('brand'), row.get('model'), row.get('width'),
+                            row.get('ratio'), row.get('diameter'))
+            row['tire_id'] = catalog_keys.get(key)
+        if isinstance(row.get('tire_id'), str):
+            row['tire_id'] = row['tire_id'].strip()
+        yield row
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _save_job(conn, job_id, **fields):
+    """Persist job progress (one UPDATE per chunk)."""
+    if 'errores' in fields:
+        fields['errores'] = dumps(fields['errores'])
+    assignments = ', '.join(f"{field} = %s" for field in fields)
+    cursor = conn.cursor()
+    cursor.execute(f"UPDATE importaciones_inventario SET {assignments} WHERE id = %s",
+                   list(fields.values()) + [job_id])
+    conn.commit()
+    cursor.close()
+
+
+def _run_import(job_id, path, file_format, business_id, user):
+    conn = get_db_connection()
+    if not conn:
+        print(f"[INVENTORY_IMPORT] Job {job_id}: no database connection")
+        return
+
+    counters = {'procesadas': 0, 'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'fallidas': 0}
+    errors = []
+    try:
+        _save_job(conn, job_id, estado='EN_PROCESO', iniciado_en=datetime.now(timezone.utc))
+        rows = _iter_xlsx(path) if file_format == 'xlsx' else _iter_csv(path)
+
+        for batch in _batched(_resolve(rows), IMPORT_CHUNK_SIZE):
+            result = upsert_inventory(conn, business_id, batch, user=user,
+                                      start_index=counters['procesadas'])
+            counters['procesadas'] += len(batch)
+            counters['insertadas'] += result['inserted']
+            counters['actualizadas'] += result['updated']
+            counters['sin_cambios'] += result['unchanged']
+            counters['fallidas'] += len(result['errors'])
+            # Keep only the first errors so a bad file cannot grow the job without bound
+            errors.extend(result['errors'][:max(MAX_REPORTED_ERRORS - len(errors), 0)])
+            _save_job(conn, job_id, errores=errors, **counters)
+
+        _save_job(conn, job_id, estado='COMPLETADO', finalizado_en=datetime.now(timezone.utc),
+                  errores=errors, **counters)
+    except Exception as e:
+        print(f"[INVENTORY_IMPORT] Job {job_id} failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        try:
+            conn.rollback()
+            _save_job(conn, job_id, estado='FALLIDO', mensaje_error=str(e)[:1000],
+                      finalizado_en=datetime.now(timezone.utc), errores=errors, **counters)
+        except Exception:
+            pass
+    finally:
+        conn.close()
+        with _jobs_lock:
+            _active_jobs.discard(job_id)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def start_import(stream, file_format, business_id, user):
+    """
+    Save an uploaded file to disk and queue its import.
+
+    Args:
+        stream: File-like object with the upload (read in blocks)
+        file_format: 'csv' or 'xlsx'
+        business_id: Business receiving the stock
+        user: Current user dict (for permissions already checked and audit)
+
+    Returns:
+        dict: The job status
+    """
+    handle, path = tempfile.mkstemp(prefix='roadfy-import-', suffix=f'.{file_format}')
+    with os.fdopen(handle, 'wb') as output:
+        while True:
+            block = stream.read(64 * 1024)
+            if not block:
+                break
+            output.write(block)
+
+    job_id = f"import-{uuid.uuid4().hex[:12]}"
+    conn = get_db_connection()
+    if not conn:
+        os.remove(path)
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO importaciones_inventario
+            (id, negocio_id, usuario_id, formato, estado, creado_en, latido_en)
+            VALUES (%s, %s, %s, %s, 'EN_COLA', %s, UTC_TIMESTAMP())
+        """, (job_id, business_id, user.get('id') if user else None, file_format,
+              datetime.now(timezone.utc)))
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    with _jobs_lock:
+        _active_jobs.add(job_id)
+    _executor.submit(_run_import, job_id, path, file_format, business_id, user)
+    return get_import_job(job_id)
+
+
+def get_import_job(job_id):
+    """Return an import job's status, or None."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM importaciones_inventario WHERE id = %s", (job_id,))
+        job = cursor.fetchone()
+        cursor.close()
+    finally:
+        conn.close()
+
+    if not job:
+        return None
+    return {
+        'id': job['id'],
+        'business_id': job['negocio_id'],
+        'format': job['formato'],
+        'status': job['estado'],
+        'processed': job['procesadas'],
+        'inserted': job['insertadas'],
+        'updated': job['actualizadas'],
+        'unchanged': job['sin_cambios'],
+        'failed': job['fallidas'],
+        # Rows repeated in a chunk and replaced by a later one are the only ones left uncounted
+        'superseded': job['procesadas'] - job['insertadas'] - job['actualizadas']
+                      - job['sin_cambios'] - job['fallidas'],
+        'errors': loads(job['errores']) if job['errores'] else [],
+        'error': job['mensaje_error'],
+        'created_at': job['creado_en'].isoformat() if job['creado_en'] else None,
+        'started_at': job['iniciado_en'].isoformat() if job['iniciado_en'] else None,
+        'finished_at': job['finalizado_en'].isoformat() if job['finalizado_en'] else None
+    }
+
+
+def _monitor_jobs():
+    """Refresh the heartbeat of this process's jobs and fail pending jobs whose process is gone."""
+    conn = get_db_connection()
+    if not conn:
+        return
+    try:
+        cursor = conn.cursor()
+        with _jobs_lock:
+            job_ids = list(_active_jobs)
+        if job_ids:
+            cursor.execute(f"""
+                UPDATE importaciones_inventario SET latido_en = UTC_TIMESTAMP()
+                WHERE id IN ({', '.join(['%s'] * len(job_ids))})
+            """, job_ids)
+        cursor.execute("""
+            UPDATE importaciones_inventario
+            SET estado = 'FALLIDO', finalizado_en = UTC_TIMESTAMP(),
+                mensaje_error = 'La importación se interrumpió (reinicio del servidor); vuelva a subir el archivo'
+            WHERE estado IN ('EN_COLA', 'EN_PROCESO')
+              AND COALESCE(latido_en, creado_en) < UTC_TIMESTAMP() - INTERVAL %s SECOND
+        """, (IMPORT_STALE_SECONDS,))
+        if cursor.rowcount:
+            print(f"[INVENTORY_IMPORT] {cursor.rowcount} trabajos huérfanos marcados como fallidos")
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+_monitor_pid = None
+_monitor_lock = threading.Lock()
+
+
+def _monitor_loop():
+    while True:
+        try:
+            _monitor_jobs()
+        except Exception as e:
+            print(f"[INVENTORY_IMPORT] Error en el monitor de trabajos: {str(e)}")
+        time.sleep(IMPORT_HEARTBEAT_SECONDS)
+
+
+def start_import_monitor():
+    """Start the job heartbeat/orphan monitor in this process (once per process)."""
+    global _monitor_pid
+    with _monitor_lock:
+        if _monitor_pid == os.getpid():
+            return
+        _monitor_pid = os.getpid()
+        threading.Thread(target=_monitor_loop, name='inventory-import-monitor', daemon=True).start()
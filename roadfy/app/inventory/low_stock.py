@@ -0,0 +1,208 @@
+"""
+Alertas de stock bajo.
+
+alertas_stock_bajo contiene los items cuya cantidad está por debajo del
+umbral de su negocio (negocios_llantas.umbral_stock_bajo). Cada escritura de
+inventario llama a sync_low_stock() dentro de su transacción con los ids que
+tocó, así que el conjunto siempre está al día y el dashboard y el resumen
+diario lo leen directo, sin recorrer el inventario.
+"""
+from app.db import get_db_connection
+from datetime import datetime, timezone
+
+MAX_THRESHOLD = 999999
+
+
+def _connect():
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    return conn
+
+
+def sync_low_stock(cursor, item_ids):
+    """
+    Recompute low-stock membership for the given items (caller commits).
+
+    Items at or above their business threshold, or deleted, leave the set;
+    items below it are added (keeping their original 'desde') or refreshed.
+    """
+    item_ids = list(item_ids)
+    if not item_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    cursor.execute(f"""
+        INSERT INTO alertas_stock_bajo (item_id, negocio_id, llanta_id, cantidad, umbral, desde)
+        SELECT i.id, i.negocio_id, i.llanta_id, i.cantidad, n.umbral_stock_bajo, UTC_TIMESTAMP()
+        FROM items_inventario i
+        JOIN negocios_llantas n ON n.id = i.negocio_id
+        WHERE i.id IN ({placeholders}) AND i.cantidad < n.umbral_stock_bajo
+        ON DUPLICATE KEY UPDATE cantidad = VALUES(cantidad), umbral = VALUES(umbral)
+    """, item_ids)
+    cursor.execute(f"""
+        DELETE a FROM alertas_stock_bajo a
+        LEFT JOIN items_inventario i ON i.id = a.item_id
+        LEFT JOIN negocios_llantas n ON n.id = i.negocio_id
+        WHERE a.item_id IN ({placeholders})
+          AND (i.id IS NULL OR i.cantidad >= n.umbral_stock_bajo)
+    """, item_ids)
+
+
+def rebuild_business_low_stock(cursor, business_id):
+    """Recompute the whole set of one business (after a threshold change, caller commits)."""
+    cursor.execute("SELECT id FROM items_inventario WHERE negocio_id = %s", (business_id,))
+    item_ids = [row['id'] for row in cursor.fetchall()]
+    for start in range(0, len(item_ids), 1000):
+        sync_low_stock(cursor, item_ids[start:start + 1000])
+
+
+def get_threshold(business_id):
+    """Low-stock threshold of a business, or None if it does not exist."""
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT umbral_stock_bajo FROM negocios_llantas WHERE id = %s", (business_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        return row['umbral_stock_bajo'] if row else None
+    finally:
+        conn.close()
+
+
+def set_threshold(business_id, threshold):
+    """
+    Change a business threshold and rebuild its low-stock set.
+
+    Returns:
+        bool: False if the business does not exist
+    """
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE negocios_llantas SET umbral_stock_bajo = %s WHERE id = %s",
+                       (threshold, business_id))
+        cursor.execute("SELECT id FROM negocios_llantas WHERE id = %s", (business_id,))
+        if not cursor.fetchone():
+            conn.rollback()
+            cursor.close()
+            return False
+        rebuild_business_low_stock(cursor, business_id)
+        conn.commit()
+        cursor.close()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def low_stock_to_dict(alert):
+    """Convert an alertas_stock_bajo row (optionally joined with llantas) to the API shape."""
+    return {
+        'item_id': alert['item_id'],
+        'business_id': alert['negocio_id'],
+        'tire_id': alert['llanta_id'],
+        'brand': alert.get('marca'),
+        'model': alert.get('modelo'),
+        'quantity': alert['cantidad'],
+        'threshold': alert['umbral'],
+        'since': alert['desde'].isoformat() if alert['desde'] else None,
+        'notified_at': alert['notificado_en'].isoformat() if alert['notificado_en'] else None
+    }
+
+
+def get_low_stock(business_id=None, limit=100, skip=0):
+    """
+    Read the low-stock set, lowest quantity first.
+
+    Returns:
+        tuple: (alerts, total)
+    """
+    where = "a.negocio_id = %s" if business_id else "1=1"
+    params = [business_id] if business_id else []
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) AS total FROM alertas_stock_bajo a WHERE {where}", params)
+        total = cursor.fetchone()['total']
+        cursor.execute(f"""
+            SELECT a.item_id, a.negocio_id, a.llanta_id, a.cantidad, a.umbral, a.desde,
+                   a.notificado_en, l.marca, l.modelo
+            FROM alertas_stock_bajo a
+            LEFT JOIN llantas l ON l.id = a.llanta_id
+            WHERE {where}
+            ORDER BY a.cantidad ASC, a.desde ASC
+            LIMIT %s OFFSET %s
+        """, params + [limit, skip])
+        alerts = cursor.fetchall()
+        cursor.close()
+        return alerts, total
+    finally:
+        conn.close()
+
+
+def send_low_stock_digest(dry_run=False):
+    """
+    Email each business admin the current low-stock items of their business.
+
+    All messages go through a single SMTP session. Alerts get notificado_en
+    stamped only when their business's digest reached at least one admin.
+
+    Returns:
+        dict: {'businesses', 'recipients', 'items', 'sent'}
+    """
+    from app.email_service import send_low_stock_digest_emails
+
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT a.item_id, a.negocio_id, a.llanta_id, a.cantidad, a.umbral, a.desde,
+                   a.notificado_en, l.marca, l.modelo, n.nombre AS negocio_nombre
+            FROM alertas_stock_bajo a
+            JOIN negocios_llantas n ON n.id = a.negocio_id
+            LEFT JOIN llantas l ON l.id = a.llanta_id
+            ORDER BY a.negocio_id, a.cantidad
+        """)
+        alerts = cursor.fetchall()
+
+        businesses = {}
+        for alert in alerts:
+            businesses.setdefault(alert['negocio_id'], {
+                'name': alert['negocio_nombre'], 'items': [], 'recipients': []
+            })['items'].append(low_stock_to_dict(alert))
+
+        if businesses:
+            placeholders = ', '.join(['%s'] * len(businesses))
+            cursor.execute(f"""
+                SELECT correo, negocio_id FROM usuarios
+                WHERE rol = 'business-admin' AND negocio_id IN ({placeholders})
+            """, list(businesses))
+            for row in cursor.fetchall():
+                businesses[row['negocio_id']]['recipients'].append(row['correo'])
+
+        digests = [(email, business['name'], business['items'])
+                   for business in businesses.values() for email in business['recipients']]
+        delivered = set() if dry_run else set(send_low_stock_digest_emails(digests))
+
+        if delivered:
+            notified = [alert['item_id'] for alert in alerts
+                        if delivered.intersection(businesses[alert['negocio_id']]['recipients'])]
+            now = datetime.now(timezone.utc)
+            for start in range(0, len(notified), 1000):
+                chunk = notified[start:start + 1000]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"UPDATE alertas_stock_bajo SET notificado_en = %s WHERE item_id IN ({placeholders})",
+                               [now] + chunk)
+            conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    return {
+        'businesses': len(businesses),
+        'recipients': len(digests),
+        'items': len(alerts),
+        'sent': len(delivered)
+    }
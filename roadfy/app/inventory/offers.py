@@ -0,0 +1,207 @@
+"""
+Índice en memoria de las mejores ofertas por llanta.
+
+Para cada llanta guarda sus ofertas con stock disponible (cantidad menos
+reservas, > 0) ordenadas por precio, junto con el nombre y la calificación
+del negocio. Se carga perezosamente desde la BD y se mantiene al día con los
+eventos de inventario de todos los procesos (el hub los reparte, ver
+events.py). La recarga completa de cada OFFER_INDEX_TTL_SECONDS recoge los
+cambios de nombre y calificación de negocios hechos en otros procesos.
+"""
+from app.db import get_db_connection
+from app.config import Config
+from app.inventory.events import hub, INVENTORY_DELETED
+from bisect import insort
+import threading
+import time
+
+
+def _available(item):
+    return int(item['cantidad'] or 0) - int(item.get('cantidad_reservada') or 0)
+
+
+class BestOfferIndex:
+    """Sorted in-stock offers per tire."""
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._offers = {}       # tire_id -> sorted [(price, -rating, item_id, business_id, quantity)]
+        self._items = {}        # item_id -> offer tuple (to find it on update/delete)
+        self._by_business = {}  # business_id -> set of indexed item_ids (to re-rank on rating changes)
+        self._businesses = {}   # business_id -> {'name', 'rating'}
+        self._loaded_at = None
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        conn = get_db_connection()
+        if not conn:
+            raise Exception("No se pudo conectar a la base de datos")
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, nombre, calificacion FROM negocios_llantas")
+            businesses = {row['id']: {'name': row['nombre'], 'rating': float(row['calificacion'] or 0)}
+                          for row in cursor.fetchall()}
+            cursor.execute("""
+                SELECT id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio
+                FROM items_inventario WHERE cantidad - cantidad_reservada > 0
+            """)
+            items = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        offers = {}
+        indexed = {}
+        by_business = {}
+        for item in items:
+            offer = self._offer(item, businesses)
+            offers.setdefault(item['llanta_id'], []).append(offer)
+            indexed[item['id']] = (item['llanta_id'], offer)
+            by_business.setdefault(item['negocio_id'], set()).add(item['id'])
+        for tire_offers in offers.values():
+            tire_offers.sort()
+
+        with self._lock:
+            self._offers, self._items, self._businesses = offers, indexed, businesses
+            self._by_business = by_business
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+            with self._lock:
+                # Another thread may have reloaded while we waited for the lock
+                if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                    self._load()
+
+    def invalidate(self):
+        """Force a full reload on the next read."""
+        with self._lock:
+            self._loaded_at = None
+
+    @staticmethod
+    def _offer(item, businesses):
+        business = businesses.get(item['negocio_id'], {})
+        return (float(item['precio']), -business.get('rating', 0.0), item['id'],
+                item['negocio_id'], _available(item))
+
+    # ------------------------------------------------------------------
+    # Mantenimiento incremental
+    # ------------------------------------------------------------------
+
+    def _remove(self, item_id):
+        current = self._items.pop(item_id, None)
+        if current:
+            tire_id, offer = current
+            tire_offers = self._offers.get(tire_id, [])
+            tire_offers.remove(offer)
+            if not tire_offers:
+                self._offers.pop(tire_id, None)
+            business_items = self._by_business.get(offer[3])
+            if business_items is not None:
+                business_items.discard(item_id)
+                if not business_items:
+                    del self._by_business[offer[3]]
+
+    def apply(self, item=None, previous=None):
+        """Apply one inventory change (row after / row before) to the index."""
+        with self._lock:
+            if self._loaded_at is None:
+                return  # not loaded yet: the first read loads the current state
+            row = item or previous
+            self._remove(row['id'])
+            if item and _available(item) > 0 and item.get('precio') is not None:
+                offer = self._offer(item, self._businesses)
+                insort(self._offers.setdefault(item['llanta_id'], []), offer)
+                self._items[item['id']] = (item['llanta_id'], offer)
+                self._by_business.setdefault(item['negocio_id'], set()).add(item['id'])
+
+    def on_event(self, event):
+        """Inventory hub listener."""
+        if event['type'] == INVENTORY_DELETED:
+            self.apply(previous=event['previous'])
+        else:
+            self.apply(item=event['item'], previous=event['previous'])
+
+    def set_business(self, business_id, name=None, rating=None):
+        """Update a business's name/rating and re-rank its offers."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            business = self._businesses.setdefault(business_id, {'name': None, 'rating': 0.0})
+            if name is not None:
+                business['name'] = name
+            if rating is not None:
+                business['rating'] = float(rating)
+            for item_id in self._by_business.get(business_id, ()):
+                tire_id, offer = self._items[item_id]
+                tire_offers = self._offers[tire_id]
+                tire_offers.remove(offer)
+                updated = (offer[0], -business['rating']) + offer[2:]
+                insort(tire_offers, updated)
+                self._items[item_id] = (tire_id, updated)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def top_offers(self, tire_id, k=5):
+        """
+        Cheapest in-stock offers of a tire (ties: best-rated business first).
+
+        Returns:
+            tuple: (offers, total) with offers as dicts
+        """
+        self._ensure_loaded()
+        with self._lock:
+            tire_offers = self._offers.get(tire_id, [])
+            selected = tire_offers[:k]
+            total = len(tire_offers)
+            businesses = self._businesses
+            return [{
+                'item_id': item_id,
+                'business_id': business_id,
+                'business_name': businesses.get(business_id, {}).get('name'),
+                'business_rating': -neg_rating,
+                'price': price,
+                'quantity': quantity
+            } for price, neg_rating, item_id, business_id, quantity in selected], total
+
+    def best_by_business(self, tire_id):
+        """Cheapest in-stock offer of a tire at each business, as {business_id: offer dict}."""
+        self._ensure_loaded()
+        with self._lock:
+            best = {}
+            for price, neg_rating, item_id, business_id, quantity in self._offers.get(tire_id, []):
+                if business_id not in best:
+                    best[business_id] = {'item_id': item_id, 'price': price, 'quantity': quantity}
+            return best
+
+    def price_range(self, tire_id):
+        """(min_price, max_price) of a tire's in-stock offers, or None."""
+        self._ensure_loaded()
+        with self._lock:
+            tire_offers = self._offers.get(tire_id)
+            if not tire_offers:
+                return None
+            return tire_offers[0][0], tire_offers[-1][0]
+
+    def prices(self, tire_id):
+        """Sorted prices of a tire's in-stock offers (empty tuple without stock)."""
+        self._ensure_loaded()
+        with self._lock:
+            return tuple(offer[0] for offer in self._offers.get(tire_id, ()))
+
+    def all_prices(self):
+        """Sorted in-stock prices of every tire with stock, as {tire_id: tuple}."""
+        self._ensure_loaded()
+        with self._lock:
+            return {tire_id: tuple(offer[0] for offer in tire_offers)
+                    for tire_id, tire_offers in self._offers.items()}
+
+
+offer_index = BestOfferIndex(ttl_seconds=Config.OFFER_INDEX_TTL_SECONDS)
+hub.add_listener(offer_index.on_event)
@@ -0,0 +1,184 @@
+"""
+Historial de precios del inventario.
+
+Cada alta o cambio de precio/cantidad de un item agrega una fila a
+historial_precios y actualiza el agregado diario OHLC de precios_diarios en
+la misma transacción. Los gráficos leen solo los agregados: las series
+diarias salen directo de precios_diarios y las semanales se arman con a lo
+sumo siete días por punto.
+"""
+from app.db import get_db_connection
+from datetime import date, datetime, timedelta, timezone
+
+PRICE_INTERVALS = ('day', 'week')
+DEFAULT_RANGE_DAYS = {'day': 90, 'week': 365}
+MAX_RANGE_DAYS = 3 * 365
+
+
+def record_prices(cursor, items, recorded_at=None):
+    """
+    Append price points for written inventory rows (caller commits).
+
+    Args:
+        cursor: Cursor of the transaction that wrote the rows
+        items: Rows with id, negocio_id, llanta_id, cantidad, precio
+        recorded_at: Timestamp of the change (defaults to now, UTC)
+    """
+    if not items:
+        return
+    recorded_at = recorded_at or datetime.now(timezone.utc)
+    day = recorded_at.astimezone(timezone.utc).date() if recorded_at.tzinfo else recorded_at.date()
+
+    cursor.executemany("""
+        INSERT INTO historial_precios (item_id, negocio_id, llanta_id, precio, cantidad, registrado_en)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, [(item['id'], item['negocio_id'], item['llanta_id'], item['precio'], item['cantidad'], recorded_at)
+          for item in items])
+
+    # MySQL evaluates the assignments left to right, so open/close are compared
+    # against the stored first/last timestamps before those are moved.
+    cursor.executemany("""
+        INSERT INTO precios_diarios
+        (negocio_id, llanta_id, dia, apertura, maximo, minimo, cierre, cantidad_cierre,
+         muestras, primer_registro, ultimo_registro)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            apertura = IF(VALUES(primer_registro) < primer_registro, VALUES(apertura), apertura),
+            primer_registro = LEAST(primer_registro, VALUES(primer_registro)),
+            maximo = GREATEST(maximo, VALUES(maximo)),
+            minimo = LEAST(minimo, VALUES(minimo)),
+            cierre = IF(VALUES(ultimo_registro) >= ultimo_registro, VALUES(cierre), cierre),
+            cantidad_cierre = IF(VALUES(ultimo_registro) >= ultimo_registro,
+                                 VALUES(cantidad_cierre), cantidad_cierre),
+            ultimo_registro = GREATEST(ultimo_registro, VALUES(ultimo_registro)),
+            muestras = muestras + 1
+    """, [(item['negocio_id'], item['llanta_id'], day, item['precio'], item['precio'], item['precio'],
+           item['precio'], item['cantidad'], 1, recorded_at, recorded_at)
+          for item in items])
+
+
+def parse_range(interval, start=None, end=None):
+    """
+    Resolve the requested date range.
+
+    Raises:
+        ValueError: If the interval or the dates are invalid
+    """
+    if interval not in PRICE_INTERVALS:
+        raise ValueError(f"interval must be one of: {', '.join(PRICE_INTERVALS)}")
+    end = date.fromisoformat(end) if end else datetime.now(timezone.utc).date()
+    start = date.fromisoformat(start) if start else end - timedelta(days=DEFAULT_RANGE_DAYS[interval])
+    if start > end:
+        raise ValueError("from must be before to")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise ValueError(f"The range can span at most {MAX_RANGE_DAYS} days")
+    if interval == 'week':
+        start -= timedelta(days=start.weekday())  # whole weeks, starting on Monday
+    return start, end
+
+
+def _point(period, row):
+    return {
+        'period': period.isoformat(),
+        'open': float(row['apertura']),
+        'high': float(row['maximo']),
+        'low': float(row['minimo']),
+        'close': float(row['cierre']),
+        'quantity': row['cantidad_cierre'],
+        'samples': row['muestras']
+    }
+
+
+def _weekly(points):
+    """Roll daily points (in date order) up into ISO weeks."""
+    weeks = []
+    for point in points:
+        day = date.fromisoformat(point['period'])
+        week = (day - timedelta(days=day.weekday())).isoformat()
+        if weeks and weeks[-1]['period'] == week:
+            current = weeks[-1]
+            current['high'] = max(current['high'], point['high'])
+            current['low'] = min(current['low'], point['low'])
+            current['close'] = point['close']
+            current['quantity'] = point['quantity']
+            current['samples'] += point['samples']
+        else:
+            weeks.append(dict(point, period=week))
+    return weeks
+
+
+def get_price_series(tire_id=None, business_id=None, interval='day', start=None, end=None):
+    """
+    OHLC price series per (business, tire), read from the daily aggregates.
+
+    Args:
+        tire_id: Filter by tire (one series per business that sells it)
+        business_id: Filter by business (one series per tire it sells)
+        interval: 'day' or 'week'
+        start, end: Dates (date objects) limiting the range, inclusive
+
+    Returns:
+        list: [{'business_id', 'tire_id', 'points': [...]}]
+    """
+    conditions = ["dia BETWEEN %s AND %s"]
+    params = [start, end]
+    if tire_id:
+        conditions.append("llanta_id = %s")
+        params.append(tire_id)
+    if business_id:
+        conditions.append("negocio_id = %s")
+        params.append(business_id)
+
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT negocio_id, llanta_id, dia, apertura, maximo, minimo, cierre,
+                   cantidad_cierre, muestras
+            FROM precios_diarios
+            WHERE {' AND '.join(conditions)}
+            ORDER BY negocio_id, llanta_id, dia
+        """, params)
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    series = []
+    for row in rows:
+        if not series or (series[-1]['business_id'], series[-1]['tire_id']) != (row['negocio_id'], row['llanta_id']):
+            series.append({'business_id': row['negocio_id'], 'tire_id': row['llanta_id'], 'points': []})
+        series[-1]['points'].append(_point(row['dia'], row))
+
+    if interval == 'week':
+        for entry in series:
+            entry['points'] = _weekly(entry['points'])
+    return series
+
+
+def get_item_price_history(item_id, limit=500):
+    """Raw price points of one inventory item, newest first."""
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT precio, cantidad, registrado_en
+            FROM historial_precios
+            WHERE item_id = %s
+            ORDER BY registrado_en DESC, id DESC
+            LIMIT %s
+        """, (item_id, limit))
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    return [{
+        'price': float(row['precio']),
+        'quantity': row['cantidad'],
+        'recorded_at': row['registrado_en'].isoformat() if row['registrado_en'] else None
+    } for row in rows]
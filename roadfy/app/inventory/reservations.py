@@ -0,0 +1,359 @@
+"""
+Reservas de stock para retiro en tienda.
+
+Una reserva aparta unidades de un item de inventario sin venderlas:
+items_inventario.cantidad_reservada acumula las reservas activas y el stock
+disponible es cantidad - cantidad_reservada. Todas las transiciones usan
+UPDATE condicionales (nada de leer-y-escribir), así que dos clientes no
+pueden reservar la misma unidad:
+
+- reservar:  cantidad_reservada += n   si hay n unidades disponibles
+- liberar:   cantidad_reservada -= n   si la reserva seguía ACTIVA
+- confirmar: cantidad -= n y cantidad_reservada -= n (retiro hecho)
+- expirar:   como liberar, en lotes, desde el barrido en segundo plano
+"""
+from app.db import get_db_connection
+from app.config import Config
+from app.inventory.events import publish, publish_many, INVENTORY_UPDATED
+from app.inventory.price_history import record_prices
+from app.inventory.low_stock import sync_low_stock
+from datetime import datetime, timedelta, timezone
+import os
+import threading
+import time
+import uuid
+
+RESERVATION_ACTIVE = 'ACTIVA'
+RESERVATION_CONFIRMED = 'CONFIRMADA'
+RESERVATION_RELEASED = 'LIBERADA'
+RESERVATION_EXPIRED = 'EXPIRADA'
+
+RESERVATION_COLUMNS = ("id, item_id, negocio_id, llanta_id, usuario_id, cantidad, estado, "
+                       "expira_en, creado_en, actualizado_en")
+ITEM_COLUMNS = "id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en"
+
+
+class ReservationError(Exception):
+    """A reservation operation that cannot be applied (carries the HTTP status)."""
+
+    def __init__(self, message, status=409):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def reservation_to_dict(reservation):
+    """Convert a reservas_inventario row to the API shape."""
+    return {
+        'id': reservation['id'],
+        'item_id': reservation['item_id'],
+        'business_id': reservation['negocio_id'],
+        'tire_id': reservation['llanta_id'],
+        'user_id': reservation['usuario_id'],
+        'quantity': reservation['cantidad'],
+        'status': reservation['estado'],
+        'expires_at': reservation['expira_en'].isoformat() if reservation['expira_en'] else None,
+        'created_at': reservation['creado_en'].isoformat() if reservation['creado_en'] else None,
+        'updated_at': reservation['actualizado_en'].isoformat() if reservation['actualizado_en'] else None
+    }
+
+
+def _connect():
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    return conn
+
+
+def _fetch_items(cursor, item_ids):
+    if not item_ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    cursor.execute(f"SELECT {ITEM_COLUMNS} FROM items_inventario WHERE id IN ({placeholders})",
+                   list(item_ids))
+    return cursor.fetchall()
+
+
+def _log(reservation_id, action, user, old_data=None, new_data=None):
+    from app.governance.audit import log_change
+    log_change(table='reservas_inventario', record_id=reservation_id, action=action,
+               user_id=user.get('id') if user else None,
+               user_email=user.get('correo') if user else None,
+               old_data=old_data, new_data=new_data)
+
+
+def _log_expired(reservations, now):
+    """One audit batch for reservations expired by the sweeper (no user: system change)."""
+    from app.governance.audit import build_change_entry, log_changes
+    log_changes([
+        build_change_entry(table='reservas_inventario', record_id=reservation['id'], action='UPDATE',
+                           old_data=reservation,
+                           new_data=dict(reservation, estado=RESERVATION_EXPIRED, actualizado_en=now))
+        for reservation in reservations
+    ])
+
+
+def create_reservation(item_id, quantity, user, hold_minutes=None):
+    """
+    Hold quantity units of an inventory item for the user.
+
+    Raises:
+        ReservationError: 404 if the item does not exist, 409 if there is not
+        enough available stock
+    """
+    hold_minutes = hold_minutes or Config.RESERVATION_HOLD_MINUTES
+    now = _utcnow()
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE items_inventario
+            SET cantidad_reservada = cantidad_reservada + %s, version = version + 1
+            WHERE id = %s AND cantidad - cantidad_reservada >= %s
+        """, (quantity, item_id, quantity))
+        if cursor.rowcount != 1:
+            conn.rollback()
+            cursor.execute(f"SELECT {ITEM_COLUMNS} FROM items_inventario WHERE id = %s", (item_id,))
+            item = cursor.fetchone()
+            cursor.close()
+            if not item:
+                raise ReservationError('Inventory item not found', 404)
+            raise ReservationError(
+                f"Only {item['cantidad'] - item['cantidad_reservada']} units available", 409)
+
+        item = _fetch_items(cursor, [item_id])[0]
+        reservation = {
+            'id': f"res-{uuid.uuid4().hex[:12]}",
+            'item_id': item_id,
+            'negocio_id': item['negocio_id'],
+            'llanta_id': item['llanta_id'],
+            'usuario_id': user['id'],
+            'cantidad': quantity,
+            'estado': RESERVATION_ACTIVE,
+            'expira_en': now + timedelta(minutes=hold_minutes),
+            'creado_en': now,
+            'actualizado_en': None
+        }
+        cursor.execute(f"""
+            INSERT INTO reservas_inventario ({RESERVATION_COLUMNS})
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, tuple(reservation[column.strip()] for column in RESERVATION_COLUMNS.split(',')))
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    _log(reservation['id'], 'INSERT', user, new_data=reservation)
+    publish(INVENTORY_UPDATED, item=item)
+    return reservation
+
+
+def get_reservation(reservation_id):
+    """Return a reservation row, or None."""
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {RESERVATION_COLUMNS} FROM reservas_inventario WHERE id = %s",
+                       (reservation_id,))
+        reservation = cursor.fetchone()
+        cursor.close()
+        return reservation
+    finally:
+        conn.close()
+
+
+def list_reservations(user_id=None, business_id=None, status=None, limit=100, skip=0):
+    """List reservations, newest first, filtered by user, business and status."""
+    conditions = []
+    params = []
+    if user_id:
+        conditions.append("usuario_id = %s")
+        params.append(user_id)
+    if business_id:
+        conditions.append("negocio_id = %s")
+        params.append(business_id)
+    if status:
+        conditions.append("estado = %s")
+        params.append(status)
+    where = ' AND '.join(conditions) if conditions else '1=1'
+
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {RESERVATION_COLUMNS} FROM reservas_inventario
+            WHERE {where}
+            ORDER BY creado_en DESC
+            LIMIT %s OFFSET %s
+        """, params + [limit, skip])
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+
+def _close_reservation(reservation_id, new_status, user, consume_stock):
+    """
+    Move an ACTIVE reservation to new_status and give back (or consume) its units.
+
+    The reservation row is switched with a conditional UPDATE first, so a
+    reservation can only be closed once even when release, confirm and the
+    sweeper race for it.
+    """
+    now = _utcnow()
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {RESERVATION_COLUMNS} FROM reservas_inventario WHERE id = %s",
+                       (reservation_id,))
+        reservation = cursor.fetchone()
+        if not reservation:
+            raise ReservationError('Reservation not found', 404)
+
+        cursor.execute("""
+            UPDATE reservas_inventario SET estado = %s, actualizado_en = %s
+            WHERE id = %s AND estado = %s
+        """, (new_status, now, reservation_id, RESERVATION_ACTIVE))
+        if cursor.rowcount != 1:
+            conn.rollback()
+            cursor.execute("SELECT estado FROM reservas_inventario WHERE id = %s", (reservation_id,))
+            current = cursor.fetchone()
+            raise ReservationError(f"Reservation is {current['estado'] if current else 'gone'}", 409)
+
+        quantity_change = reservation['cantidad'] if consume_stock else 0
+        cursor.execute("""
+            UPDATE items_inventario
+            SET cantidad = cantidad - %s, cantidad_reservada = cantidad_reservada - %s,
+                version = version + 1
+            WHERE id = %s
+        """, (quantity_change, reservation['cantidad'], reservation['item_id']))
+
+        items = _fetch_items(cursor, [reservation['item_id']])
+        if consume_stock and items:
+            record_prices(cursor, items)
+            sync_low_stock(cursor, [reservation['item_id']])
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    updated = dict(reservation, estado=new_status, actualizado_en=now)
+    _log(reservation_id, 'UPDATE', user, old_data=reservation, new_data=updated)
+    if items:
+        if consume_stock:
+            from app.governance.versioning import create_version
+            create_version(table='items_inventario', record_id=items[0]['id'], full_data=items[0],
+                           user_id=user.get('id') if user else None,
+                           user_email=user.get('correo') if user else None,
+                           change_reason='Retiro de reserva')
+        publish(INVENTORY_UPDATED, item=items[0])
+    return updated
+
+
+def release_reservation(reservation_id, user):
+    """Cancel an active reservation and return its units to available stock."""
+    return _close_reservation(reservation_id, RESERVATION_RELEASED, user, consume_stock=False)
+
+
+def confirm_reservation(reservation_id, user):
+    """Mark an active reservation as picked up: its units leave the inventory."""
+    return _close_reservation(reservation_id, RESERVATION_CONFIRMED, user, consume_stock=True)
+
+
+def expire_reservations(batch_size=None):
+    """
+    Expire overdue active reservations in batches (deadline index order).
+
+    Uses FOR UPDATE SKIP LOCKED so sweepers of several processes split the
+    work instead of blocking each other. Each expiration is audited like a
+    release or confirmation.
+
+    Returns:
+        int: Number of reservations expired
+    """
+    batch_size = batch_size or Config.RESERVATION_SWEEP_BATCH
+    expired = 0
+    while True:
+        now = _utcnow()
+        conn = _connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {RESERVATION_COLUMNS} FROM reservas_inventario
+                WHERE estado = %s AND expira_en <= %s
+                ORDER BY expira_en
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (RESERVATION_ACTIVE, now, batch_size))
+            batch = cursor.fetchall()
+            if not batch:
+                conn.commit()
+                cursor.close()
+                return expired
+
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"""
+                UPDATE reservas_inventario SET estado = %s, actualizado_en = %s
+                WHERE id IN ({placeholders})
+            """, [RESERVATION_EXPIRED, now] + [row['id'] for row in batch])
+
+            released = {}
+            for row in batch:
+                released[row['item_id']] = released.get(row['item_id'], 0) + row['cantidad']
+            cursor.executemany("""
+                UPDATE items_inventario
+                SET cantidad_reservada = cantidad_reservada - %s, version = version + 1
+                WHERE id = %s
+            """, [(quantity, item_id) for item_id, quantity in released.items()])
+            items = _fetch_items(cursor, released.keys())
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        expired += len(batch)
+        _log_expired(batch, now)
+        publish_many([(INVENTORY_UPDATED, item, None) for item in items])
+        if len(batch) < batch_size:
+            return expired
+
+
+_sweeper_pid = None
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_loop():
+    while True:
+        time.sleep(Config.RESERVATION_SWEEP_SECONDS)
+        try:
+            count = expire_reservations()
+            if count:
+                print(f"[RESERVATIONS] {count} reservas expiradas")
+        except Exception as e:
+            print(f"[RESERVATIONS] Error expirando reservas: {str(e)}")
+
+
+def start_reservation_sweeper():
+    """Start the background expiry sweeper in this process (once per process)."""
+    global _sweeper_pid
+    if not Config.RESERVATION_SWEEPER_ENABLED:
+        return
+    with _sweeper_lock:
+        if _sweeper_pid == os.getpid():
+            return
+        _sweeper_pid = os.getpid()
+        threading.Thread(target=_sweep_loop, name='reservation-sweeper', daemon=True).start()
@@ -1,14 +1,34 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from app.db import get_db_connection
+from app.db import get_db_connection, tuple_cursor
 from app.auth import get_current_user, require_super_admin
 from app.utils.validators import validate_text, validate_url, validate_phone
-from app.utils.serializers import business_to_dict
+from app.utils.serializers import business_to_dict, map_rows
+from app.inventory.offers import offer_index
+from app.businesses.detail import get_business_full, invalidate_business
+from app.businesses.geo import geo_index, valid_coordinates
+from app.utils.jsoncodec import dumps
+from app.utils.streaming import LISTING_STREAM_FORMATS, listing_stream_response, stream_mapped_rows
 from datetime import datetime, timezone
-import json
 
 businesses_bp = Blueprint('businesses', __name__)
 
+NEARBY_MAX_RADIUS_KM = 50
+NEARBY_MAX_LIMIT = 100
+
+def _parse_location(location):
+    """
+    Validate a {'lat', 'lng'} body field.
+
+    Returns:
+        tuple: ((lat, lng) or (None, None) to clear it, error message or None)
+    """
+    if location is None:
+        return (None, None), None
+    if not isinstance(location, dict) or not valid_coordinates(location.get('lat'), location.get('lng')):
+        return None, 'location must be {"lat": -90..90, "lng": -180..180}'
+    return (float(location['lat']), float(location['lng'])), None
+
 @businesses_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify database connection."""
@@ -44,38 +64,39 @@ def health_check():
 
 @businesses_bp.route('', methods=['GET'])
 def get_businesses():
-    """Get all businesses. Public endpoint."""
+    """Get all businesses. Public endpoint. ?stream=json|ndjson streams the listing."""
     skip = request.args.get('skip', 0, type=int)
     limit = request.args.get('limit', 100, type=int)
+    stream_format = request.args.get('stream')
+    if stream_format and stream_format not in LISTING_STREAM_FORMATS:
+        return jsonify({'error': f'stream must be one of: {", ".join(LISTING_STREAM_FORMATS)}'}), 400
+    
+    query = """
+        SELECT id, nombre, direccion, telefono, correo, horarios, descripcion, 
+               calificacion, cantidad_resenas, url_mapa_google, url_imagen, 
+               redes_sociales, creado_en, latitud, longitud
+        FROM negocios_llantas
+        ORDER BY creado_en DESC
+        LIMIT %s OFFSET %s
+    """
+    if stream_format:
+        try:
+            return listing_stream_response(stream_mapped_rows(query, (limit, skip), 'business'), stream_format)
+        except Exception as e:
+            print(f"[GET_BUSINESSES] Error: {str(e)}")
+            return jsonify({'error': f'Error al obtener negocios: {str(e)}'}), 500
     
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection error'}), 500
     
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, nombre, direccion, telefono, correo, horarios, descripcion, 
-                   calificacion, cantidad_resenas, url_mapa_google, url_imagen, 
-                   redes_sociales, creado_en
-            FROM negocios_llantas
-            ORDER BY creado_en DESC
-            LIMIT %s OFFSET %s
-        """, (limit, skip))
-        businesses_data = cursor.fetchall()
+        cursor = tuple_cursor(conn)
+        cursor.execute(query, (limit, skip))
+        result = map_rows(cursor, 'business')
         cursor.close()
         conn.close()
         
-        result = []
-        for b in businesses_data:
-            try:
-                business_dict = business_to_dict(b)
-                if business_dict:
-                    result.append(business_dict)
-            except Exception as e:
-                print(f"Error serializando negocio {b.get('id', 'unknown')}: {e}")
-                continue
-        
         return jsonify(result), 200
     except Exception as e:
         cursor.close()
@@ -85,6 +106,39 @@ def get_businesses():
         traceback.print_exc()
         return jsonify({'error': f'Error al obtener negocios: {str(e)}'}), 500
 
+@businesses_bp.route('/nearby', methods=['GET'])
+def get_nearby_businesses():
+    """
+    Businesses around a point, closest first. Public endpoint.
+
+    Query params: lat, lng, radius (km, default 5, max NEARBY_MAX_RADIUS_KM),
+    limit (default 20) and tire_id (only businesses with that tire in stock,
+    each with its cheapest offer).
+    """
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    radius = request.args.get('radius', 5, type=float)
+    limit = request.args.get('limit', 20, type=int)
+    tire_id = request.args.get('tire_id')
+    
+    if lat is None or lng is None or not valid_coordinates(lat, lng):
+        return jsonify({'error': 'lat (-90..90) and lng (-180..180) are required'}), 400
+    if radius is None or not 0 < radius <= NEARBY_MAX_RADIUS_KM:
+        return jsonify({'error': f'radius must be between 0 and {NEARBY_MAX_RADIUS_KM} km'}), 400
+    if not 1 <= limit <= NEARBY_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {NEARBY_MAX_LIMIT}'}), 400
+    if tire_id:
+        from app.utils.validators import validate_id_format
+        if not validate_id_format(tire_id):
+            return jsonify({'error': 'Invalid tire_id format'}), 400
+    
+    try:
+        results, total = geo_index.nearby(lat, lng, radius, limit=limit, tire_id=tire_id)
+        return jsonify({'results': results, 'total': total, 'radius_km': radius}), 200
+    except Exception as e:
+        print(f"[GET_NEARBY_BUSINESSES] Error: {str(e)}")
+        return jsonify({'error': 'Error searching nearby businesses'}), 500
+
 @businesses_bp.route('/<business_id>', methods=['GET'])
 def get_business(business_id):
     """Get a specific business by ID. Public endpoint."""
@@ -97,7 +151,7 @@ def get_business(business_id):
         cursor.execute("""
             SELECT id, nombre, direccion, telefono, correo, horarios, descripcion, 
                    calificacion, cantidad_resenas, url_mapa_google, url_imagen, 
-                   redes_sociales, creado_en
+                   redes_sociales, creado_en, latitud, longitud
             FROM negocios_llantas
             WHERE id = %s
         """, (business_id,))
@@ -121,6 +175,27 @@ def get_business(business_id):
         traceback.print_exc()
         return jsonify({'error': f'Error al obtener negocio: {str(e)}'}), 500
 
+@businesses_bp.route('/<business_id>/full', methods=['GET'])
+def get_business_full_endpoint(business_id):
+    """Get business, in-stock inventory page, review summary and latest reviews in one call. Public endpoint."""
+    page = request.args.get('page', 1, type=int)
+    page_size = request.args.get('page_size', 20, type=int)
+    reviews_limit = request.args.get('reviews_limit', 10, type=int)
+    
+    if page < 1 or not 1 <= page_size <= 100 or not 1 <= reviews_limit <= 50:
+        return jsonify({'error': 'page must be >= 1, page_size 1-100 and reviews_limit 1-50'}), 400
+    
+    try:
+        result = get_business_full(business_id, page, page_size, reviews_limit)
+        if result is None:
+            return jsonify({'error': 'Business not found'}), 404
+        return jsonify(result), 200
+    except Exception as e:
+        print(f"[GET_BUSINESS_FULL] Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'Error al obtener negocio'}), 500
+
 @businesses_bp.route('', methods=['POST'])
 @jwt_required()
 def create_business():
@@ -198,6 +273,10 @@ def create_business():
             if url and not validate_url(url):
                 return jsonify({'error': f'La URL de {platform} debe comenzar con http:// o https://'}), 400
     
+    coordinates, location_error = _parse_location(data.get('location'))
+    if location_error:
+        return jsonify({'error': location_error}), 400
+    
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection error'}), 500
@@ -207,16 +286,16 @@ def create_business():
         new_business_id = business_id or f"biz-{name.lower().replace(' ', '-')}"
         
         # Convert socials to JSON string if dict
-        socials_json = json.dumps(socials) if socials else None
+        socials_json = dumps(socials) if socials else None
         
         cursor.execute("""
             INSERT INTO negocios_llantas (id, nombre, direccion, telefono, correo, horarios, 
                                         descripcion, url_mapa_google, url_imagen, redes_sociales, 
-                                        calificacion, cantidad_resenas, creado_en)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                                        calificacion, cantidad_resenas, creado_en, latitud, longitud)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """, (new_business_id, name, address, phone, contact.get('email'), data.get('hours'),
               data.get('description'), google_maps_url, image_url, socials_json, 0.0, 0,
-              datetime.now(timezone.utc)))
+              datetime.now(timezone.utc), coordinates[0], coordinates[1]))
         
         conn.commit()
         
@@ -246,7 +325,7 @@ def create_business():
         cursor.execute("""
             SELECT id, nombre, direccion, telefono, correo, horarios, descripcion, 
                    calificacion, cantidad_resenas, url_mapa_google, url_imagen, 
-                   redes_sociales, creado_en
+                   redes_sociales, creado_en, latitud, longitud
             FROM negocios_llantas WHERE id = %s
         """, (new_business_id,))
         business_data = cursor.fetchone()
@@ -254,6 +333,9 @@ def create_business():
         cursor.close()
         conn.close()
         
+        if business_data:
+            geo_index.upsert(business_data)
+        
         return jsonify(business_to_dict(business_data)), 201
     
     except Exception as e:
@@ -362,7 +444,7 @@ def update_business(business_id):
                     conn.close()
                     return jsonify({'error': f'La URL de {platform} debe comenzar con http:// o https://'}), 400
             updates.append("redes_sociales = %s")
-            params.append(json.dumps(socials) if socials else None)
+            params.append(dumps(socials) if socials else None)
         
         if 'hours' in data:
             updates.append("horarios = %s")
@@ -372,12 +454,22 @@ def update_business(business_id):
             updates.append("descripcion = %s")
             params.append(data['description'])
         
+        if 'location' in data:
+            coordinates, location_error = _parse_location(data['location'])
+            if location_error:
+                cursor.close()
+                conn.close()
+                return jsonify({'error': location_error}), 400
+            updates.append("latitud = %s")
+            updates.append("longitud = %s")
+            params.extend(coordinates)
+        
         if updates:
             # Get old data before update
             cursor.execute("""
                 SELECT id, nombre, direccion, telefono, correo, horarios, descripcion, 
                        calificacion, cantidad_resenas, url_mapa_google, url_imagen, 
-                       redes_sociales, creado_en
+                       redes_sociales, creado_en, latitud, longitud
                 FROM negocios_llantas WHERE id = %s
             """, (business_id,))
             old_business_data = cursor.fetchone()
@@ -390,7 +482,7 @@ def update_business(business_id):
             cursor.execute("""
                 SELECT id, nombre, direccion, telefono, correo, horarios, descripcion, 
                        calificacion, cantidad_resenas, url_mapa_google, url_imagen, 
-                       redes_sociales, creado_en
+                       redes_sociales, creado_en, latitud, longitud
                 FROM negocios_llantas WHERE id = %s
             """, (business_id,))
             new_business_data = cursor.fetchone()
@@ -408,12 +500,17 @@ def update_business(business_id):
             # Create version
             create_version(table='negocios_llantas', record_id=business_id, full_data=new_business_data,
                           user_id=user_id, user_email=user_email, change_reason='Actualización de negocio')
+            
+            offer_index.set_business(business_id, name=new_business_data['nombre'],
+                                     rating=new_business_data['calificacion'])
+            geo_index.upsert(new_business_data)
+            invalidate_business(business_id)
         
         # Get updated business
         cursor.execute("""
             SELECT id, nombre, direccion, telefono, correo, horarios, descripcion, 
                    calificacion, cantidad_resenas, url_mapa_google, url_imagen, 
-                   redes_sociales, creado_en
+                   redes_sociales, creado_en, latitud, longitud
             FROM negocios_llantas WHERE id = %s
         """, (business_id,))
         business_data = cursor.fetchone()
@@ -453,6 +550,19 @@ def delete_business(business_id):
         cursor.close()
         conn.close()
         
+        # Version tombstone so point-in-time queries see the deletion
+        from app.governance.versioning import create_version
+        current_user = get_current_user()
+        create_version(table='negocios_llantas', record_id=business_id, full_data=None,
+                      user_id=current_user.get('id') if current_user else None,
+                      user_email=current_user.get('correo') if current_user else None,
+                      change_reason='Eliminación de negocio')
+        
+        # Drop its offers from the index: rebuilt on the next read
+        offer_index.invalidate()
+        geo_index.remove(business_id)
+        invalidate_business(business_id)
+        
         return '', 204
     
     except Exception as e:
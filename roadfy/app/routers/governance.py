@@ -1,15 +1,17 @@
 """
 Endpoints para Gobierno de Datos
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required
 from app.db import get_db_connection
 from app.auth import get_current_user, require_super_admin
-from app.governance.audit import get_audit_trail, get_access_logs
+from app.governance.audit import get_audit_trail, get_access_logs, iter_audit_trail, iter_access_logs
 from app.governance.metadata import get_metadata, get_data_quality_report
-from app.governance.versioning import get_versions, get_version
+from app.governance.versioning import get_versions, get_version, get_record_as_of, get_table_as_of, parse_as_of_timestamp
 from app.governance.reports import generate_governance_report, get_audit_summary, get_access_summary
 from app.governance.interactions import log_interaction, get_interaction_summary, get_interactions
+from app.utils.streaming import ndjson_chunks, csv_chunks
+from itertools import chain
 
 governance_bp = Blueprint('governance', __name__)
 
@@ -54,6 +56,79 @@ def get_access_logs_endpoint():
     }), 200
 
 
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', ndjson_chunks),
+    'csv': ('text/csv; charset=utf-8', csv_chunks)
+}
+
+
+def _export_response(rows, export_format, filename, columns):
+    """
+    Respuesta en streaming (NDJSON o CSV) a partir de un generador de filas.
+    columns es la lista que el generador llena con las columnas del resultado
+    (el encabezado del CSV, aunque no haya filas).
+    """
+    mimetype, to_chunks = EXPORT_FORMATS[export_format]
+    
+    # Leer la primera fila antes de responder para que un error de BD sea un 500 y no un archivo truncado
+    try:
+        first = next(rows, None)
+    except Exception as e:
+        print(f"[EXPORT] Error: {str(e)}")
+        return jsonify({'error': 'Error exporting data'}), 500
+    
+    rows = chain([first], rows) if first is not None else iter(())
+    chunks = csv_chunks(rows, fieldnames=columns) if to_chunks is csv_chunks else to_chunks(rows)
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@governance_bp.route('/audit-trail/export', methods=['GET'])
+@jwt_required()
+@require_super_admin
+def export_audit_trail_endpoint():
+    """Exporta el historial de auditoría en streaming (NDJSON o CSV). Solo super-admin."""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    
+    columns = []
+    rows = iter_audit_trail(
+        table=request.args.get('table'),
+        record_id=request.args.get('record_id'),
+        user_id=request.args.get('user_id'),
+        action=request.args.get('action'),
+        limit=request.args.get('limit', type=int),
+        columns=columns
+    )
+    return _export_response(rows, export_format, 'audit-trail', columns)
+
+
+@governance_bp.route('/access-logs/export', methods=['GET'])
+@jwt_required()
+@require_super_admin
+def export_access_logs_endpoint():
+    """Exporta los logs de acceso en streaming (NDJSON o CSV). Solo super-admin."""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    
+    successful = request.args.get('successful')
+    successful = successful.lower() == 'true' if successful else None
+    
+    columns = []
+    rows = iter_access_logs(
+        user_id=request.args.get('user_id'),
+        access_type=request.args.get('access_type'),
+        successful=successful,
+        limit=request.args.get('limit', type=int),
+        columns=columns
+    )
+    return _export_response(rows, export_format, 'access-logs', columns)
+
+
 @governance_bp.route('/metadata/<table>/<record_id>', methods=['GET'])
 @jwt_required()
 @require_super_admin
@@ -106,6 +181,50 @@ def get_version_endpoint(table, record_id, version):
     return jsonify(version_data), 200
 
 
+# Tablas con historial de versiones
+VERSIONED_TABLES = ('llantas', 'negocios_llantas', 'items_inventario', 'usuarios')
+
+
+@governance_bp.route('/as-of', methods=['GET'])
+@jwt_required()
+@require_super_admin
+def get_as_of_endpoint():
+    """Reconstruye un registro o un corte de tabla en un instante. Solo super-admin."""
+    table = request.args.get('table')
+    timestamp = request.args.get('timestamp')
+    record_id = request.args.get('record_id')
+    field = request.args.get('field')
+    value = request.args.get('value')
+    
+    if not table or not timestamp:
+        return jsonify({'error': 'table and timestamp are required'}), 400
+    if table not in VERSIONED_TABLES:
+        return jsonify({'error': f'table must be one of: {", ".join(VERSIONED_TABLES)}'}), 400
+    if field and value is None:
+        return jsonify({'error': 'value is required when filtering by field'}), 400
+    
+    try:
+        as_of = parse_as_of_timestamp(timestamp)
+    except ValueError:
+        return jsonify({'error': 'timestamp must be ISO 8601 (e.g. 2025-01-31T12:00:00Z)'}), 400
+    
+    if record_id:
+        record = get_record_as_of(table, record_id, as_of)
+        if not record or record['data'] is None:
+            return jsonify({'error': 'Record did not exist at that time'}), 404
+        record.update({'table': table, 'timestamp': as_of.isoformat()})
+        return jsonify(record), 200
+    
+    records = get_table_as_of(table, as_of, field, value)
+    
+    return jsonify({
+        'table': table,
+        'timestamp': as_of.isoformat(),
+        'count': len(records),
+        'results': records
+    }), 200
+
+
 @governance_bp.route('/reports/audit-summary', methods=['GET'])
 @jwt_required()
 @require_super_admin
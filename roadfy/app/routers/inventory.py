@@ -1,104 +1,117 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, verify_jwt_in_request
-from app.db import get_db_connection
+from app.db import get_db_connection, tuple_cursor
 from app.auth import get_current_user
 from app.utils.validators import validate_number
-from app.utils.serializers import inventory_to_dict
+from app.utils.serializers import inventory_to_dict, map_rows
+from app.inventory.bulk import upsert_inventory, MAX_QUANTITY, MAX_PRICE
+from app.inventory.imports import start_import, get_import_job, xlsx_supported
+from app.inventory.price_history import (
+    record_prices, parse_range, get_price_series, get_item_price_history
+)
+from app.inventory.low_stock import (
+    sync_low_stock, get_low_stock, low_stock_to_dict, get_threshold, set_threshold, MAX_THRESHOLD
+)
+from app.inventory.events import hub, publish, INVENTORY_CREATED, INVENTORY_UPDATED, INVENTORY_DELETED
+from app.utils.jsoncodec import dumps_api
+from app.utils.streaming import LISTING_STREAM_FORMATS, listing_stream_response, stream_mapped_rows
 from datetime import datetime, timezone
 
 inventory_bp = Blueprint('inventory', __name__)
 
+BULK_MAX_ROWS = 5000
+STREAM_HEARTBEAT_SECONDS = 15
+UPDATE_MAX_ATTEMPTS = 3
+
+def _expected_version(data):
+    """
+    Version the client based its edit on: If-Match header (ETag) or body 'version'.
+    
+    Raises:
+        ValueError: If the value is not a version number
+    """
+    if_match = request.headers.get('If-Match')
+    if if_match and if_match.strip() != '*':
+        value = if_match.strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        return int(value.strip('"'))
+    if data.get('version') is not None:
+        return int(data['version'])
+    return None
+
+def _with_etag(response, item):
+    """Attach the item's version as ETag."""
+    response.headers['ETag'] = f'"{item["version"]}"'
+    return response
+
+INVENTORY_LISTING_COLUMNS = "id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en"
+
 @inventory_bp.route('', methods=['GET'])
 def get_inventory():
-    """Get inventory items. Public when filtering by tire_id or no filters, requires auth for business_id filter."""
+    """
+    Get inventory items. Public when filtering by tire_id or no filters, requires auth for business_id filter.
+    ?stream=json|ndjson streams the listing.
+    """
     try:
         business_id = request.args.get('business_id')
         tire_id = request.args.get('tire_id')
         skip = request.args.get('skip', 0, type=int)
         limit = request.args.get('limit', 100, type=int)
+        stream_format = request.args.get('stream')
+        if stream_format and stream_format not in LISTING_STREAM_FORMATS:
+            return jsonify({'error': f'stream must be one of: {", ".join(LISTING_STREAM_FORMATS)}'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection error'}), 500
+        # If filtering by tire_id, it's a public endpoint
+        if tire_id:
+            where, order, params = "llanta_id = %s AND cantidad - cantidad_reservada > 0", "precio ASC", [tire_id]
         
-        try:
-            cursor = conn.cursor()
-            
-            # If filtering by tire_id, it's a public endpoint
-            if tire_id:
-                cursor.execute("""
-                    SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
-                    FROM items_inventario
-                    WHERE llanta_id = %s AND cantidad > 0
-                    ORDER BY precio ASC
-                    LIMIT %s OFFSET %s
-                """, (tire_id, limit, skip))
-                items_data = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return jsonify([inventory_to_dict(item) for item in items_data]), 200
-            
-            # If no filters, return all public inventory
-            if not business_id:
-                cursor.execute("""
-                    SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
-                    FROM items_inventario
-                    WHERE cantidad > 0
-                    ORDER BY creado_en DESC
-                    LIMIT %s OFFSET %s
-                """, (limit, skip))
-                items_data = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return jsonify([inventory_to_dict(item) for item in items_data]), 200
-            
-            # For business_id filter, require authentication
+        # If no filters, return all public inventory
+        elif not business_id:
+            where, order, params = "cantidad - cantidad_reservada > 0", "creado_en DESC", []
+        
+        # For business_id filter, require authentication
+        else:
             try:
                 verify_jwt_in_request()
                 user = get_current_user()
-                if not user:
-                    cursor.close()
-                    conn.close()
-                    return jsonify({'error': 'Authentication required'}), 401
-                
-                user_role = user.get('role')
-                # Business admins can only see their own business inventory
-                if user_role == 'business-admin':
-                    user_business_id = user.get('business_id')
-                    if user_business_id:
-                        cursor.execute("""
-                            SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
-                            FROM items_inventario
-                            WHERE negocio_id = %s
-                            ORDER BY creado_en DESC
-                            LIMIT %s OFFSET %s
-                        """, (user_business_id, limit, skip))
-                    else:
-                        cursor.close()
-                        conn.close()
-                        return jsonify([]), 200
-                else:
-                    cursor.execute("""
-                        SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
-                        FROM items_inventario
-                        WHERE negocio_id = %s
-                        ORDER BY creado_en DESC
-                        LIMIT %s OFFSET %s
-                    """, (business_id, limit, skip))
-                
-                items_data = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return jsonify([inventory_to_dict(item) for item in items_data]), 200
             except:
-                cursor.close()
-                conn.close()
                 return jsonify({'error': 'Authentication required for this query'}), 401
+            if not user:
+                return jsonify({'error': 'Authentication required'}), 401
+            
+            # Business admins can only see their own business inventory
+            if user.get('role') == 'business-admin':
+                business_id = user.get('business_id')
+                if not business_id:
+                    return jsonify([]), 200
+            where, order, params = "negocio_id = %s", "creado_en DESC", [business_id]
+        
+        query = f"""
+            SELECT {INVENTORY_LISTING_COLUMNS}
+            FROM items_inventario
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT %s OFFSET %s
+        """
+        params.extend([limit, skip])
+        
+        if stream_format:
+            return listing_stream_response(stream_mapped_rows(query, params, 'inventory'), stream_format)
         
-        except Exception as e:
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection error'}), 500
+        
+        try:
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, params)
+            items = map_rows(cursor, 'inventory')
+        finally:
             cursor.close()
             conn.close()
-            raise e
+        
+        return jsonify(items), 200
     
     except Exception as e:
         import traceback
@@ -106,6 +119,168 @@ def get_inventory():
         print(f"Error in get_inventory: {error_msg}")
         return jsonify({'error': str(e), 'details': error_msg}), 500
 
+def _sse_message(event):
+    """Format an inventory event as a Server-Sent Events message."""
+    payload = {
+        'type': event['type'],
+        'item_id': event['item_id'],
+        'business_id': event['business_id'],
+        'tire_id': event['tire_id'],
+        'item': inventory_to_dict(event['item']) if event['item'] else None,
+        'timestamp': event['timestamp']
+    }
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {dumps_api(payload).decode('utf-8')}\n\n"
+
+@inventory_bp.route('/stream', methods=['GET'])
+def stream_inventory():
+    """Server-Sent Events feed of inventory changes, filterable by business_id or tire_id. Public endpoint."""
+    business_id = request.args.get('business_id')
+    tire_id = request.args.get('tire_id')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    subscription, backlog, resume_ok = hub.subscribe(business_id, tire_id, last_event_id)
+    
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            if not resume_ok:
+                # Missed events are gone: the client must reload its data
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield _sse_message(event)
+            while True:
+                events, overflowed = subscription.wait(STREAM_HEARTBEAT_SECONDS)
+                if overflowed:
+                    yield "event: reset\ndata: {}\n\n"
+                if not events:
+                    yield ": heartbeat\n\n"
+                for event in events:
+                    yield _sse_message(event)
+        finally:
+            hub.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    # The generator's finally never runs if the client leaves before the first chunk
+    response.call_on_close(lambda: hub.unsubscribe(subscription))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@inventory_bp.route('/price-history', methods=['GET'])
+def get_price_history():
+    """Daily or weekly OHLC price series for a tire and/or a business. Public endpoint."""
+    tire_id = request.args.get('tire_id')
+    business_id = request.args.get('business_id')
+    interval = request.args.get('interval', 'day')
+    
+    if not tire_id and not business_id:
+        return jsonify({'error': 'tire_id or business_id is required'}), 400
+    
+    try:
+        start, end = parse_range(interval, request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        series = get_price_series(tire_id=tire_id, business_id=business_id,
+                                  interval=interval, start=start, end=end)
+        return jsonify({
+            'interval': interval,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'series': series
+        }), 200
+    except Exception as e:
+        print(f"[GET_PRICE_HISTORY] Error: {str(e)}")
+        return jsonify({'error': 'Error retrieving price history'}), 500
+
+@inventory_bp.route('/<inventory_id>/price-history', methods=['GET'])
+def get_inventory_item_price_history(inventory_id):
+    """Raw price changes of one inventory item, newest first. Public endpoint."""
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+    try:
+        return jsonify({
+            'item_id': inventory_id,
+            'history': get_item_price_history(inventory_id, limit)
+        }), 200
+    except Exception as e:
+        print(f"[GET_ITEM_PRICE_HISTORY] Error: {str(e)}")
+        return jsonify({'error': 'Error retrieving price history'}), 500
+
+def _managed_business_id(user, requested_business_id):
+    """
+    Business whose stock the user may manage.
+    
+    Returns:
+        tuple: (business_id, error response or None). Super admins may pass
+        no business (all businesses).
+    """
+    user_role = user.get('role')
+    if user_role == 'super-admin':
+        return requested_business_id, None
+    if user_role == 'business-admin' and user.get('business_id'):
+        if requested_business_id and requested_business_id != user.get('business_id'):
+            return None, (jsonify({'error': 'You can only manage your own business'}), 403)
+        return user.get('business_id'), None
+    return None, (jsonify({'error': 'Not enough permissions'}), 403)
+
+@inventory_bp.route('/low-stock', methods=['GET'])
+@jwt_required()
+def get_low_stock_items():
+    """Get items below the business low-stock threshold. Business admin or super admin only."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    business_id, error = _managed_business_id(user, request.args.get('business_id'))
+    if error:
+        return error
+    
+    skip = request.args.get('skip', 0, type=int)
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    
+    try:
+        alerts, total = get_low_stock(business_id, limit=limit, skip=skip)
+        return jsonify({
+            'business_id': business_id,
+            'total': total,
+            'items': [low_stock_to_dict(alert) for alert in alerts]
+        }), 200
+    except Exception as e:
+        print(f"[GET_LOW_STOCK] Error: {str(e)}")
+        return jsonify({'error': 'Error retrieving low-stock items'}), 500
+
+@inventory_bp.route('/low-stock/threshold', methods=['GET', 'PUT'])
+@jwt_required()
+def low_stock_threshold():
+    """Get or change the low-stock threshold of a business. Business admin or super admin only."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    business_id, error = _managed_business_id(user, data.get('business_id') or request.args.get('business_id'))
+    if error:
+        return error
+    if not business_id:
+        return jsonify({'error': 'business_id is required'}), 400
+    
+    try:
+        if request.method == 'PUT':
+            threshold = data.get('threshold')
+            if threshold is None or not validate_number(threshold) or int(threshold) > MAX_THRESHOLD:
+                return jsonify({'error': f'threshold must be between 0 and {MAX_THRESHOLD}'}), 400
+            if not set_threshold(business_id, int(threshold)):
+                return jsonify({'error': 'Business not found'}), 404
+        
+        threshold = get_threshold(business_id)
+        if threshold is None:
+            return jsonify({'error': 'Business not found'}), 404
+        return jsonify({'business_id': business_id, 'threshold': threshold}), 200
+    except Exception as e:
+        print(f"[LOW_STOCK_THRESHOLD] Error: {str(e)}")
+        return jsonify({'error': 'Error updating low-stock threshold'}), 500
+
 @inventory_bp.route('/business/<business_id>', methods=['GET'])
 def get_business_inventory(business_id):
     """Get inventory for a specific business. Public endpoint for viewing."""
@@ -114,18 +289,18 @@ def get_business_inventory(business_id):
         return jsonify({'error': 'Database connection error'}), 500
     
     try:
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
         cursor.execute("""
-            SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
+            SELECT id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en
             FROM items_inventario
-            WHERE negocio_id = %s AND cantidad > 0
+            WHERE negocio_id = %s AND cantidad - cantidad_reservada > 0
             ORDER BY creado_en DESC
         """, (business_id,))
-        items_data = cursor.fetchall()
+        items = map_rows(cursor, 'inventory')
         cursor.close()
         conn.close()
         
-        return jsonify([inventory_to_dict(item) for item in items_data]), 200
+        return jsonify(items), 200
     except Exception as e:
         cursor.close()
         conn.close()
@@ -144,7 +319,7 @@ def get_inventory_item(inventory_id):
     try:
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
+            SELECT id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en
             FROM items_inventario
             WHERE id = %s
         """, (inventory_id,))
@@ -155,11 +330,11 @@ def get_inventory_item(inventory_id):
         if not item_data:
             return jsonify({'error': 'Inventory item not found'}), 404
         
-        # Only show if quantity > 0 for public access
-        if item_data['cantidad'] <= 0:
+        # Only show items with available (unreserved) stock for public access
+        if item_data['cantidad'] - item_data['cantidad_reservada'] <= 0:
             return jsonify({'error': 'Inventory item not available'}), 404
         
-        return jsonify(inventory_to_dict(item_data)), 200
+        return _with_etag(jsonify(inventory_to_dict(item_data)), item_data), 200
     
     except Exception as e:
         cursor.close()
@@ -242,10 +417,14 @@ def create_inventory_item():
         
         # Create new item
         item_id = f"inv-{business_id}-{tire_id}"
+        now = datetime.now(timezone.utc)
         cursor.execute("""
             INSERT INTO items_inventario (id, negocio_id, llanta_id, cantidad, precio, creado_en)
             VALUES (%s, %s, %s, %s, %s, %s)
-        """, (item_id, business_id, tire_id, quantity, price, datetime.now(timezone.utc)))
+        """, (item_id, business_id, tire_id, quantity, price, now))
+        record_prices(cursor, [{'id': item_id, 'negocio_id': business_id, 'llanta_id': tire_id,
+                                'cantidad': quantity, 'precio': price}], now)
+        sync_low_stock(cursor, [item_id])
         
         conn.commit()
         
@@ -264,9 +443,14 @@ def create_inventory_item():
         log_change(table='items_inventario', record_id=item_id, action='INSERT',
                   user_id=user_id, user_email=user_email, new_data=new_item_data)
         
+        # Create version
+        from app.governance.versioning import create_version
+        create_version(table='items_inventario', record_id=item_id, full_data=new_item_data,
+                      user_id=user_id, user_email=user_email, change_reason='Creación de item de inventario')
+        
         # Get created item
         cursor.execute("""
-            SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
+            SELECT id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en
             FROM items_inventario WHERE id = %s
         """, (item_id,))
         item_data = cursor.fetchone()
@@ -274,6 +458,8 @@ def create_inventory_item():
         cursor.close()
         conn.close()
         
+        publish(INVENTORY_CREATED, item=item_data)
+        
         return jsonify(inventory_to_dict(item_data)), 201
     
     except Exception as e:
@@ -285,78 +471,270 @@ def create_inventory_item():
         traceback.print_exc()
         return jsonify({'error': 'Error creating inventory item'}), 500
 
-@inventory_bp.route('/<inventory_id>', methods=['PUT'])
+@inventory_bp.route('/bulk', methods=['POST'])
 @jwt_required()
-def update_inventory_item(inventory_id):
-    """Update an inventory item. Business admin or super admin only."""
+def bulk_upsert_inventory():
+    """Create or update many inventory items of one business. Business admin or super admin only."""
     user = get_current_user()
     if not user:
         return jsonify({'error': 'Authentication required'}), 401
     
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Request body is required'}), 400
+    
+    business_id = data.get('business_id')
+    items = data.get('items')
+    
+    if not business_id or not isinstance(items, list):
+        return jsonify({'error': 'Missing required fields: business_id, items (list)'}), 400
+    
+    from app.utils.validators import validate_id_format
+    if not validate_id_format(business_id):
+        return jsonify({'error': 'Invalid business_id format'}), 400
+    
+    if len(items) > BULK_MAX_ROWS:
+        return jsonify({'error': f'A bulk request can contain at most {BULK_MAX_ROWS} items'}), 400
+    
+    # Check permissions
+    user_role = user.get('role')
+    if user_role == 'business-admin':
+        if user.get('business_id') != business_id:
+            return jsonify({'error': 'You can only add inventory to your own business'}), 403
+    elif user_role != 'super-admin':
+        return jsonify({'error': 'Not enough permissions'}), 403
+    
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection error'}), 500
     
     try:
         cursor = conn.cursor()
+        cursor.execute("SELECT id FROM negocios_llantas WHERE id = %s", (business_id,))
+        business_exists = cursor.fetchone()
+        cursor.close()
+        if not business_exists:
+            conn.close()
+            return jsonify({'error': 'Business not found'}), 404
         
-        # Get item
-        cursor.execute("""
-            SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
-            FROM items_inventario WHERE id = %s
-        """, (inventory_id,))
-        item_data = cursor.fetchone()
+        result = upsert_inventory(conn, business_id, items, user=user)
+        conn.close()
         
-        if not item_data:
-            cursor.close()
-            conn.close()
-            return jsonify({'error': 'Inventory item not found'}), 404
+        return jsonify({
+            'received': len(items),
+            'inserted': result['inserted'],
+            'updated': result['updated'],
+            'unchanged': result['unchanged'],
+            'failed': len(result['errors']),
+            'superseded': len(result['superseded']),
+            'errors': result['errors'],
+            'superseded_rows': result['superseded']
+        }), 200
+    
+    except Exception as e:
+        conn.close()
+        print(f"[BULK_UPSERT_INVENTORY] Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'Error upserting inventory items'}), 500
+
+@inventory_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_inventory_file():
+    """Upload a CSV/XLSX stock file to import in the background. Business admin or super admin only."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'A CSV or XLSX file is required (field "file")'}), 400
+    
+    file_format = upload.filename.rsplit('.', 1)[-1].lower() if '.' in upload.filename else ''
+    if file_format not in ('csv', 'xlsx'):
+        return jsonify({'error': 'Only .csv and .xlsx files are supported'}), 400
+    if file_format == 'xlsx' and not xlsx_supported():
+        return jsonify({'error': 'XLSX import is not available on this server, upload a CSV file'}), 400
+    
+    user_role = user.get('role')
+    business_id = request.form.get('business_id')
+    if user_role == 'business-admin':
+        business_id = business_id or user.get('business_id')
+        if user.get('business_id') != business_id:
+            return jsonify({'error': 'You can only import inventory to your own business'}), 403
+    elif user_role != 'super-admin':
+        return jsonify({'error': 'Not enough permissions'}), 403
+    
+    from app.utils.validators import validate_id_format
+    if not business_id or not validate_id_format(business_id):
+        return jsonify({'error': 'Invalid business_id format'}), 400
+    
+    try:
+        job = start_import(upload.stream, file_format, business_id, user)
+        return jsonify(job), 202
+    except Exception as e:
+        print(f"[IMPORT_INVENTORY_FILE] Error: {str(e)}")
+        return jsonify({'error': 'Error starting inventory import'}), 500
+
+@inventory_bp.route('/import/<job_id>', methods=['GET'])
+@jwt_required()
+def get_inventory_import(job_id):
+    """Get the progress of an inventory import job."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    job = get_import_job(job_id)
+    if not job:
+        return jsonify({'error': 'Import job not found'}), 404
+    
+    if user.get('role') != 'super-admin' and user.get('business_id') != job['business_id']:
+        return jsonify({'error': 'Import job not found'}), 404
+    
+    return jsonify(job), 200
+
+@inventory_bp.route('/<inventory_id>', methods=['PUT'])
+@jwt_required()
+def update_inventory_item(inventory_id):
+    """
+    Update an inventory item. Business admin or super admin only.
+    
+    Accepts 'quantity' (absolute) or 'delta' (relative adjustment) and 'price'.
+    Updates are conditional on the row version: with If-Match (or 'version' in
+    the body) a stale version returns 409; without it the server retries the
+    read-modify-write a few times before giving up with 409.
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Request body is required'}), 400
+    
+    try:
+        expected_version = _expected_version(data)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'If-Match/version must be an item version number'}), 400
+    
+    if 'quantity' in data and 'delta' in data:
+        return jsonify({'error': 'Send either quantity or delta, not both'}), 400
+    
+    if 'quantity' in data:
+        quantity = data['quantity']
+        if quantity is None or not validate_number(quantity) or int(quantity) > MAX_QUANTITY:
+            return jsonify({'error': 'La cantidad debe estar entre 0 y 999,999'}), 400
+    
+    delta = None
+    if 'delta' in data:
+        try:
+            delta = int(data['delta'])
+        except (ValueError, TypeError):
+            return jsonify({'error': 'delta debe ser un número entero'}), 400
+    
+    if 'price' in data:
+        price = data['price']
+        if price is None or not validate_number(price, allow_decimal=True) or float(price) > MAX_PRICE:
+            return jsonify({'error': 'El precio debe estar entre 0 y 999,999.99'}), 400
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection error'}), 500
+    
+    try:
+        cursor = conn.cursor()
         
-        # Check permissions
-        user_role = user.get('role')
-        if user_role == 'business-admin':
-            if user.get('business_id') != item_data['negocio_id']:
+        for attempt in range(UPDATE_MAX_ATTEMPTS):
+            # Get item
+            cursor.execute("""
+                SELECT id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en
+                FROM items_inventario WHERE id = %s
+            """, (inventory_id,))
+            item_data = cursor.fetchone()
+            
+            if not item_data:
                 cursor.close()
                 conn.close()
-                return jsonify({'error': 'You can only update inventory for your own business'}), 403
-        
-        data = request.get_json()
-        updates = []
-        params = []
-        
-        if 'quantity' in data:
-            quantity = data['quantity']
-            if quantity is not None and not validate_number(quantity):
+                return jsonify({'error': 'Inventory item not found'}), 404
+            
+            # Check permissions
+            user_role = user.get('role')
+            if user_role == 'business-admin':
+                if user.get('business_id') != item_data['negocio_id']:
+                    cursor.close()
+                    conn.close()
+                    return jsonify({'error': 'You can only update inventory for your own business'}), 403
+            
+            if expected_version is not None and item_data['version'] != expected_version:
+                conn.rollback()
                 cursor.close()
                 conn.close()
-                return jsonify({'error': 'La cantidad debe ser un número positivo o cero'}), 400
-            updates.append("cantidad = %s")
-            params.append(quantity)
-        
-        if 'price' in data:
-            price = data['price']
-            if price is not None and not validate_number(price, allow_decimal=True):
+                return _with_etag(jsonify({
+                    'error': 'Inventory item was modified by another request',
+                    'current': inventory_to_dict(item_data)
+                }), item_data), 409
+            
+            updates = []
+            params = []
+            
+            new_quantity = None
+            if 'quantity' in data:
+                new_quantity = int(data['quantity'])
+            elif delta is not None:
+                new_quantity = item_data['cantidad'] + delta
+            
+            if new_quantity is not None:
+                # Reserved units cannot be removed from the shelf by an edit
+                if new_quantity < item_data['cantidad_reservada'] or new_quantity > MAX_QUANTITY:
+                    conn.rollback()
+                    cursor.close()
+                    conn.close()
+                    return _with_etag(jsonify({
+                        'error': 'The quantity would be out of range or below the reserved units',
+                        'current': inventory_to_dict(item_data)
+                    }), item_data), 409
+                updates.append("cantidad = %s")
+                params.append(new_quantity)
+            
+            if 'price' in data:
+                updates.append("precio = %s")
+                params.append(data['price'])
+            
+            if not updates:
+                break
+            
+            # Compare-and-set on the version read above
+            params.extend([inventory_id, item_data['version']])
+            cursor.execute(f"""
+                UPDATE items_inventario SET {', '.join(updates)}, version = version + 1
+                WHERE id = %s AND version = %s
+            """, params)
+            if cursor.rowcount == 1:
+                break
+            
+            conn.rollback()
+            if expected_version is not None or attempt == UPDATE_MAX_ATTEMPTS - 1:
                 cursor.close()
                 conn.close()
-                return jsonify({'error': 'El precio debe ser un número positivo o cero'}), 400
-            updates.append("precio = %s")
-            params.append(price)
+                return jsonify({'error': 'Inventory item was modified by another request'}), 409
         
         if updates:
-            # Get old data before update
-            old_item_data = item_data.copy()
-            
-            params.append(inventory_id)
-            cursor.execute(f"UPDATE items_inventario SET {', '.join(updates)} WHERE id = %s", params)
-            conn.commit()
+            old_item_data = item_data
             
             # Get new data after update
             cursor.execute("""
-                SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
+                SELECT id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en
                 FROM items_inventario WHERE id = %s
             """, (inventory_id,))
             new_item_data = cursor.fetchone()
             
+            # Price history point in the same transaction as the update
+            if (new_item_data['precio'], new_item_data['cantidad']) != (old_item_data['precio'], old_item_data['cantidad']):
+                record_prices(cursor, [new_item_data])
+            if new_item_data['cantidad'] != old_item_data['cantidad']:
+                sync_low_stock(cursor, [inventory_id])
+            conn.commit()
+            
             # Log change for audit
             from app.governance.audit import log_change
             user_id = user.get('id') if user else None
@@ -366,7 +744,7 @@ def update_inventory_item(inventory_id):
             field_changed = None
             old_value = None
             new_value = None
-            if 'quantity' in data:
+            if 'quantity' in data or delta is not None:
                 field_changed = 'cantidad'
                 old_value = old_item_data.get('cantidad')
                 new_value = new_item_data.get('cantidad')
@@ -380,18 +758,21 @@ def update_inventory_item(inventory_id):
                       old_data=old_item_data, new_data=new_item_data,
                       field_changed=field_changed, old_value=str(old_value) if old_value is not None else None,
                       new_value=str(new_value) if new_value is not None else None)
-        
-        # Get updated item
-        cursor.execute("""
-            SELECT id, negocio_id, llanta_id, cantidad, precio, creado_en
-            FROM items_inventario WHERE id = %s
-        """, (inventory_id,))
-        updated_item = cursor.fetchone()
+            
+            # Create version
+            from app.governance.versioning import create_version
+            create_version(table='items_inventario', record_id=inventory_id, full_data=new_item_data,
+                          user_id=user_id, user_email=user_email, change_reason='Actualización de item de inventario')
+            
+            publish(INVENTORY_UPDATED, item=new_item_data, previous=old_item_data)
+            updated_item = new_item_data
+        else:
+            updated_item = item_data
         
         cursor.close()
         conn.close()
         
-        return jsonify(inventory_to_dict(updated_item)), 200
+        return _with_etag(jsonify(inventory_to_dict(updated_item)), updated_item), 200
     
     except Exception as e:
         conn.rollback()
@@ -419,7 +800,8 @@ def delete_inventory_item(inventory_id):
         
         # Get item
         cursor.execute("""
-            SELECT id, negocio_id FROM items_inventario WHERE id = %s
+            SELECT id, negocio_id, llanta_id, cantidad, cantidad_reservada, precio, version, creado_en
+            FROM items_inventario WHERE id = %s
         """, (inventory_id,))
         item_data = cursor.fetchone()
         
@@ -436,11 +818,39 @@ def delete_inventory_item(inventory_id):
                 conn.close()
                 return jsonify({'error': 'You can only delete inventory for your own business'}), 403
         
-        cursor.execute("DELETE FROM items_inventario WHERE id = %s", (inventory_id,))
+        try:
+            expected_version = _expected_version({})
+        except (ValueError, TypeError):
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'If-Match must be an item version number'}), 400
+        
+        if item_data['cantidad_reservada'] > 0:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Inventory item has active reservations'}), 409
+        
+        # Delete only the version that was checked (and read for the event)
+        cursor.execute("DELETE FROM items_inventario WHERE id = %s AND version = %s",
+                       (inventory_id, item_data['version']))
+        if cursor.rowcount != 1 or (expected_version is not None and expected_version != item_data['version']):
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Inventory item was modified by another request'}), 409
+        sync_low_stock(cursor, [inventory_id])
         conn.commit()
         cursor.close()
         conn.close()
         
+        # Version tombstone so point-in-time queries see the deletion
+        from app.governance.versioning import create_version
+        create_version(table='items_inventario', record_id=inventory_id, full_data=None,
+                      user_id=user.get('id'), user_email=user.get('correo'),
+                      change_reason='Eliminación de item de inventario')
+        
+        publish(INVENTORY_DELETED, previous=item_data)
+        
         return '', 204
     
     except Exception as e:
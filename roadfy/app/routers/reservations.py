@@ -0,0 +1,154 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.auth import get_current_user
+from app.config import Config
+from app.utils.validators import validate_id_format, validate_number
+from app.inventory.reservations import (
+    ReservationError, create_reservation, get_reservation, list_reservations,
+    release_reservation, confirm_reservation, reservation_to_dict,
+    RESERVATION_ACTIVE, RESERVATION_CONFIRMED, RESERVATION_RELEASED, RESERVATION_EXPIRED
+)
+
+reservations_bp = Blueprint('reservations', __name__)
+
+MAX_RESERVATION_QUANTITY = 100
+RESERVATION_STATUSES = (RESERVATION_ACTIVE, RESERVATION_CONFIRMED, RESERVATION_RELEASED, RESERVATION_EXPIRED)
+
+def _manages_business(user, business_id):
+    """Whether the user administers the business (or is super admin)."""
+    if user.get('role') == 'super-admin':
+        return True
+    return user.get('role') == 'business-admin' and user.get('business_id') == business_id
+
+@reservations_bp.route('', methods=['POST'])
+@jwt_required()
+def create_reservation_endpoint():
+    """Hold units of an inventory item for pickup. Any authenticated user."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Request body is required'}), 400
+
+    item_id = data.get('item_id')
+    quantity = data.get('quantity', 1)
+    hold_minutes = data.get('hold_minutes')
+
+    if not item_id or not validate_id_format(item_id):
+        return jsonify({'error': 'Invalid item_id format'}), 400
+    if not validate_number(quantity) or not 1 <= int(quantity) <= MAX_RESERVATION_QUANTITY:
+        return jsonify({'error': f'quantity must be between 1 and {MAX_RESERVATION_QUANTITY}'}), 400
+    if hold_minutes is not None:
+        if not validate_number(hold_minutes) or not 1 <= int(hold_minutes) <= Config.RESERVATION_MAX_HOLD_MINUTES:
+            return jsonify({'error': f'hold_minutes must be between 1 and {Config.RESERVATION_MAX_HOLD_MINUTES}'}), 400
+        hold_minutes = int(hold_minutes)
+
+    try:
+        reservation = create_reservation(item_id, int(quantity), user, hold_minutes)
+        return jsonify(reservation_to_dict(reservation)), 201
+    except ReservationError as e:
+        return jsonify({'error': e.message}), e.status
+    except Exception as e:
+        print(f"[CREATE_RESERVATION] Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'Error creating reservation'}), 500
+
+@reservations_bp.route('', methods=['GET'])
+@jwt_required()
+def get_reservations_endpoint():
+    """
+    List reservations. Customers see their own, business admins those of their
+    business and super admins all (filterable by business_id).
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    status = request.args.get('status')
+    if status and status not in RESERVATION_STATUSES:
+        return jsonify({'error': f'status must be one of: {", ".join(RESERVATION_STATUSES)}'}), 400
+    skip = request.args.get('skip', 0, type=int)
+    limit = min(request.args.get('limit', 100, type=int), 500)
+
+    user_role = user.get('role')
+    if user_role == 'super-admin':
+        filters = {'business_id': request.args.get('business_id')}
+    elif user_role == 'business-admin' and user.get('business_id') and request.args.get('mine') != 'true':
+        filters = {'business_id': user.get('business_id')}
+    else:
+        filters = {'user_id': user.get('id')}
+
+    try:
+        reservations = list_reservations(status=status, limit=limit, skip=skip, **filters)
+        return jsonify([reservation_to_dict(r) for r in reservations]), 200
+    except Exception as e:
+        print(f"[GET_RESERVATIONS] Error: {str(e)}")
+        return jsonify({'error': 'Error retrieving reservations'}), 500
+
+@reservations_bp.route('/<reservation_id>', methods=['GET'])
+@jwt_required()
+def get_reservation_endpoint(reservation_id):
+    """Get a reservation. Its owner or the business admins."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    try:
+        reservation = get_reservation(reservation_id)
+    except Exception as e:
+        print(f"[GET_RESERVATION] Error: {str(e)}")
+        return jsonify({'error': 'Error retrieving reservation'}), 500
+
+    if not reservation or (reservation['usuario_id'] != user.get('id')
+                           and not _manages_business(user, reservation['negocio_id'])):
+        return jsonify({'error': 'Reservation not found'}), 404
+
+    return jsonify(reservation_to_dict(reservation)), 200
+
+@reservations_bp.route('/<reservation_id>/release', methods=['POST'])
+@jwt_required()
+def release_reservation_endpoint(reservation_id):
+    """Cancel an active reservation. Its owner or the business admins."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    try:
+        reservation = get_reservation(reservation_id)
+        if not reservation or (reservation['usuario_id'] != user.get('id')
+                               and not _manages_business(user, reservation['negocio_id'])):
+            return jsonify({'error': 'Reservation not found'}), 404
+
+        released = release_reservation(reservation_id, user)
+        return jsonify(reservation_to_dict(released)), 200
+    except ReservationError as e:
+        return jsonify({'error': e.message}), e.status
+    except Exception as e:
+        print(f"[RELEASE_RESERVATION] Error: {str(e)}")
+        return jsonify({'error': 'Error releasing reservation'}), 500
+
+@reservations_bp.route('/<reservation_id>/confirm', methods=['POST'])
+@jwt_required()
+def confirm_reservation_endpoint(reservation_id):
+    """Mark a reservation as picked up (stock leaves the inventory). Business admin or super admin only."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    try:
+        reservation = get_reservation(reservation_id)
+        if not reservation:
+            return jsonify({'error': 'Reservation not found'}), 404
+        if not _manages_business(user, reservation['negocio_id']):
+            return jsonify({'error': 'Only the business can confirm a pickup'}), 403
+
+        confirmed = confirm_reservation(reservation_id, user)
+        return jsonify(reservation_to_dict(confirmed)), 200
+    except ReservationError as e:
+        return jsonify({'error': e.message}), e.status
+    except Exception as e:
+        print(f"[CONFIRM_RESERVATION] Error: {str(e)}")
+        return jsonify({'error': 'Error confirming reservation'}), 500
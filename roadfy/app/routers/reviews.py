@@ -3,10 +3,18 @@ from flask_jwt_extended import jwt_required
 from app.db import get_db_connection
 from app.auth import get_current_user
 from app.utils.serializers import review_to_dict
+from app.inventory.offers import offer_index
+from app.businesses.detail import invalidate_business
+from app.businesses.geo import geo_index
+from app.businesses.ratings import apply_review
+from app.businesses.reviews import decode_cursor, get_reviews_page
+import pymysql
 from datetime import datetime, timezone
 
 reviews_bp = Blueprint('reviews', __name__)
 
+MAX_REVIEWS_PAGE = 100
+
 @reviews_bp.route('', methods=['GET'])
 def get_reviews():
     """Get reviews, optionally filtered by business_id. Public endpoint."""
@@ -19,31 +27,32 @@ def get_reviews():
 
 @reviews_bp.route('/business/<business_id>', methods=['GET'])
 def get_business_reviews(business_id):
-    """Get all reviews for a business. Public endpoint."""
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Database connection error'}), 500
+    """
+    Get the review summary and one page of reviews of a business, newest first. Public endpoint.
+
+    Query params: limit (1-MAX_REVIEWS_PAGE, default 20) and cursor (next_cursor of the previous page).
+    """
+    limit = request.args.get('limit', 20, type=int)
+    if not 1 <= limit <= MAX_REVIEWS_PAGE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_REVIEWS_PAGE}'}), 400
     
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, negocio_id, usuario_id, nombre_usuario, avatar_usuario, 
-                   calificacion, comentario, creado_en
-            FROM resenas
-            WHERE negocio_id = %s
-            ORDER BY creado_en DESC
-        """, (business_id,))
-        reviews_data = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return jsonify([review_to_dict(r) for r in reviews_data]), 200
+    after = None
+    if request.args.get('cursor'):
+        try:
+            after = decode_cursor(request.args['cursor'])
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
     
+    try:
+        page = get_reviews_page(business_id, limit, after)
     except Exception as e:
-        cursor.close()
-        conn.close()
         print(f"[GET_BUSINESS_REVIEWS] Error: {str(e)}")
         return jsonify({'error': 'Error retrieving reviews'}), 500
+    
+    if page is None:
+        return jsonify({'error': 'Business not found'}), 404
+    
+    return jsonify(page), 200
 
 @reviews_bp.route('', methods=['POST'])
 @jwt_required()
@@ -95,9 +104,9 @@ def create_review():
         cursor = conn.cursor()
         user_id = user.get('id')
         
-        # Check if user already reviewed this business
+        # Check if user already reviewed this business (the table is resenas, without ñ, as in every other query)
         cursor.execute("""
-            SELECT id FROM reseñas
+            SELECT id FROM resenas
             WHERE negocio_id = %s AND usuario_id = %s
         """, (business_id, user_id))
         if cursor.fetchone():
@@ -105,14 +114,20 @@ def create_review():
             conn.close()
             return jsonify({'error': 'You have already reviewed this business'}), 400
         
-        # Create review
+        # Create review (the deterministic id makes a concurrent duplicate fail here)
         review_id = f"review-{business_id}-{user_id}"
-        cursor.execute("""
-            INSERT INTO resenas (id, negocio_id, usuario_id, nombre_usuario, avatar_usuario, 
-                                calificacion, comentario, creado_en)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (review_id, business_id, user_id, user_name, user_avatar, rating, comment,
-              datetime.now(timezone.utc)))
+        try:
+            cursor.execute("""
+                INSERT INTO resenas (id, negocio_id, usuario_id, nombre_usuario, avatar_usuario, 
+                                    calificacion, comentario, creado_en)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, (review_id, business_id, user_id, user_name, user_avatar, rating, comment,
+                  datetime.now(timezone.utc)))
+        except pymysql.err.IntegrityError:
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'You have already reviewed this business'}), 400
         
         # Log change for audit
         from app.governance.audit import log_change
@@ -128,27 +143,16 @@ def create_review():
         log_change(table='resenas', record_id=review_id, action='INSERT',
                   user_id=user_id, user_email=user_email, new_data=new_review_data)
         
-        # Update business rating
-        cursor.execute("""
-            SELECT calificacion, cantidad_resenas
-            FROM negocios_llantas WHERE id = %s
-        """, (business_id,))
-        business_data = cursor.fetchone()
-        
-        if business_data:
-            current_rating = float(business_data['calificacion'] or 0)
-            current_count = int(business_data['cantidad_resenas'] or 0)
-            new_count = current_count + 1
-            new_rating = round((current_rating * current_count + rating) / new_count, 1)
-            
-            cursor.execute("""
-                UPDATE negocios_llantas
-                SET calificacion = %s, cantidad_resenas = %s
-                WHERE id = %s
-            """, (new_rating, new_count, business_id))
+        # Update business rating aggregates in place
+        new_rating = apply_review(cursor, business_id, rating)
         
         conn.commit()
         
+        if new_rating is not None:
+            offer_index.set_business(business_id, rating=new_rating)
+            geo_index.set_rating(business_id, new_rating)
+        invalidate_business(business_id)
+        
         # Get created review
         cursor.execute("""
             SELECT id, negocio_id, usuario_id, nombre_usuario, avatar_usuario, 
@@ -215,8 +219,13 @@ def delete_review(review_id):
         """, (review_id,))
         old_review_data = cursor.fetchone()
         
-        # Delete review
+        # Delete review (only the request that actually removes it adjusts the rating)
         cursor.execute("DELETE FROM resenas WHERE id = %s", (review_id,))
+        if cursor.rowcount != 1:
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Review not found'}), 404
         
         # Log change for audit
         from app.governance.audit import log_change
@@ -225,34 +234,18 @@ def delete_review(review_id):
         log_change(table='resenas', record_id=review_id, action='DELETE',
                   user_id=user_id, user_email=user_email, old_data=old_review_data)
         
-        # Update business rating
-        cursor.execute("""
-            SELECT calificacion, cantidad_resenas
-            FROM negocios_llantas WHERE id = %s
-        """, (business_id,))
-        business_data = cursor.fetchone()
-        
-        if business_data:
-            current_rating = float(business_data['calificacion'] or 0)
-            current_count = int(business_data['cantidad_resenas'] or 0)
-            
-            if current_count > 1:
-                new_count = current_count - 1
-                new_rating = round((current_rating * current_count - rating) / new_count, 1)
-            else:
-                new_rating = 0.0
-                new_count = 0
-            
-            cursor.execute("""
-                UPDATE negocios_llantas
-                SET calificacion = %s, cantidad_resenas = %s
-                WHERE id = %s
-            """, (new_rating, new_count, business_id))
+        # Update business rating aggregates in place
+        new_rating = apply_review(cursor, business_id, rating, sign=-1)
         
         conn.commit()
         cursor.close()
         conn.close()
         
+        if new_rating is not None:
+            offer_index.set_business(business_id, rating=new_rating)
+            geo_index.set_rating(business_id, new_rating)
+        invalidate_business(business_id)
+        
         return '', 204
     
     except Exception as e:
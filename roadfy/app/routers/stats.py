@@ -64,7 +64,21 @@ def get_dashboard_stats():
             total_quantity = sum(item['cantidad'] for item in inventory_data)
             total_value = sum(item['precio'] * item['cantidad'] for item in inventory_data)
             unique_tires = len(set(item['llanta_id'] for item in inventory_data))
-            low_stock_items = [item for item in inventory_data if item['cantidad'] < 10]
+            
+            # Low stock comes from the precomputed set (per-business threshold)
+            cursor.execute("""
+                SELECT COUNT(*) as count FROM alertas_stock_bajo WHERE negocio_id = %s
+            """, (business_id,))
+            low_stock_count = cursor.fetchone()['count']
+            cursor.execute("""
+                SELECT a.item_id, a.llanta_id, a.cantidad, i.precio
+                FROM alertas_stock_bajo a
+                JOIN items_inventario i ON i.id = a.item_id
+                WHERE a.negocio_id = %s
+                ORDER BY a.cantidad ASC
+                LIMIT 10
+            """, (business_id,))
+            low_stock_items = cursor.fetchall()
             
             cursor.close()
             conn.close()
@@ -74,15 +88,15 @@ def get_dashboard_stats():
                 'total_quantity': total_quantity,
                 'total_value': float(total_value),
                 'unique_tires': unique_tires,
-                'low_stock_count': len(low_stock_items),
+                'low_stock_count': low_stock_count,
                 'low_stock_items': [
                     {
-                        'id': f"inv-{business_id}-{item['llanta_id']}",
+                        'id': item['item_id'],
                         'tire_id': item['llanta_id'],
                         'quantity': item['cantidad'],
                         'price': float(item['precio'])
                     }
-                    for item in low_stock_items[:10]
+                    for item in low_stock_items
                 ]
             }), 200
         
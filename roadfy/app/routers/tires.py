@@ -1,15 +1,69 @@
 from flask import Blueprint, request, jsonify
-from app.db import get_db_connection
+from app.db import get_db_connection, tuple_cursor
 from app.auth import require_super_admin
 from app.utils.validators import validate_text, validate_url, validate_number
-from app.utils.serializers import tire_to_dict
+from app.utils.serializers import tire_to_dict, map_rows
+from app.catalog.tire_import import import_tires
+from app.catalog.index import catalog_index, record_catalog_changes
+from app.catalog.sizes import parse_size
+from app.catalog.compare import compare_tires
+from app.inventory.offers import offer_index
+from app.utils.streaming import LISTING_CHUNK_ROWS, LISTING_STREAM_FORMATS, listing_stream_response
 from datetime import datetime, timezone
 
 tires_bp = Blueprint('tires', __name__)
 
+BULK_MAX_TIRES = 10000
+MAX_TOP_OFFERS = 50
+MAX_COMPARE_TIRES = 10
+
+def _add_price_info(tire_dict):
+    """Add minPrice/maxPrice/hasStock from the best-offer index."""
+    price_range = offer_index.price_range(tire_dict['id'])
+    if price_range:
+        tire_dict['minPrice'], tire_dict['maxPrice'] = price_range
+        tire_dict['hasStock'] = True
+    else:
+        tire_dict['minPrice'] = None
+        tire_dict['maxPrice'] = None
+        tire_dict['hasStock'] = False
+    return tire_dict
+
+def _fetch_tires(cursor, tire_ids):
+    """Read the llantas rows of tire_ids with a tuple cursor, mapped and in the given order."""
+    if not tire_ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(tire_ids))
+    cursor.execute(f"""
+        SELECT id, marca, modelo, ancho, relacion_aspecto, diametro, tipo, url_imagen, creado_en
+        FROM llantas WHERE id IN ({placeholders})
+    """, tire_ids)
+    by_id = {tire['id']: tire for tire in map_rows(cursor, 'tire')}
+    return [by_id[tire_id] for tire_id in tire_ids if tire_id in by_id]
+
+def _stream_tires(tire_ids):
+    """Yield the tires of tire_ids with price info, reading LISTING_CHUNK_ROWS rows per query on one connection."""
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+    try:
+        cursor = tuple_cursor(conn)
+        for start in range(0, len(tire_ids), LISTING_CHUNK_ROWS):
+            for tire in _fetch_tires(cursor, tire_ids[start:start + LISTING_CHUNK_ROWS]):
+                yield _add_price_info(tire)
+        cursor.close()
+    finally:
+        conn.close()
+
 @tires_bp.route('', methods=['GET'])
 def get_tires():
-    """Get all tires with optional filters. Public endpoint."""
+    """
+    Get all tires with optional filters, newest first. Public endpoint. ?stream=json|ndjson streams the listing.
+    
+    Filtering and paging run on the in-memory catalog index, synced first with the catalog and stock
+    changes of other workers; only the page's rows are read from the DB.
+    A size in ?search= ("205/55 R16", "205-55-16", ...) filters by size; ?alternatives=true adds equivalent sizes.
+    """
     try:
         brand = request.args.get('brand')
         tire_type = request.args.get('type')
@@ -22,111 +76,37 @@ def get_tires():
         has_stock = request.args.get('has_stock', type=str)
         skip = request.args.get('skip', 0, type=int)
         limit = request.args.get('limit', 100, type=int)
+        size_alternatives = request.args.get('alternatives') == 'true'
+        stream_format = request.args.get('stream')
+        if stream_format and stream_format not in LISTING_STREAM_FORMATS:
+            return jsonify({'error': f'stream must be one of: {", ".join(LISTING_STREAM_FORMATS)}'}), 400
         
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection error'}), 500
         
         try:
+            # The sync and the page read share one connection (and snapshot), so every id of the page has its row
             cursor = conn.cursor()
+            tire_ids, _ = catalog_index.query(
+                search=search, brand=brand, tire_type=tire_type, width=width,
+                aspect_ratio=aspect_ratio, diameter=diameter, min_price=min_price,
+                max_price=max_price, has_stock=has_stock == 'true', size_alternatives=size_alternatives,
+                skip=skip, limit=limit, cursor=cursor
+            )
+            cursor.close()
             
-            # Build query
-            where_clauses = []
-            params = []
-            joins = []
-            
-            # Search filter
-            if search:
-                search_term = f'%{search.lower()}%'
-                where_clauses.append("(LOWER(marca) LIKE %s OR LOWER(modelo) LIKE %s OR LOWER(CONCAT(marca, ' ', modelo)) LIKE %s)")
-                params.extend([search_term, search_term, search_term])
-            
-            # Brand filter
-            elif brand:
-                brand_term = f'%{brand.lower()}%'
-                where_clauses.append("LOWER(marca) LIKE %s")
-                params.append(brand_term)
-            
-            # Type filter
-            if tire_type:
-                where_clauses.append("(tipo = %s OR tipo LIKE %s)")
-                params.extend([tire_type, f'%{tire_type}%'])
-            
-            # Size filters
-            if width:
-                where_clauses.append("ancho = %s")
-                params.append(width)
-            if aspect_ratio:
-                where_clauses.append("relacion_aspecto = %s")
-                params.append(aspect_ratio)
-            if diameter:
-                where_clauses.append("diametro = %s")
-                params.append(diameter)
-            
-            # Price/stock filters (requires join)
-            if min_price is not None or max_price is not None or has_stock == 'true':
-                joins.append("INNER JOIN items_inventario ON llantas.id = items_inventario.llanta_id")
-                if has_stock == 'true':
-                    where_clauses.append("items_inventario.cantidad > 0")
-                if min_price is not None:
-                    where_clauses.append("items_inventario.precio >= %s")
-                    params.append(min_price)
-                if max_price is not None:
-                    where_clauses.append("items_inventario.precio <= %s")
-                    params.append(max_price)
-            
-            # Build final query
-            join_str = ' '.join(joins) if joins else ''
-            where_str = ' AND '.join(where_clauses) if where_clauses else '1=1'
-            
-            query = f"""
-                SELECT DISTINCT llantas.id, llantas.marca, llantas.modelo, llantas.ancho, 
-                       llantas.relacion_aspecto, llantas.diametro, llantas.tipo, llantas.url_imagen, 
-                       llantas.creado_en
-                FROM llantas
-                {join_str}
-                WHERE {where_str}
-                ORDER BY llantas.creado_en DESC
-                LIMIT %s OFFSET %s
-            """
-            params.extend([limit, skip])
-            
-            cursor.execute(query, params)
-            tires_data = cursor.fetchall()
-            
-            # Enrich with price info
-            tires_result = []
-            for tire in tires_data:
-                tire_dict = tire_to_dict(tire)
-                
-                # Get price info from inventory
-                cursor.execute("""
-                    SELECT precio FROM items_inventario 
-                    WHERE llanta_id = %s AND cantidad > 0
-                """, (tire['id'],))
-                prices_data = cursor.fetchall()
-                
-                if prices_data:
-                    prices = [p['precio'] for p in prices_data]
-                    tire_dict['minPrice'] = min(prices)
-                    tire_dict['maxPrice'] = max(prices)
-                    tire_dict['hasStock'] = True
-                else:
-                    tire_dict['minPrice'] = None
-                    tire_dict['maxPrice'] = None
-                    tire_dict['hasStock'] = False
-                
-                tires_result.append(tire_dict)
+            if stream_format:
+                return listing_stream_response(_stream_tires(tire_ids), stream_format)
             
+            cursor = tuple_cursor(conn)
+            # Enrich with price info from the best-offer index (no per-tire queries)
+            tires_result = [_add_price_info(tire) for tire in _fetch_tires(cursor, tire_ids)]
             cursor.close()
+        finally:
             conn.close()
-            
-            return jsonify(tires_result), 200
         
-        except Exception as e:
-            cursor.close()
-            conn.close()
-            raise e
+        return jsonify(tires_result), 200
     
     except Exception as e:
         import traceback
@@ -134,6 +114,40 @@ def get_tires():
         print(f"Error in get_tires: {error_msg}")
         return jsonify({'error': str(e), 'details': error_msg}), 500
 
+@tires_bp.route('/facets', methods=['GET'])
+def get_tire_facets():
+    """Facet counts (brand, type, size, stock) for the current catalog filters. Public endpoint."""
+    try:
+        result = catalog_index.facets(
+            search=request.args.get('search'),
+            brand=request.args.get('brand'),
+            tire_type=request.args.get('type'),
+            width=request.args.get('width', type=int),
+            aspect_ratio=request.args.get('ratio', type=int),
+            diameter=request.args.get('diameter', type=int),
+            min_price=request.args.get('min_price', type=float),
+            max_price=request.args.get('max_price', type=float),
+            has_stock=request.args.get('has_stock') == 'true',
+            size_alternatives=request.args.get('alternatives') == 'true'
+        )
+        return jsonify(result), 200
+    except Exception as e:
+        print(f"[GET_TIRE_FACETS] Error: {str(e)}")
+        return jsonify({'error': 'Error retrieving facets'}), 500
+
+@tires_bp.route('/sizes/<path:size>/alternatives', methods=['GET'])
+def get_size_alternatives(size):
+    """Catalog sizes equivalent to a size in any common notation (e.g. 205/55 R16). Public endpoint."""
+    parsed = parse_size(size)
+    if not parsed:
+        return jsonify({'error': 'Unrecognized tire size (expected e.g. 205/55 R16)'}), 400
+    
+    try:
+        return jsonify(catalog_index.size_alternatives(parsed)), 200
+    except Exception as e:
+        print(f"[GET_SIZE_ALTERNATIVES] Error: {str(e)}")
+        return jsonify({'error': 'Error retrieving size alternatives'}), 500
+
 @tires_bp.route('/<tire_id>', methods=['GET'])
 def get_tire(tire_id):
     """Get a specific tire by ID. Public endpoint."""
@@ -162,6 +176,54 @@ def get_tire(tire_id):
         print(f"[GET_TIRE] Error: {str(e)}")
         return jsonify({'error': 'Error retrieving tire'}), 500
 
+@tires_bp.route('/<tire_id>/offers', methods=['GET'])
+def get_tire_offers(tire_id):
+    """Get the cheapest in-stock offers for a tire. Public endpoint."""
+    top = request.args.get('top', 5, type=int)
+    if top < 1 or top > MAX_TOP_OFFERS:
+        return jsonify({'error': f'top must be between 1 and {MAX_TOP_OFFERS}'}), 400
+    
+    try:
+        offers, total = offer_index.top_offers(tire_id, top)
+        return jsonify({
+            'tire_id': tire_id,
+            'total_offers': total,
+            'offers': offers
+        }), 200
+    except Exception as e:
+        print(f"[GET_TIRE_OFFERS] Error: {str(e)}")
+        return jsonify({'error': 'Error retrieving offers'}), 500
+
+@tires_bp.route('/compare', methods=['POST'])
+def compare_tires_route():
+    """Compare several tires: specs, price range, offer count and cheapest offers of each. Public endpoint."""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    tire_ids = data.get('tire_ids')
+    if not isinstance(tire_ids, list) or not tire_ids:
+        return jsonify({'error': 'Request body must contain a non-empty "tire_ids" list'}), 400
+    
+    from app.utils.validators import validate_id_format
+    if not all(isinstance(tire_id, str) and validate_id_format(tire_id) for tire_id in tire_ids):
+        return jsonify({'error': 'Invalid tire ID format'}), 400
+    tire_ids = list(dict.fromkeys(tire_ids))
+    if len(tire_ids) > MAX_COMPARE_TIRES:
+        return jsonify({'error': f'At most {MAX_COMPARE_TIRES} tires can be compared'}), 400
+    
+    top = data.get('top', 5)
+    if not isinstance(top, int) or isinstance(top, bool) or top < 1 or top > MAX_TOP_OFFERS:
+        return jsonify({'error': f'top must be between 1 and {MAX_TOP_OFFERS}'}), 400
+    skip = data.get('skip', 0)
+    if not isinstance(skip, int) or isinstance(skip, bool) or skip < 0:
+        return jsonify({'error': 'skip must be a non-negative integer'}), 400
+    
+    try:
+        return jsonify(compare_tires(tire_ids, top, skip)), 200
+    except Exception as e:
+        print(f"[COMPARE_TIRES] Error: {str(e)}")
+        return jsonify({'error': 'Error comparing tires'}), 500
+
 @tires_bp.route('', methods=['POST'])
 @require_super_admin
 def create_tire():
@@ -246,6 +308,7 @@ def create_tire():
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """, (new_tire_id, brand, model, width, aspect_ratio, diameter, tire_type, image_url,
               datetime.now(timezone.utc)))
+        record_catalog_changes(cursor, [new_tire_id])
         
         conn.commit()
         
@@ -280,6 +343,7 @@ def create_tire():
             FROM llantas WHERE id = %s
         """, (new_tire_id,))
         tire_data = cursor.fetchone()
+        catalog_index.upsert(tire_data)
         
         cursor.close()
         conn.close()
@@ -295,6 +359,28 @@ def create_tire():
         traceback.print_exc()
         return jsonify({'error': 'Error creating tire'}), 500
 
+@tires_bp.route('/bulk', methods=['POST'])
+@require_super_admin
+def bulk_import_tires():
+    """Import many tires at once, skipping duplicates of the existing catalog. Super admin only."""
+    data = request.get_json()
+    if not data or not isinstance(data.get('tires'), list):
+        return jsonify({'error': 'Request body must contain a "tires" list'}), 400
+    
+    tires = data['tires']
+    if len(tires) > BULK_MAX_TIRES:
+        return jsonify({'error': f'A bulk request can contain at most {BULK_MAX_TIRES} tires'}), 400
+    
+    try:
+        from app.auth import get_current_user
+        report = import_tires(tires, user=get_current_user())
+        return jsonify(report), 200
+    except Exception as e:
+        print(f"[BULK_IMPORT_TIRES] Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'Error importing tires'}), 500
+
 @tires_bp.route('/<tire_id>', methods=['PUT'])
 @require_super_admin
 def update_tire(tire_id):
@@ -385,6 +471,7 @@ def update_tire(tire_id):
             
             params.append(tire_id)
             cursor.execute(f"UPDATE llantas SET {', '.join(updates)} WHERE id = %s", params)
+            record_catalog_changes(cursor, [tire_id])
             conn.commit()
             
             # Get new data after update
@@ -393,6 +480,7 @@ def update_tire(tire_id):
                 FROM llantas WHERE id = %s
             """, (tire_id,))
             new_tire_data = cursor.fetchone()
+            catalog_index.upsert(new_tire_data)
             
             # Log change for audit
             from app.governance.audit import log_change
@@ -448,10 +536,21 @@ def delete_tire(tire_id):
             return jsonify({'error': 'Tire not found'}), 404
         
         cursor.execute("DELETE FROM llantas WHERE id = %s", (tire_id,))
+        record_catalog_changes(cursor, [tire_id])
         conn.commit()
+        catalog_index.remove(tire_id)
         cursor.close()
         conn.close()
         
+        # Version tombstone so point-in-time queries see the deletion
+        from app.governance.versioning import create_version
+        from app.auth import get_current_user
+        current_user = get_current_user()
+        create_version(table='llantas', record_id=tire_id, full_data=None,
+                      user_id=current_user.get('id') if current_user else None,
+                      user_email=current_user.get('correo') if current_user else None,
+                      change_reason='Eliminación de llanta')
+        
         return '', 204
     
     except Exception as e:
@@ -28,7 +28,7 @@ async function loadBusinessDashboard(businessId) {
         const [business, inventory, reviews] = await Promise.all([
             api.get(`/businesses/${businessId}`),
             api.get(`/inventory?business_id=${businessId}`),
-            api.get(`/reviews?business_id=${businessId}`)
+            api.get(`/reviews?business_id=${businessId}&limit=5`)
         ]);
 
         const container = document.getElementById('business-dashboard-container');
@@ -38,7 +38,7 @@ async function loadBusinessDashboard(businessId) {
         const totalStock = inventory.reduce((sum, item) => sum + (item.quantity || 0), 0);
         const totalValue = inventory.reduce((sum, item) => sum + ((item.quantity || 0) * (item.price || 0)), 0);
         const lowStockItems = inventory.filter(item => (item.quantity || 0) < 10).length;
-        const recentReviews = reviews.slice(0, 5);
+        const recentReviews = reviews.items;
 
         container.innerHTML = `
             <div class="card" style="margin-bottom: 2rem;">
@@ -172,7 +172,7 @@ async function loadBusinessDashboard(businessId) {
                 </div>
 
                 <!-- Reseñas Recientes -->
-                ${reviews.length > 0 ? `
+                ${recentReviews.length > 0 ? `
                     <div class="card" style="background: var(--bg-secondary);">
                         <h2 style="margin-bottom: 1rem;"><i class="fas fa-star"></i> Reseñas Recientes</h2>
                         <div>
@@ -193,10 +193,10 @@ async function loadBusinessDashboard(businessId) {
                                     ${review.comment ? `<p style="margin: 0; color: var(--text-secondary);">${review.comment}</p>` : ''}
                                 </div>
                             `).join('')}
-                            ${reviews.length > 5 ? `
+                            ${reviews.has_more ? `
                                 <div style="text-align: center; margin-top: 1rem;">
                                     <a href="/negocios/${businessId}" data-link class="btn btn-secondary">
-                                        Ver todas las reseñas (${reviews.length})
+                                        Ver todas las reseñas (${reviews.summary.count})
                                     </a>
                                 </div>
                             ` : ''}
@@ -38,17 +38,13 @@ async function renderBusinessDetail() {
             entity_id: businessId
         }).catch(() => {}); // No bloquear si falla el tracking
         
-        const [business, reviews] = await Promise.all([
-            api.get(`/businesses/${businessId}`).catch(err => {
-                console.error('Error cargando negocio:', err);
-                throw new Error(`Error al cargar el negocio: ${err.message}`);
-            }),
-            api.get(`/reviews/business/${businessId}`).catch(err => {
-                console.warn('Error cargando reseñas:', err);
-                // Si falla cargar reseñas, continuar con array vacío
-                return [];
-            })
-        ]);
+        // Negocio, inventario y reseñas en una sola llamada
+        const detail = await api.get(`/businesses/${businessId}/full`).catch(err => {
+            console.error('Error cargando negocio:', err);
+            throw new Error(`Error al cargar el negocio: ${err.message}`);
+        });
+        const business = detail.business;
+        const reviews = detail.reviews.items;
         
         const container = document.getElementById('business-detail-container');
         
@@ -128,35 +124,15 @@ async function renderBusinessDetail() {
                     <div id="review-form-container"></div>
                     
                     <div id="reviews-list">
-                        ${reviews.length > 0 ? reviews.map(review => {
-                            const currentUser = auth.getCurrentUser();
-                            const canDelete = currentUser && currentUser.id === review.user_id;
-                            return `
-                            <div style="padding: 1rem; border-bottom: 1px solid var(--border-color);">
-                                <div class="flex-between" style="margin-bottom: 0.5rem;">
-                                    <div>
-                                        <strong>${review.user_name || 'Usuario'}</strong>
-                                        <div class="rating" style="display: inline-block; margin-left: 0.5rem;">
-                                            ${'★'.repeat(review.rating)}${'☆'.repeat(5 - review.rating)}
-                                        </div>
-                                    </div>
-                                    <div style="display: flex; align-items: center; gap: 1rem;">
-                                        <span style="color: var(--text-secondary); font-size: 0.875rem;">
-                                            ${new Date(review.created_at).toLocaleDateString()}
-                                        </span>
-                                        ${canDelete ? `
-                                            <button onclick="deleteReview('${review.id}', '${businessId}')" 
-                                                    class="btn btn-danger" style="padding: 0.25rem 0.5rem; font-size: 0.875rem;">
-                                                <i class="fas fa-trash"></i>
-                                            </button>
-                                        ` : ''}
-                                    </div>
-                                </div>
-                                ${review.comment ? `<p style="color: var(--text-secondary);">${review.comment}</p>` : ''}
-                            </div>
-                        `;
-                        }).join('') : '<p style="text-align: center; color: var(--text-secondary); padding: 2rem;">No hay reseñas aún</p>'}
+                        ${reviews.length > 0 ? reviews.map(review => renderReviewCard(review, businessId)).join('') : '<p style="text-align: center; color: var(--text-secondary); padding: 2rem;">No hay reseñas aún</p>'}
                     </div>
+                    ${detail.reviews.has_more ? `
+                        <div id="reviews-more" style="text-align: center; margin-top: 1rem;">
+                            <button onclick="loadMoreReviews('${businessId}', '${detail.reviews.next_cursor}')" class="btn btn-secondary">
+                                Ver más reseñas
+                            </button>
+                        </div>
+                    ` : ''}
                 </div>
             </div>
         `;
@@ -166,6 +142,35 @@ async function renderBusinessDetail() {
     }
 }
 
+function renderReviewCard(review, businessId) {
+    const currentUser = auth.getCurrentUser();
+    const canDelete = currentUser && currentUser.id === review.user_id;
+    return `
+        <div style="padding: 1rem; border-bottom: 1px solid var(--border-color);">
+            <div class="flex-between" style="margin-bottom: 0.5rem;">
+                <div>
+                    <strong>${review.user_name || 'Usuario'}</strong>
+                    <div class="rating" style="display: inline-block; margin-left: 0.5rem;">
+                        ${'★'.repeat(review.rating)}${'☆'.repeat(5 - review.rating)}
+                    </div>
+                </div>
+                <div style="display: flex; align-items: center; gap: 1rem;">
+                    <span style="color: var(--text-secondary); font-size: 0.875rem;">
+                        ${new Date(review.created_at).toLocaleDateString()}
+                    </span>
+                    ${canDelete ? `
+                        <button onclick="deleteReview('${review.id}', '${businessId}')" 
+                                class="btn btn-danger" style="padding: 0.25rem 0.5rem; font-size: 0.875rem;">
+                            <i class="fas fa-trash"></i>
+                        </button>
+                    ` : ''}
+                </div>
+            </div>
+            ${review.comment ? `<p style="color: var(--text-secondary);">${review.comment}</p>` : ''}
+        </div>
+    `;
+}
+
 // Funciones globales para reseñas
 window.showReviewForm = function(businessId) {
     const container = document.getElementById('review-form-container');
@@ -225,6 +230,22 @@ window.submitReview = async function(event, businessId) {
     }
 }
 
+window.loadMoreReviews = async function(businessId, cursor) {
+    const more = document.getElementById('reviews-more');
+    try {
+        const page = await api.get(`/reviews/business/${businessId}?cursor=${encodeURIComponent(cursor)}`);
+        document.getElementById('reviews-list').insertAdjacentHTML('beforeend',
+            page.items.map(review => renderReviewCard(review, businessId)).join(''));
+        more.innerHTML = page.has_more ? `
+            <button onclick="loadMoreReviews('${businessId}', '${page.next_cursor}')" class="btn btn-secondary">
+                Ver más reseñas
+            </button>
+        ` : '';
+    } catch (error) {
+        alert(`Error: ${error.message}`);
+    }
+}
+
 window.deleteReview = async function(reviewId, businessId) {
     if (!confirm('¿Estás seguro de eliminar esta reseña?')) return;
     
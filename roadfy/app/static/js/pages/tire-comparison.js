@@ -1,4 +1,6 @@
 // Página de Comparación de Precios
+const OFFERS_PAGE_SIZE = 50;  // máximo de ofertas por llamada a /tires/compare
+
 async function renderTireComparison() {
     const params = router.getParams();
     const tireId = params.tire_id;
@@ -39,14 +41,22 @@ async function loadComparison(tireId) {
             entity_id: tireId
         }).catch(() => {}); // No bloquear si falla el tracking
         
-        const [tire, inventory] = await Promise.all([
-            api.get(`/tires/${tireId}`),
-            api.get(`/inventory?tire_id=${tireId}`)
-        ]);
-        
+        // Ficha, ofertas y negocios en una sola llamada
+        const comparison = await api.post('/tires/compare', { tire_ids: [tireId], top: OFFERS_PAGE_SIZE });
+        const tire = comparison.tires[0];
         const container = document.getElementById('comparison-container');
         
-        if (inventory.length === 0) {
+        if (!tire) {
+            container.innerHTML = `
+                <div class="alert alert-error">
+                    <p>La llanta solicitada no existe.</p>
+                </div>
+            `;
+            return;
+        }
+        
+        const offers = tire.topOffers;
+        if (offers.length === 0) {
             container.innerHTML = `
                 <div class="alert alert-info">
                     <p>No hay disponibilidad de esta llanta en ningún negocio en este momento.</p>
@@ -55,20 +65,15 @@ async function loadComparison(tireId) {
             return;
         }
 
-        // Ordenar por precio
-        inventory.sort((a, b) => a.price - b.price);
-        
-        // Obtener información de negocios
-        const businessesData = await Promise.all(
-            inventory.map(item => api.get(`/businesses/${item.business_id}`).catch(() => null))
-        );
-
         container.innerHTML = `
             <div style="margin-bottom: 2rem;">
                 <h2 style="margin-bottom: 1rem;">${tire.brand} ${tire.model}</h2>
                 <p style="color: var(--text-secondary);">
                     ${tire.size.width}/${tire.size.aspectRatio}R${tire.size.diameter} - ${tire.type}
                 </p>
+                <p style="color: var(--text-secondary);">
+                    ${tire.offerCount} ${tire.offerCount === 1 ? 'oferta' : 'ofertas'} desde S/ ${tire.minPrice.toFixed(2)} hasta S/ ${tire.maxPrice.toFixed(2)}
+                </p>
             </div>
 
             <div class="table-container">
@@ -81,35 +86,14 @@ async function loadComparison(tireId) {
                             <th>Acciones</th>
                         </tr>
                     </thead>
-                    <tbody>
-                        ${inventory.map((item, index) => {
-                            const business = businessesData[index];
-                            return `
-                                <tr>
-                                    <td>
-                                        ${business ? `
-                                            <strong>${business.name}</strong><br>
-                                            <small style="color: var(--text-secondary);">${business.address}</small>
-                                        ` : `Negocio #${item.business_id}`}
-                                    </td>
-                                    <td>${item.quantity} unidades</td>
-                                    <td style="font-weight: 600; color: var(--primary-color); font-size: 1.125rem;">
-                                        S/ ${item.price.toFixed(2)}
-                                        ${index === 0 ? '<span style="color: var(--success-color); margin-left: 0.5rem;">⭐ Mejor precio</span>' : ''}
-                                    </td>
-                                    <td>
-                                        ${business ? `
-                                            <a href="/negocios/${item.business_id}" data-link class="btn btn-secondary" style="padding: 0.5rem 1rem;">
-                                                Ver Negocio
-                                            </a>
-                                        ` : ''}
-                                    </td>
-                                </tr>
-                            `;
-                        }).join('')}
+                    <tbody id="offers-list">
+                        ${offers.map((offer, index) => renderOfferRow(offer, index)).join('')}
                     </tbody>
                 </table>
             </div>
+            <div id="offers-more" style="text-align: center; margin-top: 1rem;">
+                ${renderMoreOffersButton(tireId, offers.length, tire.offerCount)}
+            </div>
         `;
     } catch (error) {
         document.getElementById('comparison-container').innerHTML = 
@@ -117,3 +101,47 @@ async function loadComparison(tireId) {
     }
 }
 
+function renderOfferRow(offer, index) {
+    return `
+        <tr>
+            <td>
+                <strong>${offer.business_name}</strong><br>
+                <small style="color: var(--text-secondary);">${offer.business_address || ''}</small>
+            </td>
+            <td>${offer.quantity} unidades</td>
+            <td style="font-weight: 600; color: var(--primary-color); font-size: 1.125rem;">
+                S/ ${offer.price.toFixed(2)}
+                ${index === 0 ? '<span style="color: var(--success-color); margin-left: 0.5rem;">⭐ Mejor precio</span>' : ''}
+            </td>
+            <td>
+                <a href="/negocios/${offer.business_id}" data-link class="btn btn-secondary" style="padding: 0.5rem 1rem;">
+                    Ver Negocio
+                </a>
+            </td>
+        </tr>
+    `;
+}
+
+function renderMoreOffersButton(tireId, shown, total) {
+    if (shown >= total) return '';
+    return `
+        <p style="color: var(--text-secondary); margin-bottom: 0.5rem;">Mostrando ${shown} de ${total} ofertas</p>
+        <button onclick="loadMoreOffers('${tireId}', ${shown})" class="btn btn-secondary">
+            Ver más ofertas
+        </button>
+    `;
+}
+
+window.loadMoreOffers = async function(tireId, skip) {
+    try {
+        const comparison = await api.post('/tires/compare', { tire_ids: [tireId], top: OFFERS_PAGE_SIZE, skip: skip });
+        const tire = comparison.tires[0];
+        if (!tire) return;
+        document.getElementById('offers-list').insertAdjacentHTML('beforeend',
+            tire.topOffers.map((offer, index) => renderOfferRow(offer, skip + index)).join(''));
+        document.getElementById('offers-more').innerHTML =
+            tire.topOffers.length ? renderMoreOffersButton(tireId, skip + tire.topOffers.length, tire.offerCount) : '';
+    } catch (error) {
+        alert(`Error: ${error.message}`);
+    }
+}
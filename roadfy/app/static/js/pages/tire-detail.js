@@ -88,13 +88,13 @@ async function renderTireDetail() {
                                         
                                         // Mensaje pre-formateado para WhatsApp
                                         const tireInfo = `${tire.brand} ${tire.model} - ${tire.size.width}/${tire.size.aspectRatio}R${tire.size.diameter}`;
-                                        const message = encodeURIComponent(`Hola, me interesa la llanta:\n\n${tireInfo}\nTipo: ${tire.type}\nPrecio: S/ ${item.price.toFixed(2)}\nCantidad disponible: ${item.quantity}\n\n¿Tienen disponibilidad?`);
+                                        const message = encodeURIComponent(`Hola, me interesa la llanta:\n\n${tireInfo}\nTipo: ${tire.type}\nPrecio: S/ ${item.price.toFixed(2)}\nCantidad disponible: ${item.available}\n\n¿Tienen disponibilidad?`);
                                         const whatsappLink = whatsappUrl ? `${whatsappUrl.includes('?') ? whatsappUrl.split('?')[0] : whatsappUrl}?text=${message}` : null;
                                         
                                         return `
                                         <tr>
                                             <td>${business.name}</td>
-                                            <td>${item.quantity}</td>
+                                            <td>${item.available}</td>
                                             <td style="font-weight: 600; color: var(--primary-color);">
                                                 S/ ${item.price.toFixed(2)}
                                             </td>
@@ -74,7 +74,7 @@ async function loadMultiComparison(tireIds) {
                 try {
                     const inventory = await api.get(`/inventory?tire_id=${tire.id}`);
                     const prices = inventory
-                        .filter(item => item.quantity > 0)
+                        .filter(item => item.available > 0)
                         .map(item => item.price);
                     
                     return {
@@ -83,8 +83,8 @@ async function loadMultiComparison(tireIds) {
                         minPrice: prices.length > 0 ? Math.min(...prices) : null,
                         maxPrice: prices.length > 0 ? Math.max(...prices) : null,
                         avgPrice: prices.length > 0 ? (prices.reduce((a, b) => a + b, 0) / prices.length) : null,
-                        availability: inventory.filter(item => item.quantity > 0).length,
-                        totalStock: inventory.reduce((sum, item) => sum + item.quantity, 0)
+                        availability: inventory.filter(item => item.available > 0).length,
+                        totalStock: inventory.reduce((sum, item) => sum + item.available, 0)
                     };
                 } catch (e) {
                     return {
@@ -0,0 +1,84 @@
+"""
+Codificación JSON de la app: orjson si está instalado, json de la stdlib si no.
+
+Dos semánticas:
+  - API (dumps_api / FastJSONProvider): la misma salida que el proveedor por
+    defecto de Flask (datetime/date como fecha HTTP RFC 822, Decimal como
+    str), así los endpoints que devuelven filas crudas de la BD no cambian de
+    formato. Los serializadores entregan sus fechas ya en ISO 8601.
+  - Almacenamiento (dumps / loads): la de json.dumps(default=str) que usan los
+    blobs de auditoría, versionado y gobernanza (Decimal y datetime como str),
+    para que lo ya guardado siga comparándose igual.
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _api_default(value):
+    if isinstance(value, (datetime, date)):
+        return http_date(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, time):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps_api(value):
+    return json.dumps(value, default=_api_default, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+if orjson is not None:
+    _API_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    _STORAGE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps_api(value):
+        """Encode an API payload to UTF-8 bytes."""
+        return orjson.dumps(value, default=_api_default, option=_API_OPTIONS)
+
+    def dumps(value):
+        """Encode a stored blob (Decimal/datetime as str) to text."""
+        return orjson.dumps(value, default=str, option=_STORAGE_OPTIONS).decode('utf-8')
+
+    def loads(value):
+        """Parse JSON text or bytes."""
+        return orjson.loads(value)
+else:
+    dumps_api = _stdlib_dumps_api
+
+    def dumps(value):
+        """Encode a stored blob (Decimal/datetime as str) to text."""
+        return json.dumps(value, default=str)
+
+    def loads(value):
+        """Parse JSON text or bytes."""
+        return json.loads(value)
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by dumps_api (used by jsonify and request.get_json)."""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps_api(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_api(obj) + b'\n', mimetype=self.mimetype)
@@ -1,6 +1,8 @@
 """
 Utilidades de serialización para convertir datos de BD a diccionarios.
 """
+import functools
+import re
 
 
 def tire_to_dict(tire):
@@ -59,6 +61,7 @@ def business_to_dict(business):
             'googleMapsEmbedUrl': business.get('url_mapa_google') or business.get('google_maps_embed_url'),
             'imageUrl': business.get('url_imagen') or business.get('image_url'),
             'socials': business.get('redes_sociales') or business.get('socials'),
+            'location': {'lat': float(business['latitud']), 'lng': float(business['longitud'])} if business.get('latitud') is not None and business.get('longitud') is not None else None,
             'created_at': business.get('creado_en').isoformat() if business.get('creado_en') else None
         }
     else:
@@ -78,6 +81,7 @@ def business_to_dict(business):
             'googleMapsEmbedUrl': getattr(business, 'url_mapa_google', None) or getattr(business, 'google_maps_embed_url', None),
             'imageUrl': getattr(business, 'url_imagen', None) or getattr(business, 'image_url', None),
             'socials': getattr(business, 'redes_sociales', None) or getattr(business, 'socials', None),
+            'location': {'lat': float(business.latitud), 'lng': float(business.longitud)} if getattr(business, 'latitud', None) is not None and getattr(business, 'longitud', None) is not None else None,
             'created_at': getattr(business, 'creado_en', None).isoformat() if getattr(business, 'creado_en', None) else None
         }
 
@@ -112,7 +116,10 @@ def inventory_to_dict(item):
             'business_id': item.get('negocio_id') or item.get('business_id'),
             'tire_id': item.get('llanta_id') or item.get('tire_id'),
             'quantity': item.get('cantidad') or item.get('quantity', 0),
+            'reserved': item.get('cantidad_reservada') or 0,
+            'available': (item.get('cantidad') or item.get('quantity', 0)) - (item.get('cantidad_reservada') or 0),
             'price': float(item.get('precio') or item.get('price', 0)),
+            'version': item.get('version'),
             'created_at': item.get('creado_en').isoformat() if item.get('creado_en') else None
         }
     else:
@@ -121,7 +128,10 @@ def inventory_to_dict(item):
             'business_id': getattr(item, 'negocio_id', None) or getattr(item, 'business_id', None),
             'tire_id': getattr(item, 'llanta_id', None) or getattr(item, 'tire_id', None),
             'quantity': getattr(item, 'cantidad', 0) or getattr(item, 'quantity', 0),
+            'reserved': getattr(item, 'cantidad_reservada', 0) or 0,
+            'available': (getattr(item, 'cantidad', 0) or getattr(item, 'quantity', 0)) - (getattr(item, 'cantidad_reservada', 0) or 0),
             'price': float(getattr(item, 'precio', 0) or getattr(item, 'price', 0)),
+            'version': getattr(item, 'version', None),
             'created_at': getattr(item, 'creado_en', None).isoformat() if getattr(item, 'creado_en', None) else None
         }
 
@@ -150,3 +160,147 @@ def review_to_dict(review):
             'comment': getattr(review, 'comentario', '') or getattr(review, 'comment', ''),
             'created_at': getattr(review, 'creado_en', None).isoformat() if getattr(review, 'creado_en', None) else None
         }
+
+
+# ----------------------------------------------------------------------
+# Mapeadores compilados para filas en tupla
+# ----------------------------------------------------------------------
+#
+# Las funciones *_to_dict aceptan cualquier fila (dict u objeto) y resuelven
+# cada campo con isinstance/get/fallbacks por fila. Para listados se compila
+# una vez por forma de consulta (tipo + columnas del cursor) una función que
+# arma el dict directo por índice sobre filas en tupla (cursor no-dict, ver
+# app.db.tuple_cursor), con la misma salida que la función equivalente.
+#
+# Cada campo es una expresión donde $columna es el valor de esa columna (o de
+# uno de sus alias); si la consulta no la trae vale None. Las fechas salen
+# siempre como texto ISO 8601 (igual que el .isoformat() de *_to_dict), sea
+# cual sea el backend de jsoncodec.
+
+ROW_ALIASES = {
+    'marca': ('marca', 'brand'),
+    'modelo': ('modelo', 'model'),
+    'ancho': ('ancho', 'width'),
+    'relacion_aspecto': ('relacion_aspecto', 'aspect_ratio'),
+    'diametro': ('diametro', 'diameter'),
+    'tipo': ('tipo', 'type'),
+    'url_imagen': ('url_imagen', 'image_url'),
+    'nombre': ('nombre', 'name'),
+    'direccion': ('direccion', 'address'),
+    'telefono': ('telefono', 'phone'),
+    'correo': ('correo', 'email'),
+    'horarios': ('horarios', 'hours'),
+    'calificacion': ('calificacion', 'rating'),
+    'cantidad_resenas': ('cantidad_resenas', 'review_count'),
+    'descripcion': ('descripcion', 'description'),
+    'url_mapa_google': ('url_mapa_google', 'google_maps_embed_url'),
+    'redes_sociales': ('redes_sociales', 'socials'),
+    'negocio_id': ('negocio_id', 'business_id'),
+    'llanta_id': ('llanta_id', 'tire_id'),
+    'usuario_id': ('usuario_id', 'user_id'),
+    'cantidad': ('cantidad', 'quantity'),
+    'precio': ('precio', 'price'),
+    'nombre_usuario': ('nombre_usuario', 'user_name'),
+    'avatar_usuario': ('avatar_usuario', 'user_avatar'),
+    'comentario': ('comentario', 'comment'),
+}
+
+_ISO = "$creado_en.isoformat() if $creado_en else None"
+
+ROW_SHAPES = {
+    'tire': (
+        ('id', "$id"),
+        ('brand', "$marca or ''"),
+        ('model', "$modelo or ''"),
+        ('size', (
+            ('width', "$ancho or None"),
+            ('aspectRatio', "$relacion_aspecto or None"),
+            ('diameter', "$diametro or None"),
+        )),
+        ('type', "$tipo or ''"),
+        ('imageUrl', "$url_imagen or None"),
+        ('created_at', _ISO),
+    ),
+    'business': (
+        ('id', "$id"),
+        ('name', "$nombre or ''"),
+        ('address', "$direccion or ''"),
+        ('contact', (
+            ('phone', "$telefono or ''"),
+            ('email', "$correo or ''"),
+        )),
+        ('hours', "$horarios or ''"),
+        ('rating', "float($calificacion or 0.0)"),
+        ('reviewCount', "int($cantidad_resenas or 0)"),
+        ('description', "$descripcion or None"),
+        ('googleMapsEmbedUrl', "$url_mapa_google or None"),
+        ('imageUrl', "$url_imagen or None"),
+        ('socials', "$redes_sociales or None"),
+        ('location', "{'lat': float($latitud), 'lng': float($longitud)} "
+                     "if $latitud is not None and $longitud is not None else None"),
+        ('created_at', _ISO),
+    ),
+    'inventory': (
+        ('id', "$id"),
+        ('business_id', "$negocio_id or None"),
+        ('tire_id', "$llanta_id or None"),
+        ('quantity', "$cantidad or 0"),
+        ('reserved', "$cantidad_reservada or 0"),
+        ('available', "($cantidad or 0) - ($cantidad_reservada or 0)"),
+        ('price', "float($precio or 0)"),
+        ('version', "$version"),
+        ('created_at', _ISO),
+    ),
+    'review': (
+        ('id', "$id"),
+        ('business_id', "$negocio_id or None"),
+        ('user_id', "$usuario_id or None"),
+        ('user_name', "$nombre_usuario or ''"),
+        ('user_avatar', "$avatar_usuario or None"),
+        ('rating', "int($calificacion or 0)"),
+        ('comment', "$comentario or ''"),
+        ('created_at', _ISO),
+    ),
+}
+
+_PLACEHOLDER = re.compile(r'\$(\w+)')
+
+
+def _shape_source(shape, positions):
+    def column(match):
+        for alias in ROW_ALIASES.get(match.group(1), (match.group(1),)):
+            if alias in positions:
+                return f"row[{positions[alias]}]"
+        return "None"
+
+    fields = []
+    for key, spec in shape:
+        if isinstance(spec, tuple):
+            fields.append(f"{key!r}: {_shape_source(spec, positions)}")
+        else:
+            fields.append(f"{key!r}: ({_PLACEHOLDER.sub(column, spec)})")
+    return '{' + ', '.join(fields) + '}'
+
+
+@functools.lru_cache(maxsize=256)
+def compile_row_mapper(kind, columns):
+    """
+    Build (once per kind + column tuple) a function mapping a tuple row to the API dict.
+
+    Args:
+        kind: 'tire', 'business', 'inventory' or 'review'
+        columns: Column names in cursor order (tuple)
+    """
+    positions = {}
+    for index, name in enumerate(columns):
+        positions.setdefault(name, index)
+    source = f"def map_row(row):\n    return {_shape_source(ROW_SHAPES[kind], positions)}\n"
+    namespace = {'float': float, 'int': int}
+    exec(compile(source, f'<row mapper {kind}>', 'exec'), namespace)
+    return namespace['map_row']
+
+
+def map_rows(cursor, kind):
+    """Fetch every remaining row of a tuple cursor and map it with the compiled mapper."""
+    mapper = compile_row_mapper(kind, tuple(column[0] for column in cursor.description))
+    return [mapper(row) for row in cursor.fetchall()]
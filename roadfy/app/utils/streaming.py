@@ -0,0 +1,130 @@
+"""
+Utilidades para respuestas en streaming (NDJSON / CSV / arreglo JSON).
+
+Los listados grandes (llantas, negocios, inventario) pueden pedirse con
+?stream=json o ?stream=ndjson: las filas se leen con un cursor del lado del
+servidor (SSCursor), se mapean con el mapeador compilado del listado y se
+envían por bloques, así la memoria y el tiempo al primer byte no dependen del
+tamaño del resultado.
+"""
+from flask import Response, stream_with_context
+from app.db import get_db_connection
+from app.utils.jsoncodec import dumps, dumps_api
+from app.utils.serializers import compile_row_mapper
+from itertools import chain
+import csv
+import io
+import pymysql
+
+LISTING_STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson'
+}
+LISTING_CHUNK_ROWS = 200
+
+
+def ndjson_chunks(rows, chunk_size=500):
+    """Convierte un iterable de dicts en bloques de texto NDJSON (una fila por línea)."""
+    buffer = []
+    for row in rows:
+        buffer.append(dumps(row))
+        if len(buffer) >= chunk_size:
+            yield '\n'.join(buffer) + '\n'
+            buffer = []
+    if buffer:
+        yield '\n'.join(buffer) + '\n'
+
+
+def csv_chunks(rows, fieldnames=None, chunk_size=500):
+    """
+    Convierte un iterable de dicts en bloques de texto CSV.
+    El encabezado se toma de fieldnames (así un resultado vacío también lo
+    lleva) o, sin él, de las claves de la primera fila.
+    """
+    output = io.StringIO()
+    writer = None
+    if fieldnames:
+        writer = csv.DictWriter(output, fieldnames=list(fieldnames), extrasaction='ignore')
+        writer.writeheader()
+    pending = 0
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(output, fieldnames=list(row.keys()), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_size:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+            pending = 0
+    if output.tell():
+        yield output.getvalue()
+
+
+def stream_mapped_rows(query, params, kind):
+    """
+    Run a query with an unbuffered tuple cursor and yield each row mapped to its
+    API dict (see serializers.compile_row_mapper). The connection is closed when
+    the generator is exhausted or discarded.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise Exception("No se pudo conectar a la base de datos")
+
+    cursor = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        # El servidor espera al cliente mientras este consume el resultado
+        cursor.execute("SET SESSION net_write_timeout = 600")
+        cursor.execute(query, params)
+        mapper = compile_row_mapper(kind, tuple(column[0] for column in cursor.description))
+        for row in cursor:
+            yield mapper(row)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def json_array_chunks(rows, chunk_size=LISTING_CHUNK_ROWS):
+    """Encode an iterable of dicts as a JSON array, in byte chunks of chunk_size rows."""
+    buffer = [b'[']
+    separator = b''
+    pending = 0
+    for row in rows:
+        buffer.append(separator)
+        buffer.append(dumps_api(row))
+        separator = b','
+        pending += 1
+        if pending >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            pending = 0
+    buffer.append(b']\n')
+    yield b''.join(buffer)
+
+
+def ndjson_api_chunks(rows, chunk_size=LISTING_CHUNK_ROWS):
+    """Encode an iterable of dicts as NDJSON with the API encoder, in byte chunks."""
+    buffer = []
+    for row in rows:
+        buffer.append(dumps_api(row))
+        if len(buffer) >= chunk_size:
+            yield b'\n'.join(buffer) + b'\n'
+            buffer = []
+    if buffer:
+        yield b'\n'.join(buffer) + b'\n'
+
+
+def listing_stream_response(rows, stream_format):
+    """
+    Streamed response for a listing ('json' array or 'ndjson').
+
+    The first row is read before responding so a database error surfaces as an
+    exception (and a 500) instead of a truncated body.
+    """
+    first = next(rows, None)
+    rows = chain([first], rows) if first is not None else iter(())
+    to_chunks = json_array_chunks if stream_format == 'json' else ndjson_api_chunks
+    response = Response(stream_with_context(to_chunks(rows)), mimetype=LISTING_STREAM_FORMATS[stream_format])
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,121 @@
+"""
+Microbenchmark de las facetas del catálogo (GET /api/tires/facets).
+Uso: python scripts/bench_facets.py [--tires 20000] [--repeat 20]
+
+No usa la base de datos: carga el índice columnar con un catálogo sintético,
+compara cada combinación de filtros con un cálculo ingenuo (un filtrado por
+faceta) y reporta el tiempo de facets() (mejor y mediana de --repeat corridas).
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.catalog.index import CatalogIndex
+
+BRANDS = ('Michelin', 'Bridgestone', 'Goodyear', 'Pirelli', 'Continental', 'Hankook', 'Yokohama', 'Kumho')
+TYPES = ('Auto', 'SUV', 'Camioneta', 'Moto', 'Camión')
+WIDTHS = (155, 165, 175, 185, 195, 205, 215, 225, 235, 245, 255, 265)
+RATIOS = (40, 45, 50, 55, 60, 65, 70, 75)
+DIAMETERS = (13, 14, 15, 16, 17, 18, 19, 20)
+
+FILTER_SETS = (
+    {},
+    {'brand': 'mich'},
+    {'tire_type': 'suv', 'diameter': 17},
+    {'width': 205, 'aspect_ratio': 55, 'diameter': 16},
+    {'has_stock': True, 'min_price': 200.0, 'max_price': 400.0},
+    {'search': 'pirelli p', 'has_stock': True, 'width': 225},
+)
+
+
+def synthetic_catalog(count, seed=7):
+    rng = random.Random(seed)
+    tires, prices = [], {}
+    for i in range(count):
+        tire = {'id': f'tire-{i}', 'marca': rng.choice(BRANDS), 'modelo': f'P{i % 40} Touring',
+                'ancho': rng.choice(WIDTHS), 'relacion_aspecto': rng.choice(RATIOS),
+                'diametro': rng.choice(DIAMETERS), 'tipo': rng.choice(TYPES)}
+        tires.append(tire)
+        if rng.random() < 0.6:
+            prices[tire['id']] = tuple(sorted(round(rng.uniform(120, 900), 2) for _ in range(rng.randint(1, 6))))
+    return tires, prices
+
+
+def naive_facets(tires, prices, search=None, brand=None, tire_type=None, width=None, aspect_ratio=None,
+                 diameter=None, min_price=None, max_price=None, has_stock=False):
+    """Reference: one full filtering pass per facet."""
+    low = min_price if min_price is not None else float('-inf')
+    high = max_price if max_price is not None else float('inf')
+    tests = {
+        'brand': lambda t: search or not brand or brand.lower() in t['marca'].lower(),
+        'type': lambda t: not tire_type or tire_type.lower() in t['tipo'].lower(),
+        'width': lambda t: not width or t['ancho'] == width,
+        'aspectRatio': lambda t: not aspect_ratio or t['relacion_aspecto'] == aspect_ratio,
+        'diameter': lambda t: not diameter or t['diametro'] == diameter,
+        'stock': lambda t: not has_stock or bool(prices.get(t['id'])),
+    }
+    base = [t for t in tires
+            if (not search or search.lower() in f"{t['marca']} {t['modelo']}".lower())
+            and (min_price is None and max_price is None
+                 or any(low <= p <= high for p in prices.get(t['id'], ())))]
+    columns = {'brand': 'marca', 'type': 'tipo', 'width': 'ancho', 'aspectRatio': 'relacion_aspecto',
+               'diameter': 'diametro'}
+    result = {}
+    for facet, test in tests.items():
+        others = [other for name, other in tests.items() if name != facet]
+        selected = [t for t in base if all(other(t) for other in others)]
+        if facet == 'stock':
+            in_stock = sum(1 for t in selected if prices.get(t['id']))
+            result[facet] = {'inStock': in_stock, 'outOfStock': len(selected) - in_stock}
+        else:
+            counter = {}
+            for t in selected:
+                counter[t[columns[facet]]] = counter.get(t[columns[facet]], 0) + 1
+            result[facet] = counter
+    total = sum(1 for t in base if all(test(t) for test in tests.values()))
+    return total, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark de facetas del catálogo')
+    parser.add_argument('--tires', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    tires, prices = synthetic_catalog(args.tires)
+    index = CatalogIndex()
+    index.load_rows(tires, prices)
+
+    ok = True
+    print(f"{args.tires} llantas, {len(prices)} con stock")
+    print(f"{'filtros':<70} {'total':>7} {'mejor ms':>9} {'mediana ms':>11}")
+    for filters in FILTER_SETS:
+        result = index.facets(**filters)
+        total, expected = naive_facets(tires, prices, **filters)
+        got = {facet: ({entry['value']: entry['count'] for entry in values} if facet != 'stock' else values)
+               for facet, values in result['facets'].items()}
+        if result['total'] != total or got != expected:
+            ok = False
+            print(f"ERROR: {filters}: las facetas no coinciden con el cálculo ingenuo")
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.facets(**filters)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{str(filters):<70} {result['total']:>7} {min(timings):>9.2f} {statistics.median(timings):>11.2f}")
+
+    print("OK: facetas idénticas al cálculo ingenuo" if ok else "ERROR: facetas distintas")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Microbenchmark del motor de filtros del catálogo (GET /api/tires).
+Uso: python scripts/bench_filtros.py [--tires 20000] [--repeat 20]
+
+No usa la base de datos: carga el índice con el catálogo sintético de
+bench_facets y, para cada combinación de filtros, compara la página de
+query() con un filtrado ingenuo de la lista (más nueva primero) y reporta el
+tiempo. Después aplica altas, ediciones y bajas incrementales y verifica que
+el índice coincida con uno cargado desde cero con el estado final.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.catalog.index import CatalogIndex
+from bench_facets import BRANDS, TYPES, WIDTHS, DIAMETERS, synthetic_catalog
+
+FILTER_SETS = (
+    {},
+    {'brand': 'good', 'skip': 40, 'limit': 20},
+    {'tire_type': 'auto', 'width': 205, 'diameter': 16},
+    {'min_price': 180.0, 'max_price': 260.0},
+    {'has_stock': True, 'max_price': 150.0, 'diameter': 15},
+    {'search': 'continental p3', 'min_price': 300.0, 'skip': 5, 'limit': 10},
+)
+
+
+def naive_query(tires, prices, search=None, brand=None, tire_type=None, width=None, aspect_ratio=None,
+                diameter=None, min_price=None, max_price=None, has_stock=False, skip=0, limit=100):
+    """Reference: filter the newest-first list tire by tire."""
+    low = min_price if min_price is not None else float('-inf')
+    high = max_price if max_price is not None else float('inf')
+    matches = []
+    for tire in reversed(tires):
+        tire_prices = prices.get(tire['id'], ())
+        if search and search.lower() not in f"{tire['marca']} {tire['modelo']}".lower():
+            continue
+        if not search and brand and brand.lower() not in tire['marca'].lower():
+            continue
+        if tire_type and tire_type.lower() not in tire['tipo'].lower():
+            continue
+        if (width and tire['ancho'] != width or aspect_ratio and tire['relacion_aspecto'] != aspect_ratio
+                or diameter and tire['diametro'] != diameter):
+            continue
+        if has_stock and not tire_prices:
+            continue
+        if (min_price is not None or max_price is not None) and not any(low <= p <= high for p in tire_prices):
+            continue
+        matches.append(tire['id'])
+    return matches[skip:skip + limit], len(matches)
+
+
+def check_incremental(tires, prices, rounds=2000, seed=11):
+    """Apply random upserts/removes to a loaded index and compare with a fresh load."""
+    rng = random.Random(seed)
+    index = CatalogIndex()
+    index.load_rows(tires, prices)
+    index.ttl_seconds = float('inf')
+    current = {tire['id']: dict(tire) for tire in tires}
+    order = [tire['id'] for tire in tires]
+    next_id = len(tires)
+    for _ in range(rounds):
+        action = rng.random()
+        if action < 0.4:
+            tire = {'id': f'tire-{next_id}', 'marca': rng.choice(BRANDS), 'modelo': 'Nuevo',
+                    'ancho': rng.choice(WIDTHS), 'relacion_aspecto': 55,
+                    'diametro': rng.choice(DIAMETERS), 'tipo': rng.choice(TYPES)}
+            next_id += 1
+            current[tire['id']] = tire
+            order.append(tire['id'])
+            index.upsert(tire)
+        elif action < 0.8 and current:
+            tire = current[rng.choice(order)]
+            tire.update(marca=rng.choice(BRANDS), diametro=rng.choice(DIAMETERS))
+            index.upsert(tire)
+        elif current:
+            tire_id = rng.choice(order)
+            order.remove(tire_id)
+            del current[tire_id]
+            index.remove(tire_id)
+
+    remaining = [current[tire_id] for tire_id in order]
+    fresh = CatalogIndex()
+    fresh.load_rows(remaining, prices)
+    fresh.ttl_seconds = float('inf')
+    for filters in FILTER_SETS + ({'brand': 'mich', 'limit': 100000},):
+        if index.query(**filters) != fresh.query(**filters):
+            return False
+        facet_filters = {k: v for k, v in filters.items() if k not in ('skip', 'limit')}
+        if index.facets(**facet_filters) != fresh.facets(**facet_filters):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark del motor de filtros del catálogo')
+    parser.add_argument('--tires', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    tires, prices = synthetic_catalog(args.tires)
+    index = CatalogIndex()
+    index.load_rows(tires, prices)
+
+    ok = True
+    print(f"{args.tires} llantas, {len(prices)} con stock")
+    print(f"{'filtros':<80} {'total':>7} {'mejor ms':>9} {'mediana ms':>11}")
+    for filters in FILTER_SETS:
+        page, total = index.query(**filters)
+        if (page, total) != naive_query(tires, prices, **filters):
+            ok = False
+            print(f"ERROR: {filters}: la página no coincide con el filtrado ingenuo")
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.query(**filters)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{str(filters):<80} {total:>7} {min(timings):>9.2f} {statistics.median(timings):>11.2f}")
+
+    if not check_incremental(tires, prices):
+        ok = False
+        print("ERROR: el índice incremental no coincide con una carga desde cero")
+
+    print("OK: páginas idénticas e índice incremental consistente" if ok else "ERROR: resultados distintos")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
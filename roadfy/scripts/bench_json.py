@@ -0,0 +1,85 @@
+"""
+Benchmark de codificación JSON sobre payloads de listados.
+Uso: python scripts/bench_json.py [--rows 100 10000] [--repeat 20]
+
+Compara, para listados de llantas, negocios e inventario:
+  flask:  json de la stdlib como el proveedor por defecto de Flask (sort_keys,
+          ensure_ascii) sobre la salida de *_to_dict (fechas ya en texto)
+  stdlib: dumps_api con el respaldo de la stdlib sobre las filas mapeadas
+  orjson: dumps_api con orjson (si está instalado) sobre las filas mapeadas
+Verifica que las tres rutas produzcan el mismo JSON y reporta el mejor tiempo.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.utils import jsoncodec
+from app.utils.serializers import compile_row_mapper
+from bench_serializers import CASES
+
+
+def flask_default_dumps(value):
+    return json.dumps(value, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def best_time(function, payload, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del codificador JSON')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    encoders = [('stdlib', jsoncodec._stdlib_dumps_api)]
+    if jsoncodec.orjson is not None:
+        encoders.append(('orjson', jsoncodec.dumps_api))
+    else:
+        print("orjson no está instalado: solo se mide el respaldo de la stdlib")
+
+    ok = True
+    header = f"{'tipo':<10} {'filas':>6} {'flask (ms)':>11}" + ''.join(f" {name + ' (ms)':>12} {'x':>6}" for name, _ in encoders)
+    print(header)
+    for kind, make_row, to_dict in CASES:
+        if kind == 'review':
+            continue
+        for rows in args.rows:
+            dict_rows = [make_row(i) for i in range(rows)]
+            columns = tuple(dict_rows[0])
+            mapper = compile_row_mapper(kind, columns)
+            legacy_payload = [to_dict(row) for row in dict_rows]
+            mapped_payload = [mapper(tuple(row[column] for column in columns)) for row in dict_rows]
+
+            expected = json.loads(flask_default_dumps(legacy_payload))
+            for name, encode in encoders:
+                if jsoncodec.loads(encode(mapped_payload)) != expected:
+                    ok = False
+                    print(f"ERROR: {kind}/{name}: el JSON no coincide")
+
+            baseline = best_time(flask_default_dumps, legacy_payload, args.repeat)
+            line = f"{kind:<10} {rows:>6} {baseline * 1000:>11.3f}"
+            for name, encode in encoders:
+                elapsed = best_time(encode, mapped_payload, args.repeat)
+                line += f" {elapsed * 1000:>12.3f} {baseline / elapsed:>6.2f}"
+            print(line)
+
+    print("OK: mismo JSON en todas las rutas" if ok else "ERROR: las rutas producen JSON distinto")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Microbenchmark de serialización: funciones *_to_dict sobre filas dict frente a
+los mapeadores compilados sobre filas en tupla.
+Uso: python scripts/bench_serializers.py [--rows 10000] [--repeat 5]
+
+No usa la base de datos: genera filas sintéticas con las mismas columnas que los
+listados y verifica que ambas rutas produzcan el mismo JSON. Reporta el tiempo
+por 10k filas (mejor de --repeat corridas) de:
+  dict:       *_to_dict sobre filas ya convertidas a dict
+  DictCursor: armar el dict de la fila como pymysql.cursors.DictCursor + *_to_dict
+  tupla:      mapeador compilado sobre la fila en tupla (cursor no-dict)
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.utils.jsoncodec import dumps_api, loads
+from app.utils.serializers import (
+    tire_to_dict, business_to_dict, inventory_to_dict, review_to_dict, compile_row_mapper
+)
+
+BASE_DATE = datetime(2025, 1, 1, 8, 30)
+
+
+def tire_row(i):
+    return {'id': f'tire-{i}', 'marca': 'Michelin', 'modelo': f'Primacy {i % 7}', 'ancho': 205,
+            'relacion_aspecto': 55, 'diametro': 16, 'tipo': 'Auto', 'url_imagen': None,
+            'creado_en': BASE_DATE + timedelta(minutes=i)}
+
+
+def business_row(i):
+    return {'id': f'biz-{i}', 'nombre': f'Llantera {i}', 'direccion': f'Av. Siempre Viva {i}',
+            'telefono': '999 888 777', 'correo': f'negocio{i}@roadfy.pe', 'horarios': 'L-S 8-18',
+            'descripcion': None, 'calificacion': Decimal('4.3'), 'cantidad_resenas': i % 50,
+            'url_mapa_google': None, 'url_imagen': 'https://example.com/a.png', 'redes_sociales': None,
+            'creado_en': BASE_DATE + timedelta(minutes=i),
+            'latitud': Decimal('-12.046374') if i % 2 else None, 'longitud': Decimal('-77.042793') if i % 2 else None}
+
+
+def inventory_row(i):
+    return {'id': f'inv-{i}', 'negocio_id': f'biz-{i % 40}', 'llanta_id': f'tire-{i % 300}',
+            'cantidad': i % 30, 'cantidad_reservada': i % 3, 'precio': Decimal('249.90'),
+            'version': 1 + i % 5, 'creado_en': BASE_DATE + timedelta(minutes=i)}
+
+
+def review_row(i):
+    return {'id': f'review-{i}', 'negocio_id': f'biz-{i % 40}', 'usuario_id': f'user-{i}',
+            'nombre_usuario': f'cliente{i}', 'avatar_usuario': None, 'calificacion': 1 + i % 5,
+            'comentario': 'Buen servicio', 'creado_en': BASE_DATE + timedelta(minutes=i)}
+
+
+CASES = (
+    ('tire', tire_row, tire_to_dict),
+    ('business', business_row, business_to_dict),
+    ('inventory', inventory_row, inventory_to_dict),
+    ('review', review_row, review_to_dict),
+)
+
+
+def best_time(function, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            function(row)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark de serializadores')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'tipo':<10} {'dict':>8} {'DictCursor':>11} {'tupla':>8} {'filas/s tupla':>14} {'x':>6}   (ms/10k filas)")
+    for kind, make_row, to_dict in CASES:
+        dict_rows = [make_row(i) for i in range(args.rows)]
+        columns = tuple(dict_rows[0])
+        tuple_rows = [tuple(row[column] for column in columns) for row in dict_rows]
+        mapper = compile_row_mapper(kind, columns)
+
+        mismatches = sum(1 for d, t in zip(dict_rows, tuple_rows) if loads(dumps_api(to_dict(d))) != loads(dumps_api(mapper(t))))
+        if mismatches:
+            ok = False
+            print(f"ERROR: {kind}: {mismatches} filas con salida distinta")
+
+        dict_time = best_time(to_dict, dict_rows, args.repeat)
+        cursor_time = best_time(lambda row: to_dict(dict(zip(columns, row))), tuple_rows, args.repeat)
+        tuple_time = best_time(mapper, tuple_rows, args.repeat)
+        scale = 10000 * 1000 / args.rows
+        print(f"{kind:<10} {dict_time * scale:>8.2f} {cursor_time * scale:>11.2f} {tuple_time * scale:>8.2f} "
+              f"{args.rows / tuple_time:>14.0f} {cursor_time / tuple_time:>6.2f}")
+
+    print("OK: salidas idénticas" if ok else "ERROR: los mapeadores no coinciden con *_to_dict")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de asignación de versiones bajo actualizaciones concurrentes del mismo registro.
+Uso: python scripts/bench_versiones.py [--threads 16] [--per-thread 50]
+
+Crea versiones en paralelo sobre un registro de prueba, verifica que los números
+de versión sean únicos y consecutivos, reporta versiones/segundo y limpia los datos.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.db import get_db
+from app.governance.versioning import create_version
+
+BENCH_TABLE = 'bench_versiones'
+
+
+def worker(record_id, thread_index, count):
+    ok = 0
+    for i in range(count):
+        data = {'id': record_id, 'hilo': thread_index, 'iteracion': i}
+        if create_version(BENCH_TABLE, record_id, data, change_reason='benchmark'):
+            ok += 1
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de create_version concurrente')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--per-thread', type=int, default=50)
+    args = parser.parse_args()
+
+    record_id = f"bench-{uuid.uuid4().hex[:8]}"
+    expected = args.threads * args.per_thread
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        futures = [executor.submit(worker, record_id, t, args.per_thread) for t in range(args.threads)]
+        created = sum(f.result() for f in futures)
+    elapsed = time.perf_counter() - start
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) AS total, COUNT(DISTINCT version) AS distintas,
+                   MIN(version) AS minima, MAX(version) AS maxima
+            FROM historial_versiones WHERE tabla = %s AND registro_id = %s
+        """, (BENCH_TABLE, record_id))
+        result = cursor.fetchone()
+        cursor.execute("DELETE FROM historial_versiones WHERE tabla = %s AND registro_id = %s",
+                       (BENCH_TABLE, record_id))
+        cursor.execute("DELETE FROM contadores_versiones WHERE tabla = %s AND registro_id = %s",
+                       (BENCH_TABLE, record_id))
+        cursor.close()
+
+    print(f"Versiones creadas: {created}/{expected} en {elapsed:.2f}s "
+          f"({created / elapsed:.0f} versiones/s, {args.threads} hilos)")
+    print(f"Filas: {result['total']}, versiones distintas: {result['distintas']}, "
+          f"rango: {result['minima']}..{result['maxima']}")
+
+    consistent = (result['total'] == result['distintas'] == created
+                  and result['minima'] == 1 and result['maxima'] == created)
+    print("OK: versiones únicas y consecutivas" if consistent else "ERROR: versiones duplicadas o con huecos")
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
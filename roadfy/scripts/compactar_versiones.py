@@ -0,0 +1,33 @@
+"""
+Compacta el historial de versiones existente al formato snapshot + deltas.
+Uso: python scripts/compactar_versiones.py [--table negocios_llantas] [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.governance.versioning import compact_versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compacta historial_versiones en snapshots + deltas')
+    parser.add_argument('--table', help='Compactar solo esta tabla')
+    parser.add_argument('--batch-size', type=int, default=500, help='Registros por transacción')
+    args = parser.parse_args()
+
+    stats = compact_versions(table=args.table, batch_size=args.batch_size)
+
+    print(f"Registros procesados: {stats['registros']}")
+    print(f"Versiones compactadas: {stats['versiones_compactadas']}")
+    if stats['bytes_antes']:
+        saved = 100 - (stats['bytes_despues'] * 100 / stats['bytes_antes'])
+        print(f"Datos: {stats['bytes_antes']} -> {stats['bytes_despues']} bytes ({saved:.1f}% menos)")
+
+
+if __name__ == "__main__":
+    main()
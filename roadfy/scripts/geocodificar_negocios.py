@@ -0,0 +1,69 @@
+"""
+Carga en lote las coordenadas de los negocios desde un archivo local (CSV o JSON),
+p. ej. la salida de un geocodificador por lotes.
+Uso: python scripts/geocodificar_negocios.py ubicaciones.csv [--batch-size 500]
+
+CSV: encabezados lat/latitud, lng/longitud y id (id del negocio) o direccion/address.
+Sin id, la fila se asigna a los negocios con la misma dirección (sin distinguir
+mayúsculas, comas ni espacios).
+JSON: lista de objetos {"id" o "address", "lat", "lng"}.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.businesses.geo import import_locations
+
+CSV_COLUMNS = {
+    'id': ('id', 'negocio_id', 'business_id'),
+    'address': ('direccion', 'address'),
+    'lat': ('lat', 'latitud', 'latitude'),
+    'lng': ('lng', 'lon', 'longitud', 'longitude'),
+}
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        for row in csv.DictReader(handle):
+            row = {str(k).strip().lower(): (v or '').strip() for k, v in row.items() if k}
+
+            def pick(field):
+                for column in CSV_COLUMNS[field]:
+                    if row.get(column):
+                        return row[column]
+                return None
+
+            yield {field: pick(field) for field in CSV_COLUMNS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importación de coordenadas de negocios')
+    parser.add_argument('file', help='Archivo .csv o .json')
+    parser.add_argument('--batch-size', type=int, default=500, help='Filas por lote de actualización')
+    args = parser.parse_args()
+
+    if args.file.lower().endswith('.json'):
+        with open(args.file, encoding='utf-8') as handle:
+            rows = json.load(handle)
+    else:
+        rows = list(read_csv(args.file))
+
+    report = import_locations(rows, batch_size=args.batch_size)
+
+    print(f"Recibidas: {report['received']}")
+    print(f"Negocios actualizados: {report['updated']}")
+    print(f"Sin negocio coincidente: {report['unmatched']}")
+    print(f"Coordenadas inválidas: {report['invalid']}")
+    for error in report['errors'][:20]:
+        print(f"  fila {error['index'] + 1}: {error['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Importa llantas al catálogo desde un archivo CSV o JSON, omitiendo duplicados.
+Uso: python scripts/importar_llantas.py llantas.csv [--batch-size 500]
+
+CSV: encabezados marca, modelo, ancho, perfil, diametro, tipo, url_imagen (o en inglés:
+brand, model, width, aspect_ratio, diameter, type, image_url; id opcional).
+JSON: lista de objetos con el formato de POST /api/tires.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.catalog.tire_import import import_tires
+
+CSV_COLUMNS = {
+    'id': ('id',),
+    'brand': ('marca', 'brand'),
+    'model': ('modelo', 'model'),
+    'width': ('ancho', 'width'),
+    'aspectRatio': ('perfil', 'relacion_aspecto', 'aspect_ratio', 'ratio'),
+    'diameter': ('diametro', 'diameter', 'rin'),
+    'type': ('tipo', 'type'),
+    'imageUrl': ('url_imagen', 'image_url', 'imageurl'),
+}
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        for row in csv.DictReader(handle):
+            row = {str(k).strip().lower(): (v or '').strip() for k, v in row.items() if k}
+
+            def pick(field):
+                for column in CSV_COLUMNS[field]:
+                    if row.get(column):
+                        return row[column]
+                return None
+
+            yield {
+                'id': pick('id'),
+                'brand': pick('brand'),
+                'model': pick('model'),
+                'size': {
+                    'width': pick('width'),
+                    'aspectRatio': pick('aspectRatio'),
+                    'diameter': pick('diameter')
+                },
+                'type': pick('type'),
+                'imageUrl': pick('imageUrl')
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importación masiva del catálogo de llantas')
+    parser.add_argument('file', help='Archivo .csv o .json')
+    parser.add_argument('--batch-size', type=int, default=500, help='Filas por lote de inserción')
+    args = parser.parse_args()
+
+    if args.file.lower().endswith('.json'):
+        with open(args.file, encoding='utf-8') as handle:
+            tires = json.load(handle)
+    else:
+        tires = list(read_csv(args.file))
+
+    report = import_tires(tires, batch_size=args.batch_size)
+
+    print(f"Recibidas: {report['received']}")
+    print(f"Insertadas: {report['inserted']}")
+    print(f"Duplicadas (omitidas): {report['duplicates']}")
+    print(f"Con error: {report['failed']}")
+    for error in report['errors'][:20]:
+        print(f"  fila {error['index'] + 1}: {error['error']}")
+    print(f"Tiempo: {report['elapsed_seconds']}s ({report['rows_per_second']} filas insertadas/s)")
+
+
+if __name__ == "__main__":
+    main()
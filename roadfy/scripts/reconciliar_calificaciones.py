@@ -0,0 +1,33 @@
+"""
+Recalcula los agregados de calificación de los negocios desde resenas y corrige la deriva.
+Pensado para cron, p. ej.: 30 3 * * * python scripts/reconciliar_calificaciones.py
+Uso: python scripts/reconciliar_calificaciones.py [--batch-size 500] [--business-id ID]
+"""
+import argparse
+import os
+import sys
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.businesses.ratings import reconcile_ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcilia los agregados de calificación de los negocios')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--business-id', help='Reconciliar solo este negocio')
+    args = parser.parse_args()
+
+    stats = reconcile_ratings(batch_size=args.batch_size, business_id=args.business_id)
+
+    print(f"Negocios revisados: {stats['businesses']}")
+    print(f"Negocios corregidos: {stats['corrected']}")
+    for business_id in stats['corrected_ids']:
+        print(f"  - {business_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Envía el resumen diario de stock bajo a los administradores de cada negocio.
+Pensado para cron, p. ej.: 0 7 * * * python scripts/resumen_stock_bajo.py
+Uso: python scripts/resumen_stock_bajo.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.inventory.low_stock import send_low_stock_digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Envía el resumen diario de stock bajo')
+    parser.add_argument('--dry-run', action='store_true', help='Calcular el resumen sin enviar emails')
+    args = parser.parse_args()
+
+    stats = send_low_stock_digest(dry_run=args.dry_run)
+
+    print(f"Negocios con stock bajo: {stats['businesses']}")
+    print(f"Items en alerta: {stats['items']}")
+    print(f"Destinatarios: {stats['recipients']}")
+    print(f"Emails enviados: {stats['sent']}")
+
+
+if __name__ == "__main__":
+    main()
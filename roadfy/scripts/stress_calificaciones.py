@@ -0,0 +1,108 @@
+"""
+Prueba de concurrencia de los agregados de calificación.
+Uso: python scripts/stress_calificaciones.py [--threads 16] [--per-thread 25]
+
+Crea un negocio de prueba, inserta reseñas en paralelo aplicando apply_review()
+en la misma transacción, elimina una parte también en paralelo y verifica que
+reconcile_ratings() no encuentre deriva. Al final limpia los datos.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# Asegurar que el directorio del proyecto esté en el path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from app.db import get_db
+from app.businesses.ratings import apply_review, reconcile_ratings
+
+
+def add_reviews(business_id, thread_index, count):
+    review_ids = []
+    with get_db() as conn:
+        cursor = conn.cursor()
+        for i in range(count):
+            review_id = f"review-{business_id}-{thread_index}-{i}"
+            rating = (thread_index + i) % 5 + 1
+            cursor.execute("""
+                INSERT INTO resenas (id, negocio_id, usuario_id, nombre_usuario, calificacion, comentario, creado_en)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (review_id, business_id, f"stress-{thread_index}-{i}", 'stress', rating, 'stress',
+                  datetime.now(timezone.utc)))
+            apply_review(cursor, business_id, rating)
+            conn.commit()
+            review_ids.append((review_id, rating))
+        cursor.close()
+    return review_ids
+
+
+def remove_reviews(business_id, reviews):
+    with get_db() as conn:
+        cursor = conn.cursor()
+        for review_id, rating in reviews:
+            cursor.execute("DELETE FROM resenas WHERE id = %s", (review_id,))
+            if cursor.rowcount == 1:
+                apply_review(cursor, business_id, rating, sign=-1)
+            conn.commit()
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de concurrencia de apply_review')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--per-thread', type=int, default=25)
+    args = parser.parse_args()
+
+    business_id = f"stress-{uuid.uuid4().hex[:8]}"
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO negocios_llantas (id, nombre, direccion, telefono, calificacion, cantidad_resenas, creado_en)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (business_id, 'Negocio de prueba', 'N/A', '000000000', 0.0, 0, datetime.now(timezone.utc)))
+        conn.commit()
+        cursor.close()
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            futures = [executor.submit(add_reviews, business_id, t, args.per_thread) for t in range(args.threads)]
+            created = [review for f in futures for review in f.result()]
+            # Eliminar una de cada tres reseñas, repartidas entre los hilos
+            doomed = created[::3]
+            chunks = [doomed[t::args.threads] for t in range(args.threads)]
+            list(executor.map(lambda chunk: remove_reviews(business_id, chunk), chunks))
+        elapsed = time.perf_counter() - start
+
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT cantidad_resenas, calificacion FROM negocios_llantas WHERE id = %s",
+                           (business_id,))
+            stored = cursor.fetchone()
+            cursor.close()
+
+        stats = reconcile_ratings(business_id=business_id)
+        expected = len(created) - len(doomed)
+        print(f"Reseñas creadas: {len(created)}, eliminadas: {len(doomed)} en {elapsed:.2f}s ({args.threads} hilos)")
+        print(f"Guardado: {stored['cantidad_resenas']} reseñas, calificación {stored['calificacion']}")
+
+        consistent = stats['corrected'] == 0 and stored['cantidad_resenas'] == expected
+        print("OK: agregados sin deriva" if consistent else "ERROR: los agregados no coinciden con resenas")
+    finally:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM resenas WHERE negocio_id = %s", (business_id,))
+            cursor.execute("DELETE FROM negocios_llantas WHERE id = %s", (business_id,))
+            cursor.close()
+
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+-- Alertas de stock bajo: umbral configurable por negocio y conjunto de items
+-- por debajo del umbral, mantenido por las escrituras de inventario.
+ALTER TABLE negocios_llantas
+    ADD COLUMN umbral_stock_bajo INT NOT NULL DEFAULT 10;
+
+CREATE TABLE IF NOT EXISTS alertas_stock_bajo (
+    item_id VARCHAR(255) PRIMARY KEY,
+    negocio_id VARCHAR(255) NOT NULL,
+    llanta_id VARCHAR(255) NOT NULL,
+    cantidad INT NOT NULL,
+    umbral INT NOT NULL,
+    desde DATETIME NOT NULL,
+    notificado_en DATETIME NULL,
+    INDEX idx_alertas_negocio (negocio_id, cantidad)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Carga inicial desde el inventario actual
+INSERT IGNORE INTO alertas_stock_bajo (item_id, negocio_id, llanta_id, cantidad, umbral, desde)
+SELECT i.id, i.negocio_id, i.llanta_id, i.cantidad, n.umbral_stock_bajo, UTC_TIMESTAMP()
+FROM items_inventario i
+JOIN negocios_llantas n ON n.id = i.negocio_id
+WHERE i.cantidad < n.umbral_stock_bajo;
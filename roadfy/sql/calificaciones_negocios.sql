@@ -0,0 +1,27 @@
+-- Agregados de calificación por negocio: suma e histograma por estrellas,
+-- mantenidos con incrementos atómicos al crear o eliminar reseñas.
+ALTER TABLE negocios_llantas
+    ADD COLUMN suma_calificaciones INT NOT NULL DEFAULT 0,
+    ADD COLUMN estrellas_1 INT NOT NULL DEFAULT 0,
+    ADD COLUMN estrellas_2 INT NOT NULL DEFAULT 0,
+    ADD COLUMN estrellas_3 INT NOT NULL DEFAULT 0,
+    ADD COLUMN estrellas_4 INT NOT NULL DEFAULT 0,
+    ADD COLUMN estrellas_5 INT NOT NULL DEFAULT 0;
+
+-- Carga inicial desde las reseñas actuales
+UPDATE negocios_llantas n
+LEFT JOIN (
+    SELECT negocio_id, COUNT(*) AS cantidad, SUM(calificacion) AS suma,
+           SUM(calificacion = 1) AS e1, SUM(calificacion = 2) AS e2, SUM(calificacion = 3) AS e3,
+           SUM(calificacion = 4) AS e4, SUM(calificacion = 5) AS e5
+    FROM resenas
+    GROUP BY negocio_id
+) r ON r.negocio_id = n.id
+SET n.cantidad_resenas = COALESCE(r.cantidad, 0),
+    n.suma_calificaciones = COALESCE(r.suma, 0),
+    n.estrellas_1 = COALESCE(r.e1, 0),
+    n.estrellas_2 = COALESCE(r.e2, 0),
+    n.estrellas_3 = COALESCE(r.e3, 0),
+    n.estrellas_4 = COALESCE(r.e4, 0),
+    n.estrellas_5 = COALESCE(r.e5, 0),
+    n.calificacion = IF(COALESCE(r.cantidad, 0) > 0, ROUND(r.suma / r.cantidad, 1), 0);
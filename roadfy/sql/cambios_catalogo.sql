@@ -0,0 +1,11 @@
+-- Registro de cambios del catálogo de llantas (ver app/catalog/index.py).
+-- Cada alta, edición y baja de llantas inserta aquí el id en la misma
+-- transacción; el índice del catálogo de cada worker lo lee por id antes de
+-- responder para aplicar los cambios hechos por otros procesos. Las filas se
+-- purgan tras INVENTORY_EVENTS_RETENTION_HOURS.
+CREATE TABLE IF NOT EXISTS cambios_catalogo (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    llanta_id VARCHAR(255) NOT NULL,
+    creado_en DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_cambios_catalogo_creado (creado_en)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,18 @@
+-- Contador de versiones por registro: asignación O(1) y sin duplicados bajo concurrencia.
+CREATE TABLE IF NOT EXISTS contadores_versiones (
+    tabla VARCHAR(100) NOT NULL,
+    registro_id VARCHAR(255) NOT NULL,
+    ultima_version INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tabla, registro_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Inicializar los contadores con el historial existente
+INSERT INTO contadores_versiones (tabla, registro_id, ultima_version)
+SELECT tabla, registro_id, MAX(version) FROM historial_versiones
+GROUP BY tabla, registro_id
+ON DUPLICATE KEY UPDATE ultima_version = GREATEST(ultima_version, VALUES(ultima_version));
+
+-- Garantiza que nunca existan dos filas con la misma versión de un registro.
+-- Si falla por duplicados previos, renumerarlos antes de aplicar la restricción.
+ALTER TABLE historial_versiones
+    ADD UNIQUE KEY uq_version_registro (tabla, registro_id, version);
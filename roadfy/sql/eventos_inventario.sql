@@ -0,0 +1,11 @@
+-- Eventos de inventario compartidos entre procesos (ver app/inventory/events.py).
+-- Cada worker inserta aquí los eventos que publica y lee los de los demás por id;
+-- las filas se purgan tras INVENTORY_EVENTS_RETENTION_HOURS.
+CREATE TABLE IF NOT EXISTS eventos_inventario (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(32) NOT NULL,
+    origen VARCHAR(16) NOT NULL,
+    datos LONGTEXT NOT NULL,
+    creado_en DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_eventos_inventario_creado (creado_en)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,42 @@
+-- Historial de precios de inventario (solo inserción) y agregados diarios OHLC.
+-- historial_precios guarda cada cambio de precio/cantidad de un item;
+-- precios_diarios se actualiza en la misma transacción y es lo que leen los
+-- endpoints de gráficos (las semanas se agregan a partir de los días).
+CREATE TABLE IF NOT EXISTS historial_precios (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    item_id VARCHAR(255) NOT NULL,
+    negocio_id VARCHAR(255) NOT NULL,
+    llanta_id VARCHAR(255) NOT NULL,
+    precio DECIMAL(10, 2) NOT NULL,
+    cantidad INT NOT NULL,
+    registrado_en DATETIME(6) NOT NULL,
+    INDEX idx_historial_precios_item (item_id, registrado_en),
+    INDEX idx_historial_precios_llanta (llanta_id, registrado_en)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS precios_diarios (
+    negocio_id VARCHAR(255) NOT NULL,
+    llanta_id VARCHAR(255) NOT NULL,
+    dia DATE NOT NULL,
+    apertura DECIMAL(10, 2) NOT NULL,
+    maximo DECIMAL(10, 2) NOT NULL,
+    minimo DECIMAL(10, 2) NOT NULL,
+    cierre DECIMAL(10, 2) NOT NULL,
+    cantidad_cierre INT NOT NULL,
+    muestras INT NOT NULL DEFAULT 1,
+    primer_registro DATETIME(6) NOT NULL,
+    ultimo_registro DATETIME(6) NOT NULL,
+    PRIMARY KEY (negocio_id, llanta_id, dia),
+    INDEX idx_precios_diarios_llanta (llanta_id, dia)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Carga inicial: el precio actual de cada item como primer punto de la serie
+INSERT INTO historial_precios (item_id, negocio_id, llanta_id, precio, cantidad, registrado_en)
+SELECT id, negocio_id, llanta_id, precio, cantidad, UTC_TIMESTAMP(6) FROM items_inventario;
+
+INSERT IGNORE INTO precios_diarios
+    (negocio_id, llanta_id, dia, apertura, maximo, minimo, cierre, cantidad_cierre,
+     muestras, primer_registro, ultimo_registro)
+SELECT negocio_id, llanta_id, UTC_DATE(), precio, precio, precio, precio, cantidad,
+       1, UTC_TIMESTAMP(6), UTC_TIMESTAMP(6)
+FROM items_inventario;
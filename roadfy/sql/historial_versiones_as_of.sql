@@ -0,0 +1,4 @@
+-- Índices para reconstrucción en el tiempo (GET /api/governance/as-of).
+ALTER TABLE historial_versiones
+    ADD INDEX idx_versiones_registro_fecha (tabla, registro_id, creado_en),
+    ADD INDEX idx_versiones_tabla_fecha (tabla, creado_en);
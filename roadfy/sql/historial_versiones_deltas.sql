@@ -0,0 +1,8 @@
+-- Versionado con snapshots periódicos + deltas JSON.
+-- Las filas existentes quedan como snapshots (es_snapshot = 1); para compactarlas
+-- ejecutar: python scripts/compactar_versiones.py
+ALTER TABLE historial_versiones
+    MODIFY datos_completos JSON NULL,
+    ADD COLUMN es_snapshot TINYINT(1) NOT NULL DEFAULT 1 AFTER version,
+    ADD COLUMN datos_delta JSON NULL AFTER datos_completos,
+    ADD INDEX idx_versiones_snapshot (tabla, registro_id, es_snapshot, version);
@@ -0,0 +1,19 @@
+-- Trabajos de importación de inventario (POST /api/inventory/import).
+CREATE TABLE IF NOT EXISTS importaciones_inventario (
+    id VARCHAR(50) PRIMARY KEY,
+    negocio_id VARCHAR(255) NOT NULL,
+    usuario_id VARCHAR(255) NULL,
+    formato VARCHAR(10) NOT NULL,
+    estado ENUM('EN_COLA', 'EN_PROCESO', 'COMPLETADO', 'FALLIDO') NOT NULL DEFAULT 'EN_COLA',
+    procesadas INT NOT NULL DEFAULT 0,
+    insertadas INT NOT NULL DEFAULT 0,
+    actualizadas INT NOT NULL DEFAULT 0,
+    sin_cambios INT NOT NULL DEFAULT 0,
+    fallidas INT NOT NULL DEFAULT 0,
+    errores JSON NULL,
+    mensaje_error TEXT NULL,
+    creado_en DATETIME NOT NULL,
+    iniciado_en DATETIME NULL,
+    finalizado_en DATETIME NULL,
+    INDEX idx_importaciones_negocio (negocio_id, creado_en)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,6 @@
+-- Latido de los trabajos de importación (ver app/inventory/imports.py).
+-- El proceso que corre un trabajo lo actualiza cada IMPORT_HEARTBEAT_SECONDS;
+-- los trabajos pendientes sin latido reciente se marcan como FALLIDO.
+ALTER TABLE importaciones_inventario
+    ADD COLUMN latido_en DATETIME NULL AFTER finalizado_en,
+    ADD INDEX idx_importaciones_estado (estado, latido_en);
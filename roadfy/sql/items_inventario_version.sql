@@ -0,0 +1,5 @@
+-- Control de concurrencia optimista en items_inventario.
+-- Cada escritura incrementa version; PUT /api/inventory/<id> acepta If-Match
+-- (o 'version' en el cuerpo) y responde 409 si la fila cambió.
+ALTER TABLE items_inventario
+    ADD COLUMN version INT NOT NULL DEFAULT 1 AFTER precio;
@@ -0,0 +1,2 @@
+-- Índice para paginar las reseñas de un negocio por keyset (creado_en DESC, id DESC)
+CREATE INDEX idx_resenas_negocio_fecha ON resenas (negocio_id, creado_en, id);
@@ -0,0 +1,22 @@
+-- Reservas de stock para retiro en tienda.
+-- items_inventario.cantidad_reservada suma las reservas ACTIVAS de cada item;
+-- el stock disponible es cantidad - cantidad_reservada. El barrido de
+-- expiración recorre idx_reservas_expiracion en lotes.
+ALTER TABLE items_inventario
+    ADD COLUMN cantidad_reservada INT NOT NULL DEFAULT 0 AFTER cantidad;
+
+CREATE TABLE IF NOT EXISTS reservas_inventario (
+    id VARCHAR(50) PRIMARY KEY,
+    item_id VARCHAR(255) NOT NULL,
+    negocio_id VARCHAR(255) NOT NULL,
+    llanta_id VARCHAR(255) NOT NULL,
+    usuario_id VARCHAR(255) NOT NULL,
+    cantidad INT NOT NULL,
+    estado ENUM('ACTIVA', 'CONFIRMADA', 'LIBERADA', 'EXPIRADA') NOT NULL DEFAULT 'ACTIVA',
+    expira_en DATETIME NOT NULL,
+    creado_en DATETIME NOT NULL,
+    actualizado_en DATETIME NULL,
+    INDEX idx_reservas_expiracion (estado, expira_en),
+    INDEX idx_reservas_usuario (usuario_id, creado_en),
+    INDEX idx_reservas_negocio (negocio_id, estado, creado_en)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
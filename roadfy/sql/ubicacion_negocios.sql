@@ -0,0 +1,6 @@
+-- Ubicación de los negocios para la búsqueda por cercanía (GET /api/businesses/nearby).
+-- Las coordenadas se cargan con scripts/geocodificar_negocios.py o al crear/editar el negocio.
+ALTER TABLE negocios_llantas
+    ADD COLUMN latitud DECIMAL(9, 6) NULL,
+    ADD COLUMN longitud DECIMAL(9, 6) NULL,
+    ADD COLUMN geocodificado_en DATETIME NULL;